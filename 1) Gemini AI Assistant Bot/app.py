@@ -2,7 +2,12 @@ import os
 import streamlit as st
 from dotenv import load_dotenv
 import google.generativeai as genai
-import speech_recognition as sr
+
+from chat_session import StreamingChat
+from math_solver import LocalSolver, grounding_note
+from history_store import HistoryStore
+from response_cache import ResponseCache
+from voice_capture import VoiceCapture
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,65 +25,161 @@ genai.configure(api_key=gemini_api_key)
 st.set_page_config(page_title="Gemini AI Math & Knowledge Assistant", layout="wide")
 st.markdown("<h1 style='text-align: center; color: #ff6600; font-size: 42px; font-weight: bold;'>Gemini AI Math & Knowledge Assistant</h1>", unsafe_allow_html=True)
 
-# Define a helper function to generate responses using Google Gemini
-def generate_response(prompt, model_name="gemini-2.0-flash"):  # Use a valid model name
-    try:
-        model = genai.GenerativeModel(model_name)  # Initialize the model
-        response = model.generate_content(prompt)  # Generate response
-        return response.text.strip() if response.text else "No response generated."
-    except Exception as e:
-        return f"Error: {e}"
-
-# Initialize session state for chat history and current query index
-if "history" not in st.session_state:
-    st.session_state["history"] = [{
-        "role": "assistant",
-        "content": "Hello! I'm your AI-powered knowledge assistant, capable of solving mathematical challenges, clarifying complex ideas, and conducting in-depth research. What would you like to learn or solve?"
-    }]
-
+MODEL_NAME = "gemini-2.0-flash"  # Use a valid model name
+
+# One model client for the whole process, shared by every browser session
+@st.cache_resource
+def get_model(model_name=MODEL_NAME):
+    return genai.GenerativeModel(model_name)
+
+# Local SymPy solver shared by every session; its worker process starts (and imports SymPy) right away
+@st.cache_resource
+def get_solver():
+    solver = LocalSolver()
+    solver.warm_up()
+    return solver
+
+# Answers shared across sessions; identical requests in flight are sent upstream once
+@st.cache_resource
+def get_cache():
+    return ResponseCache()
+
+# Chat history lives in SQLite, shared by every session and kept across restarts
+@st.cache_resource
+def get_store():
+    return HistoryStore()
+
+GREETING = "Hello! I'm your AI-powered knowledge assistant, capable of solving mathematical challenges, clarifying complex ideas, and conducting in-depth research. What would you like to learn or solve?"
+RESET_GREETING = "Hello! I'm here to help solve math problems and perform research. How can I help you today?"
+PAGE_SIZE = 50  # messages shown at once; older ones are loaded on demand
+
+store = get_store()
+
+# The conversation id is kept in the URL (?c=...), so reloading the page resumes the conversation
+if "conversation_id" not in st.session_state:
+    conversation_id = st.query_params.get("c")
+    if not conversation_id or not store.exists(conversation_id):
+        conversation_id = store.new_conversation(GREETING)
+        st.query_params["c"] = conversation_id
+    st.session_state["conversation_id"] = conversation_id
+    st.session_state["history_limit"] = PAGE_SIZE
+conversation_id = st.session_state["conversation_id"]
+
+# Each browser session keeps one chat, so follow-up questions see the earlier turns
+if "chat" not in st.session_state:
+    st.session_state["chat"] = StreamingChat(get_model(), cache=get_cache())
+    st.session_state["chat"].resume(store.recent_turns(conversation_id))
+
+# How questions were answered in this session: by the local solver, by Gemini grounded on it, or by Gemini alone
+if "answer_stats" not in st.session_state:
+    st.session_state["answer_stats"] = {"local": 0, "grounded": 0, "model": 0, "local_ms": []}
+
+# Initialize session state for the current query
 if "current_query" not in st.session_state:
     st.session_state["current_query"] = "A car travels 150 km in 3 hours. It then increases its speed and covers another 200 km in 2 hours. What was the average speed of the car for the entire journey?"  # Default question for first query
 
 # Sidebar for reset chat, download chat history, and voice input instructions
 
-# Chat history download section
+# Chat history download section; the file is only built when asked for, streamed out of SQLite
 st.sidebar.write("*Chat history can be downloaded as a text file for future reference.*")
-chat_text = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in st.session_state["history"]])
-st.sidebar.download_button("Download Chat History", chat_text, file_name="chat_history.txt", key="download_chat_btn")
+if st.sidebar.button("Prepare Chat History", key="prepare_chat_btn"):
+    st.session_state["export"] = store.export_file(conversation_id)
+if "export" in st.session_state:
+    st.sidebar.download_button("Download Chat History", st.session_state.pop("export"), file_name="chat_history.txt", key="download_chat_btn")
 
 # Voice input instructions and button section
 st.sidebar.write("🎤 **Voice Input Instructions:** Speak your question clearly and concisely for best results.")
 
-if st.sidebar.button("Use Voice Input", key="voice_input_btn_sidebar"):
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        st.sidebar.write("Listening... Speak your question.")
+# Voice input runs in the background: utterances are recognized while the user keeps talking,
+# and their text is added to the question box as it arrives
+capture = st.session_state.get("voice")
+if capture is None:
+    if st.sidebar.button("Use Voice Input", key="voice_input_btn_sidebar"):
         try:
-            audio = recognizer.listen(source, timeout=5)  # Adjust timeout as needed
-            spoken_input = recognizer.recognize_google(audio)  # Convert speech to text using Google Speech Recognition API
-            st.sidebar.success(f"You said: {spoken_input}")
-            st.session_state["current_query"] = spoken_input.strip()  # Update current query with voice input
-            st.rerun()  # Refresh to process voice input immediately
-        except sr.UnknownValueError:
-            st.sidebar.error("Sorry, I couldn't understand what you said. Please try again.")
-        except sr.RequestError as e:
-            st.sidebar.error(f"Could not request results; {e}")
+            st.session_state["voice"] = VoiceCapture().start()
+            st.session_state["current_query"] = ""
+            st.rerun()
+        except Exception as e:
+            st.sidebar.error(f"Voice input is not available: {e}")
+elif capture.running and st.sidebar.button("Stop Voice Input", key="voice_stop_btn_sidebar"):
+    capture.stop()
+
+@st.fragment(run_every=1.0)
+def voice_status():
+    capture = st.session_state.get("voice")
+    if capture is None:
+        return
+    texts = capture.poll()
+    if texts:
+        st.session_state["current_query"] = " ".join(filter(None, [st.session_state["current_query"], *texts]))
+        st.rerun(scope="app")  # show the new text in the question box
+    if capture.error:
+        st.error(capture.error)
+    if capture.running:
+        st.write("Listening... Speak your question.")
+    elif capture.finished:
+        del st.session_state["voice"]
+        st.rerun(scope="app")
+
+with st.sidebar:
+    voice_status()
 
 # Reset Chat button in sidebar (optional)
 if st.sidebar.button("Reset Chat", key="reset_chat_btn"):
-    st.session_state["history"] = [{
-        "role": "assistant",
-        "content": "Hello! I'm here to help solve math problems and perform research. How can I help you today?"
-    }]
+    if "voice" in st.session_state:
+        st.session_state.pop("voice").stop()
+    # Start a new conversation; the old one stays in the store
+    st.session_state["conversation_id"] = store.new_conversation(RESET_GREETING)
+    st.query_params["c"] = st.session_state["conversation_id"]
+    st.session_state["history_limit"] = PAGE_SIZE
     st.session_state["current_query"] = "A car travels 150 km in 3 hours. It then increases its speed and covers another 200 km in 2 hours. What was the average speed of the car for the entire journey?"  # Reset to default question
+    st.session_state["chat"] = StreamingChat(get_model(), cache=get_cache())
     st.rerun() 
 
-# Display chat history dynamically in main content area
-for message in st.session_state["history"]:
+# Latency of the latest answer
+if st.session_state["chat"].last_ttft_ms is not None:
+    st.sidebar.metric("Time to first token", f"{st.session_state['chat'].last_ttft_ms:.0f} ms")
+
+stats = st.session_state["answer_stats"]
+answered = stats["local"] + stats["grounded"] + stats["model"]
+if answered:
+    local_ms = sorted(stats["local_ms"])
+    median = f", median {local_ms[len(local_ms) // 2]:.0f} ms" if local_ms else ""
+    st.sidebar.caption(
+        f"Solved locally: {stats['local']} of {answered} questions ({stats['local'] / answered:.0%}{median}); "
+        f"{stats['grounded']} more answered by Gemini with a local result as grounding."
+    )
+
+cache_stats = get_cache().stats()
+if cache_stats["requests"]:
+    st.sidebar.caption(
+        f"Response cache: {cache_stats['hits']} hits, {cache_stats['coalesced']} joined in flight, "
+        f"{cache_stats['upstream_calls']} Gemini calls ({cache_stats['hit_rate']:.0%} hit rate); "
+        f"saved {cache_stats['saved_ms'] / 1000:.1f} s of model time."
+    )
+
+# Conversation summaries run in the background; show one that failed since the last question
+summary_error = st.session_state["chat"].take_error()
+if summary_error:
+    st.sidebar.error(summary_error)
+
+# Display the latest page of the chat history in the main content area
+total_messages = store.count(conversation_id)
+if total_messages > st.session_state["history_limit"]:
+    if st.button(f"Show earlier messages ({total_messages - st.session_state['history_limit']} more)", key="earlier_btn"):
+        st.session_state["history_limit"] += PAGE_SIZE
+        st.rerun()
+for message in store.latest(conversation_id, st.session_state["history_limit"]):
     role = message["role"]
     content = message["content"]
     if role == "assistant":
         st.chat_message(role).write(f"<span style='font-size: 18px;'>{content}</span>", unsafe_allow_html=True)
+        if message.get("solved_locally"):
+            st.caption(f"Solved locally with SymPy in {message['total_ms']:.0f} ms")
+        elif message.get("source") in ("cache", "coalesced"):
+            st.caption(f"Served from the response cache in {message['total_ms']:.0f} ms")
+        elif message.get("ttft_ms") is not None:
+            st.caption(f"First token after {message['ttft_ms']:.0f} ms · full answer in {message['total_ms']:.0f} ms")
     else:
         st.chat_message(role).write(f"<span style='font-size: 18px;'>{content}</span>", unsafe_allow_html=True)
 
@@ -94,16 +195,42 @@ if st.button("Submit Query"):
     user_input = user_input.strip()
     
     if user_input:
-        # Add user input to chat history
-        st.session_state["history"].append({"role": "user", "content": user_input})
+        # Add user input to chat history, once: a double-clicked Submit reruns with the same unanswered question
+        last = store.latest(conversation_id, 1)
+        if not (last and last[0]["role"] == "user" and last[0]["content"] == user_input):
+            store.append(conversation_id, "user", user_input)
         st.chat_message("user").write(f"<span style='font-size: 18px;'>{user_input}</span>", unsafe_allow_html=True)
 
-        with st.spinner("Processing your request..."):
-            response = generate_response(user_input)
-
-        # Add assistant's response to chat history
-        st.session_state["history"].append({"role": "assistant", "content": response})
-        st.chat_message("assistant").write(f"<span style='font-size: 18px;'>{response}</span>", unsafe_allow_html=True)
+        # Arithmetic, equations and simple word problems are solved locally; Gemini only sees the rest
+        chat = st.session_state["chat"]
+        local = get_solver().solve(user_input)
+        if local and local.complete:
+            response = local.answer
+            chat.add_turn(user_input, response)
+            stats["local"] += 1
+            stats["local_ms"].append(local.elapsed_ms)
+            store.append(conversation_id, "assistant", response, solved_locally=True, total_ms=local.elapsed_ms)
+        else:
+            # Stream the answer into the chat as it is generated
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
+                placeholder.write("<span style='font-size: 18px;'>...</span>", unsafe_allow_html=True)
+                response = ""
+                try:
+                    for text in chat.stream(user_input, grounding=grounding_note(local) if local else ""):
+                        response += text
+                        placeholder.write(f"<span style='font-size: 18px;'>{response}▌</span>", unsafe_allow_html=True)
+                    response = response.strip() or "No response generated."
+                except Exception as e:
+                    response = f"Error: {e}"
+                placeholder.write(f"<span style='font-size: 18px;'>{response}</span>", unsafe_allow_html=True)
+            stats["grounded" if local else "model"] += 1
+
+            # Add assistant's response to chat history
+            store.append(
+                conversation_id, "assistant", response,
+                ttft_ms=chat.last_ttft_ms, total_ms=chat.last_total_ms, source=chat.last_source,
+            )
 
         # Clear current query after processing and refresh UI for next question (ensure empty box appears)
         st.session_state["current_query"] = ""  # Reset current query to empty string explicitly after submission
@@ -0,0 +1,164 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from response_cache import cache_key
+
+# Multi-turn chat on top of Gemini's ChatSession. Recent turns are sent
+# verbatim; once the history outgrows HISTORY_TOKEN_BUDGET the oldest turns are
+# folded into a short running summary, so follow-up questions keep their
+# context without every prompt growing with the whole conversation. The summary
+# call runs in the background; until it lands the folded turns are sent verbatim.
+
+HISTORY_TOKEN_BUDGET = 2000   # approximate tokens of history sent with each question
+MIN_RECENT_TURNS = 2          # latest turns that are never summarized
+SUMMARY_WORDS = 120
+
+SUMMARY_PROMPT = """Summarize this conversation between a user and an AI math and knowledge assistant in at most {words} words.
+Keep the facts, numbers, formulas and results that later questions may refer to. Write plain prose.
+
+Summary so far:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
+
+# Summary calls for all sessions; each session has at most one in flight
+_summarizer = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chat-summary")
+
+
+def estimate_tokens(text):
+    # About 4 characters per token for English text; close enough for a budget
+    return len(text) // 4 + 1
+
+
+class StreamingChat:
+    """
+    One conversation, kept for the whole Streamlit session. stream() yields the
+    answer as it arrives and records time-to-first-token (last_ttft_ms), total
+    time (last_total_ms) and where the answer came from (last_source: "model",
+    "cache" or "coalesced") of the latest answer. With a ResponseCache, answers
+    are shared with other sessions in the same conversation state. A failed
+    background summary is kept for take_error().
+    """
+
+    def __init__(self, model, token_budget=HISTORY_TOKEN_BUDGET, cache=None, generation_config=None):
+        self.model = model
+        self.token_budget = token_budget
+        self.cache = cache
+        self.generation_config = generation_config
+        self.summary = ""
+        self.turns = []  # [(user text, model text)], oldest first, not yet summarized
+        self.chat = model.start_chat(history=[])
+        self.last_ttft_ms = None
+        self.last_total_ms = None
+        self.last_source = None
+        self._folding = None  # (future of the new summary, turns being folded)
+        self._error = None
+
+    def history_tokens(self):
+        return estimate_tokens(self.summary) + sum(estimate_tokens(q) + estimate_tokens(a) for q, a in self.turns)
+
+    def _contents(self):
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [f"Summary of our conversation so far: {self.summary}"]})
+            contents.append({"role": "model", "parts": ["Understood, I'll keep that in mind."]})
+        folding = self._folding[1] if self._folding else []
+        for question, answer in folding + self.turns:
+            contents.append({"role": "user", "parts": [question]})
+            contents.append({"role": "model", "parts": [answer]})
+        return contents
+
+    def resume(self, turns):
+        """Continue an earlier conversation from its latest (question, answer) turns that fit the budget."""
+        kept, used = [], 0
+        for question, answer in reversed(turns):
+            used += estimate_tokens(question) + estimate_tokens(answer)
+            if used > self.token_budget and kept:
+                break
+            kept.insert(0, (question, answer))
+        self.turns = kept
+        self.chat.history = self._contents()
+
+    def add_turn(self, question, answer):
+        """Record a turn answered without the model (e.g. by the local math solver)."""
+        self.turns.append((question, answer))
+        self._collect_summary()
+        self._compact()
+        self.chat.history = self._contents()
+
+    def take_error(self):
+        """The latest background summary failure, once, or None."""
+        error, self._error = self._error, None
+        return error
+
+    def _generate(self, chat, message):
+        for chunk in chat.send_message(message, stream=True, generation_config=self.generation_config):
+            try:
+                text = chunk.text
+            except ValueError:  # a chunk without text parts, e.g. only safety ratings
+                continue
+            if text:
+                yield text
+
+    def stream(self, prompt, grounding=""):
+        """`grounding` is appended to the message sent, but only `prompt` is kept in the history."""
+        start = time.perf_counter()
+        self.last_ttft_ms = None
+        self.last_total_ms = None
+        # A summary folded since the last question replaces the turns it covers
+        if self._collect_summary():
+            self.chat.history = self._contents()
+        message = prompt + grounding
+        # The call may outlive this script run on the cache's thread, so it gets its own copy of the chat
+        chat = copy.copy(self.chat)
+        if self.cache is None:
+            chunks, self.last_source = self._generate(chat, message), "model"
+        else:
+            key = cache_key(self.model.model_name, message, self.generation_config, self._contents())
+            chunks, self.last_source = self.cache.get_or_start(key, lambda: self._generate(chat, message))
+        answer = ""
+        try:
+            for text in chunks:
+                if self.last_ttft_ms is None:
+                    self.last_ttft_ms = (time.perf_counter() - start) * 1000
+                answer += text
+                yield text
+        finally:
+            self.last_total_ms = (time.perf_counter() - start) * 1000
+        # Only complete answers join the history; an interrupted or failed stream leaves it as it was
+        if answer.strip():
+            self.add_turn(prompt, answer.strip())
+
+    def _compact(self):
+        if self._folding or self.history_tokens() <= self.token_budget or len(self.turns) <= MIN_RECENT_TURNS:
+            return
+        # Fold the older half of the turns at once, so summaries aren't rewritten every question
+        keep = max(MIN_RECENT_TURNS, len(self.turns) // 2)
+        old, self.turns = self.turns[:-keep], self.turns[-keep:]
+        self._folding = (_summarizer.submit(self._summarize, self.summary, old), old)
+
+    def _summarize(self, summary, turns):
+        messages = "\n".join(f"User: {q}\nAssistant: {a}" for q, a in turns)
+        response = self.model.generate_content(
+            SUMMARY_PROMPT.format(words=SUMMARY_WORDS, summary=summary or "(none)", messages=messages)
+        )
+        return response.text.strip()
+
+    def _collect_summary(self):
+        """Apply a finished background summary without waiting for a running one. True if applied."""
+        if self._folding is None or not self._folding[0].done():
+            return False
+        future, _ = self._folding
+        self._folding = None
+        try:
+            self.summary = future.result()
+        except Exception as e:
+            # Dropping the folded turns still keeps the next prompt within budget
+            self._error = f"Conversation summary failed: {e}"
+        self._compact()
+        return True
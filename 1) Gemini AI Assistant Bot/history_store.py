@@ -0,0 +1,153 @@
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+# Conversations kept in a local SQLite file instead of st.session_state, so they
+# survive restarts and a rerun only reads the page of messages on screen.
+# Messages are only ever appended; each conversation keeps a running message
+# count so paging never has to count rows.
+#
+# Export a conversation from the command line (streamed, constant memory):
+#   python history_store.py export <conversation_id> > chat_history.txt
+#   python history_store.py list
+
+HISTORY_DB_PATH = os.getenv(
+    "HISTORY_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_history.sqlite")
+)
+EXPORT_BATCH = 500  # messages read per query while exporting
+
+_SCHEMA = """
+create table if not exists conversations (
+    id text primary key,
+    created_at real not null,
+    message_count integer not null default 0
+);
+create table if not exists messages (
+    id integer primary key autoincrement,
+    conversation_id text not null references conversations (id),
+    role text not null,
+    content text not null,
+    meta text,
+    created_at real not null
+);
+create index if not exists messages_conversation_idx on messages (conversation_id, id);
+"""
+
+
+class HistoryStore:
+    """SQLite-backed chat history shared by every session of the app."""
+
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def new_conversation(self, greeting=None):
+        conversation_id = uuid.uuid4().hex[:12]
+        with self._lock, self._conn:
+            self._conn.execute("insert into conversations (id, created_at) values (?, ?)", (conversation_id, time.time()))
+        if greeting:
+            self.append(conversation_id, "assistant", greeting)
+        return conversation_id
+
+    def exists(self, conversation_id):
+        with self._lock:
+            row = self._conn.execute("select 1 from conversations where id = ?", (conversation_id,)).fetchone()
+        return row is not None
+
+    def append(self, conversation_id, role, content, **meta):
+        """Add one message; `meta` holds display details such as latencies. Returns the message id."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "insert into messages (conversation_id, role, content, meta, created_at) values (?, ?, ?, ?, ?)",
+                (conversation_id, role, content, json.dumps(meta) if meta else None, time.time()),
+            )
+            self._conn.execute(
+                "update conversations set message_count = message_count + 1 where id = ?", (conversation_id,)
+            )
+            return cursor.lastrowid
+
+    def count(self, conversation_id):
+        with self._lock:
+            row = self._conn.execute(
+                "select message_count from conversations where id = ?", (conversation_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def latest(self, conversation_id, limit):
+        """The last `limit` messages, oldest first, as dicts with role, content and any meta keys."""
+        with self._lock:
+            rows = self._conn.execute(
+                "select role, content, meta from messages where conversation_id = ? order by id desc limit ?",
+                (conversation_id, limit),
+            ).fetchall()
+        return [_message(row) for row in reversed(rows)]
+
+    def recent_turns(self, conversation_id, limit=20):
+        """Up to `limit` latest (question, answer) pairs, for resuming a chat session."""
+        turns, question = [], None
+        for message in self.latest(conversation_id, limit * 2 + 1):
+            if message["role"] == "user":
+                question = message["content"]
+            elif question is not None:
+                turns.append((question, message["content"]))
+                question = None
+        return turns[-limit:]
+
+    def iter_export(self, conversation_id, batch=EXPORT_BATCH):
+        """Yield "Role: content" lines, oldest first, reading `batch` messages at a time."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "select id, role, content from messages where conversation_id = ? and id > ? order by id limit ?",
+                    (conversation_id, last_id, batch),
+                ).fetchall()
+            for row in rows:
+                yield f"{row['role'].capitalize()}: {row['content']}\n"
+            if len(rows) < batch:
+                return
+            last_id = rows[-1]["id"]
+
+    def export_file(self, conversation_id):
+        """The whole export as a file object for st.download_button, built only when asked for."""
+        buffer = io.BytesIO()
+        for line in self.iter_export(conversation_id):
+            buffer.write(line.encode("utf-8"))
+        buffer.seek(0)
+        return buffer
+
+    def conversations(self):
+        with self._lock:
+            return self._conn.execute(
+                "select id, created_at, message_count from conversations order by created_at desc"
+            ).fetchall()
+
+
+def _message(row):
+    message = {"role": row["role"], "content": row["content"]}
+    if row["meta"]:
+        message.update(json.loads(row["meta"]))
+    return message
+
+
+if __name__ == "__main__":
+    store = HistoryStore()
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "export" and len(sys.argv) > 2:
+        for line in store.iter_export(sys.argv[2]):
+            sys.stdout.write(line)
+    elif command == "list":
+        for row in store.conversations():
+            print(f"{row['id']}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(row['created_at']))}  "
+                  f"{row['message_count']} messages")
+    else:
+        print("Usage: python history_store.py [list | export <conversation_id>]")
@@ -0,0 +1,256 @@
+import re
+import time
+import threading
+import multiprocessing
+from collections import namedtuple
+
+# Local SymPy solver in front of Gemini. Arithmetic, equations, derivatives,
+# integrals and simple average-speed problems are solved here in milliseconds;
+# the chat model is only asked when nothing parses, or when the math sits inside
+# a longer question, in which case the local result is passed along as grounding.
+#
+# parse_expr evaluates its input, so only strings made of whitelisted math tokens
+# ever reach it, and solving runs in a worker process that is killed at the time limit.
+
+TIME_LIMIT = 2.0  # seconds per question before falling back to the model
+
+LocalResult = namedtuple("LocalResult", ["kind", "complete", "answer", "elapsed_ms"])
+
+_FUNCTIONS = "sqrt|sin|cos|tan|log|ln|exp|pi|abs"
+_TOKEN = rf"(?:\d+(?:\.\d+)?|{_FUNCTIONS}|(?<![a-z])[a-z](?![a-z])|[-+*/^()=!.])"
+_MATH_RE = re.compile(rf"^\s*{_TOKEN}(?:\s*{_TOKEN})*\s*$")
+_FRAGMENT_RE = re.compile(rf"{_TOKEN}(?:\s*{_TOKEN})+")
+_OPERATOR_RE = re.compile(r"[-+*/^=!]|\b(?:sqrt|sin|cos|tan|log|ln|exp)\b")
+
+_LEAD_IN_RE = re.compile(
+    r"^(?:please\s+)?(?:what(?:'s| is)|how much is|calculate|compute|evaluate|find|solve(?: for ([a-z]))?)"
+    r"\s*(?:the value of\s*)?[:,]?\s*",
+    re.I,
+)
+_COMMAND_RE = re.compile(
+    r"^(?:please\s+)?(?P<op>differentiate|derivative of|integrate|integral of|factor|factorise|factorize|expand|simplify)"
+    r"\s*[:,]?\s*(?P<expr>.+?)(?:\s+with respect to\s+(?P<var>[a-z]))?$",
+    re.I,
+)
+_WORDS = [
+    (r"(\d+(?:\.\d+)?)\s*%\s*of\s*", r"(\1/100)*"),
+    (r"\bsquare root of\s*", "sqrt "),
+    (r"\bplus\b", "+"), (r"\bminus\b", "-"),
+    (r"\b(?:times|multiplied by)\b", "*"), (r"\b(?:divided by|over)\b", "/"),
+    (r"\bsquared\b", "^2"), (r"\bcubed\b", "^3"),
+    ("×", "*"), ("÷", "/"), ("−", "-"),
+]
+
+# "150 km in 3 hours", "200 miles in 2.5 hrs", "600 m in 30 minutes"
+_LEG_RE = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(km|kilometers?|kilometres?|miles?|mi|meters?|metres?|m)\b[^.?]*?\bin\s+"
+    r"(\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?|seconds?|secs?|s)\b",
+    re.I,
+)
+
+
+def _normalize(text):
+    text = text.strip().rstrip("?.").strip()
+    for pattern, replacement in _WORDS:
+        text = re.sub(pattern, replacement, text, flags=re.I)
+    return text.lower()
+
+
+def _show(value):
+    # SymPy prints Euler's number and the imaginary unit as E and I
+    return re.sub(r"\b([EI])\b", lambda m: m.group(1).lower(), str(value).replace("**", "^"))
+
+
+def _parse(text):
+    from sympy.parsing.sympy_parser import (
+        parse_expr, standard_transformations, implicit_multiplication_application, convert_xor, factorial_notation,
+    )
+    if not _MATH_RE.match(text):
+        raise ValueError(f"not a math expression: {text!r}")
+    import sympy
+    transformations = standard_transformations + (implicit_multiplication_application, convert_xor, factorial_notation)
+    # Otherwise e and i parse as free symbols and e^(i*pi) "simplifies" to itself
+    constants = {"e": sympy.E, "i": sympy.I, "pi": sympy.pi}
+    return parse_expr(text.replace("ln", "log"), local_dict=constants, transformations=transformations, evaluate=True)
+
+
+def _decimal(value):
+    return f"{float(value):.8g}"
+
+
+def _number(value):
+    """Exact value, plus a decimal when the exact form isn't already one."""
+    import sympy
+    if value.has(sympy.zoo, sympy.nan, sympy.oo, -sympy.oo):
+        return "undefined"
+    value = sympy.nsimplify(value) if value.is_Float else value
+    if value.is_Integer:
+        return str(value)
+    if value.is_real and value.is_number:
+        return f"{_show(value)} ≈ {_decimal(value)}"
+    return _show(value)
+
+
+def _solve_math(text, variable=None):
+    """
+    Returns (kind, answer, complete). An answer still containing symbols the
+    question never gave values for ("x + 1", "x = 3 - y") is not complete.
+    """
+    import sympy
+    if "=" in text:
+        lhs, rhs = text.split("=", 1)
+        left, right = _parse(lhs), _parse(rhs)
+        symbols = sorted((left - right).free_symbols, key=str)
+        if not symbols:
+            return "equation", f"{_show(left)} = {_show(right)} is {sympy.simplify(left - right) == 0}", True
+        target = sympy.Symbol(variable) if variable else symbols[0]
+        solutions = sympy.solve(sympy.Eq(left, right), target)
+        if not solutions:
+            return "equation", f"No solution for {target}.", True
+        complete = not any(s.free_symbols for s in solutions)
+        return "equation", " or ".join(f"{target} = {_number(s)}" for s in solutions), complete
+
+    expr = sympy.simplify(_parse(text))
+    if expr.free_symbols:
+        return "expression", f"{_show(text)} = {_show(expr)}", False
+    return "expression", f"{_show(text)} = {_number(expr)}", True
+
+
+def _solve_command(op, text, variable=None):
+    import sympy
+    expr = _parse(_normalize(text))
+    var = sympy.Symbol(variable) if variable else (sorted(expr.free_symbols, key=str) or [sympy.Symbol("x")])[0]
+    op = op.lower()
+    if op.startswith(("differentiate", "derivative")):
+        return "calculus", f"d/d{var} ({_show(expr)}) = {_show(sympy.diff(expr, var))}"
+    if op.startswith(("integrate", "integral")):
+        return "calculus", f"∫ {_show(expr)} d{var} = {_show(sympy.integrate(expr, var))} + C"
+    if op.startswith("factor"):
+        return "algebra", f"{_show(expr)} = {_show(sympy.factor(expr))}"
+    if op == "expand":
+        return "algebra", f"{_show(expr)} = {_show(sympy.expand(expr))}"
+    return "algebra", f"{_show(expr)} = {_show(sympy.simplify(expr))}"
+
+
+def _to_hours(value, unit):
+    unit = unit.lower()
+    if unit.startswith("min"):
+        return value / 60
+    if unit.startswith("s"):
+        return value / 3600
+    return value
+
+
+def _to_km(value, unit):
+    unit = unit.lower()
+    if unit.startswith("mi"):
+        return value * 1.609344
+    if unit.startswith("m") and not unit.startswith("mi"):
+        return value / 1000
+    return value
+
+
+def _average_speed(question):
+    import sympy
+    legs = _LEG_RE.findall(question)
+    if not legs or "average speed" not in question.lower():
+        return None
+    units = {u.lower().rstrip("s") for _, u, _, _ in legs}
+    miles = all(u.startswith("mi") for u in units)
+    unit = "mph" if miles else "km/h"
+    distances = [sympy.nsimplify(d) if miles else sympy.nsimplify(_to_km(sympy.nsimplify(d), u)) for d, u, _, _ in legs]
+    hours = [sympy.nsimplify(_to_hours(sympy.nsimplify(t), u)) for _, _, t, u in legs]
+    distance, time_h = sum(distances), sum(hours)
+    length = "miles" if miles else "km"
+    lines = [
+        f"Total distance = {' + '.join(f'{_decimal(d)} {length}' for d in distances)} = {_decimal(distance)} {length}",
+        f"Total time = {' + '.join(f'{_decimal(h)} h' for h in hours)} = {_decimal(time_h)} h",
+        f"Average speed = total distance / total time = {_decimal(distance)} {length} / {_decimal(time_h)} h"
+        f" = {_decimal(distance / time_h)} {unit}",
+    ]
+    return "  \n".join(lines)
+
+
+def solve(question):
+    """Runs in the worker process. Returns (kind, complete, answer) or None."""
+    from sympy import SympifyError
+    question = question.strip()
+    try:
+        answer = _average_speed(question)
+        if answer:
+            return "word_problem", True, answer
+
+        command = _COMMAND_RE.match(question.rstrip("?."))
+        if command:
+            kind, answer = _solve_command(command["op"], command["expr"], command["var"])
+            return kind, True, answer
+
+        lead_in = _LEAD_IN_RE.match(question)
+        variable = lead_in.group(1) if lead_in else None
+        text = _normalize(question[lead_in.end():] if lead_in else question)
+        if _MATH_RE.match(text) and _OPERATOR_RE.search(text):
+            kind, answer, complete = _solve_math(text, variable)
+            return kind, complete, answer
+
+        # Math inside a longer question ("Solve x^2 - 4 = 0 and explain each step"); a
+        # lone dash or slash in prose ("2020-2021", "24/7") is not worth grounding on
+        for fragment in sorted(_FRAGMENT_RE.findall(_normalize(question)), key=len, reverse=True):
+            operators = _OPERATOR_RE.findall(fragment)
+            if re.search(r"\d", fragment) and ("=" in operators or len(operators) >= 2):
+                kind, answer, _ = _solve_math(fragment.strip(), variable)
+                return kind, False, answer
+    except (SympifyError, SyntaxError, TypeError, ValueError, NotImplementedError, ZeroDivisionError, AttributeError):
+        return None
+    return None
+
+
+class LocalSolver:
+    """Runs solve() in one warm worker process, killed and replaced when a question exceeds the time limit."""
+
+    def __init__(self, time_limit=TIME_LIMIT):
+        self.time_limit = time_limit
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(processes=1)
+            return self._pool
+
+    def _discard(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.terminate()
+
+    def warm_up(self):
+        # Imports SymPy in the worker ahead of the first question
+        self._get_pool().apply_async(solve, ("1+1",))
+
+    def solve(self, question):
+        start = time.perf_counter()
+        pool = self._get_pool()
+        try:
+            result = pool.apply_async(solve, (question,)).get(timeout=self.time_limit)
+        except multiprocessing.TimeoutError:
+            self._discard(pool)
+            return None
+        except Exception as e:
+            print(f"Local math solver failed: {e}")
+            return None
+        if result is None:
+            return None
+        kind, complete, answer = result
+        return LocalResult(kind, complete, answer, (time.perf_counter() - start) * 1000)
+
+    def close(self):
+        if self._pool is not None:
+            self._discard(self._pool)
+
+
+def grounding_note(result):
+    return (
+        f"\n\n(A symbolic math solver verified this part of the question: {result.answer}. "
+        "Use this result in your answer and explain the reasoning.)"
+    )
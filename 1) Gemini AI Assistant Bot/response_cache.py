@@ -0,0 +1,143 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Response cache shared by every session of the app (held in st.cache_resource).
+#
+# Answers are keyed on (model, normalized prompt, generation config, history
+# digest), so the same question asked in the same conversation state (the
+# pre-filled question in every new session, or a double-clicked Submit) is
+# answered from the cache. While an answer is still being generated, identical
+# requests join that call instead of starting their own: the upstream call runs
+# on a background thread, and every waiter replays its chunks as they arrive.
+
+RESPONSE_TTL = 3600       # seconds a cached answer stays valid
+MAX_ENTRIES = 256         # least recently used answers are evicted beyond this
+
+
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt).strip().casefold()
+
+
+def cache_key(model_name, prompt, generation_config=None, history=()):
+    """Digest of everything that determines the answer."""
+    payload = json.dumps(
+        [model_name, normalize_prompt(prompt), generation_config or {}, history],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Flight:
+    """One upstream call; any number of readers can iterate its chunks, from the start, while it runs."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.latency_ms = None
+        self.joiners = 0
+        self._cond = threading.Condition()
+
+    def _run(self, produce, on_finish):
+        start = time.perf_counter()
+        try:
+            for text in produce():
+                with self._cond:
+                    self.chunks.append(text)
+                    self._cond.notify_all()
+        except Exception as e:
+            self.error = e
+        self.latency_ms = (time.perf_counter() - start) * 1000
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+        on_finish(self)
+
+    def __iter__(self):
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                pending = self.chunks[i:]
+                done, error = self.done, self.error
+            yield from pending
+            i += len(pending)
+            if done and i >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+
+class ResponseCache:
+    """TTL + LRU cache of finished answers, plus the calls still in flight."""
+
+    def __init__(self, ttl=RESPONSE_TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (finished Flight, expires_at)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def get_or_start(self, key, produce):
+        """
+        Return (flight, source) where source is "cache", "coalesced" or "model".
+        `produce` is a generator function of text chunks, only called on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                flight, expires_at = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_ms += flight.latency_ms
+                    return flight, "cache"
+                del self._entries[key]
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                flight.joiners += 1
+                self.coalesced += 1
+                return flight, "coalesced"
+            flight = Flight()
+            self._in_flight[key] = flight
+            self.misses += 1
+        threading.Thread(
+            target=flight._run, args=(produce, lambda f: self._finish(key, f)), name="gemini-call", daemon=True
+        ).start()
+        return flight, "model"
+
+    def _finish(self, key, flight):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self.saved_ms += flight.latency_ms * flight.joiners
+            # Failed or empty answers are not worth repeating
+            if flight.error is None and flight.text.strip():
+                self._entries[key] = (flight, time.time() + self.ttl)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.coalesced + self.misses
+            return {
+                "requests": requests,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "upstream_calls": self.misses,
+                "hit_rate": (self.hits + self.coalesced) / requests if requests else 0.0,
+                "saved_ms": self.saved_ms,
+                "entries": len(self._entries),
+            }
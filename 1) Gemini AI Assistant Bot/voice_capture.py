@@ -0,0 +1,144 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+# Voice input that never blocks the Streamlit script. A capture thread listens
+# continuously and cuts the audio into utterances with speech_recognition's
+# energy-based voice-activity detection (speech starts above the calibrated
+# energy threshold, ends after PAUSE_THRESHOLD seconds of silence). Each
+# utterance is recognized on a worker pool while the user keeps talking, and
+# transcripts come back through a queue, in the order they were spoken.
+#
+# Backends (VOICE_RECOGNIZER):
+#   google            Google Web Speech API (online, the original behaviour)
+#   sphinx            CMU PocketSphinx, offline (pip install pocketsphinx)
+#   whisper           OpenAI Whisper run locally (pip install openai-whisper)
+#   transcript:<path> returns the lines of a text file in order, a stand-in for tests
+# Audio source (VOICE_SOURCE): "microphone", or the path of a WAV/AIFF/FLAC file to replay.
+
+PAUSE_THRESHOLD = 0.6       # seconds of silence that end an utterance
+PHRASE_TIME_LIMIT = 10      # longest utterance, in seconds, before it is cut anyway
+CALIBRATION_SECONDS = 0.5   # ambient noise sampled to set the energy threshold
+RECOGNITION_WORKERS = 2
+
+
+class TranscriptRecognizer:
+    """Test stand-in: each utterance is "recognized" as the next line of a text file."""
+
+    def __init__(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            self._lines = [line.strip() for line in f if line.strip()]
+        self._lock = threading.Lock()
+
+    def __call__(self, recognizer, audio):
+        with self._lock:
+            if not self._lines:
+                raise sr.UnknownValueError()
+            return self._lines.pop(0)
+
+
+def get_recognizer(name):
+    """Return a function (recognizer, audio) -> text for a VOICE_RECOGNIZER value."""
+    if name.startswith("transcript:"):
+        return TranscriptRecognizer(name.split(":", 1)[1])
+    if name == "sphinx":
+        return lambda recognizer, audio: recognizer.recognize_sphinx(audio)
+    if name == "whisper":
+        return lambda recognizer, audio: recognizer.recognize_whisper(audio, model="base.en")
+    if name == "google":
+        return lambda recognizer, audio: recognizer.recognize_google(audio)
+    raise ValueError(f"Unknown voice recognizer: {name}")
+
+
+def get_source(name):
+    return sr.Microphone() if name == "microphone" else sr.AudioFile(name)
+
+
+class VoiceCapture:
+    """
+    One listening session. start() returns immediately; poll() returns the
+    transcripts recognized since the last call. `error` holds the reason the
+    capture stopped early (no microphone, recognizer service down, ...).
+    """
+
+    def __init__(self, recognize=None, source=None, workers=RECOGNITION_WORKERS):
+        self.recognize = recognize or get_recognizer(os.getenv("VOICE_RECOGNIZER", "google"))
+        self.source = source or get_source(os.getenv("VOICE_SOURCE", "microphone"))
+        self.recognizer = sr.Recognizer()
+        self.recognizer.pause_threshold = PAUSE_THRESHOLD
+        self.error = None
+        self._results = queue.Queue()
+        self._pending = {}      # out-of-order results, by utterance number
+        self._next = 0
+        self._utterances = 0
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="voice-recognize")
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._listen, name="voice-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _listen(self):
+        try:
+            with self.source as source:
+                if isinstance(source, sr.Microphone):
+                    self.recognizer.adjust_for_ambient_noise(source, duration=CALIBRATION_SECONDS)
+                while not self._stop.is_set():
+                    try:
+                        audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=PHRASE_TIME_LIMIT)
+                    except sr.WaitTimeoutError:
+                        continue  # silence; check for stop and keep listening
+                    if not audio.frame_data:
+                        break  # end of an audio file
+                    number = self._utterances
+                    self._utterances += 1
+                    self._pool.submit(self._recognize, number, audio)
+        except Exception as e:
+            self.error = f"Voice capture stopped: {e}"
+        finally:
+            self._pool.shutdown(wait=False)
+
+    def _recognize(self, number, audio):
+        try:
+            self._results.put((number, self.recognize(self.recognizer, audio).strip()))
+        except sr.UnknownValueError:
+            self._results.put((number, ""))  # noise or mumbling; nothing to add
+        except sr.RequestError as e:
+            self.error = f"Could not request results; {e}"
+            self._results.put((number, ""))
+        except Exception as e:
+            self.error = f"Speech recognition failed: {e}"
+            self._results.put((number, ""))
+
+    def poll(self):
+        """Transcripts recognized since the last call, in speaking order."""
+        while True:
+            try:
+                number, text = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending[number] = text
+        texts = []
+        while self._next in self._pending:
+            text = self._pending.pop(self._next)
+            self._next += 1
+            if text:
+                texts.append(text)
+        return texts
+
+    @property
+    def finished(self):
+        """Capture has stopped and every utterance has been handed out by poll()."""
+        return not self.running and self._next >= self._utterances and self._thread is not None
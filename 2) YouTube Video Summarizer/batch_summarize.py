@@ -0,0 +1,209 @@
+import os
+os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from extractive import TARGET_TOKENS as COMPRESS_TARGET_TOKENS, compress_transcript
+from map_reduce import estimate_tokens
+from new import (MODEL_NAME, OUTPUT_TYPES, TRANSCRIPT_LANGUAGES, clean_transcript, get_transcript_entries,
+                 get_video_id, summarize_with_gemini)
+from video_cache import VideoCache, transcript_hash
+
+# Summarize a whole list of videos (a course playlist, a channel's uploads)
+# without the UI. Transcripts are fetched a few at a time and no faster than
+# --fetch-rate per second, so YouTube does not start refusing requests; videos
+# are summarized on a separate worker pool as their transcripts arrive. One JSON
+# line is written per video as it finishes, and --resume skips the videos
+# already summarized in --out, so an interrupted run picks up where it stopped.
+# Transcripts and outputs go through the same local cache as the app.
+# Usage:
+#   python batch_summarize.py urls.txt --out summaries.jsonl [--prompt-type default] [--resume]
+#   python batch_summarize.py https://youtu.be/<id> <id> ...
+# Inputs are URLs or video IDs, given directly or one per line in a file ("-" reads stdin).
+# To expand a playlist: yt-dlp --flat-playlist --print url <playlist url> > urls.txt
+
+FETCH_WORKERS = 4
+FETCH_RATE = 2.0        # transcript requests per second, across all fetch workers
+SUMMARIZE_WORKERS = 4
+ATTEMPTS = 3
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, whichever thread makes them."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def to_video_id(item):
+    item = item.strip()
+    if re.fullmatch(r"[\w-]{11}", item):
+        return item
+    return get_video_id(item)
+
+
+def read_inputs(items):
+    """Video IDs from URLs, IDs or files of them, in order and without repeats."""
+    lines = []
+    for item in items:
+        if item == "-":
+            lines.extend(sys.stdin)
+        elif os.path.isfile(item):
+            with open(item, "r", encoding="utf-8") as f:
+                lines.extend(f)
+        else:
+            lines.append(item)
+    video_ids, invalid = [], []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        video_id = to_video_id(line)
+        if video_id is None:
+            invalid.append(line)
+        elif video_id not in video_ids:
+            video_ids.append(video_id)
+    return video_ids, invalid
+
+
+def finished_ids(path):
+    """Videos with a result in an earlier run's output; failed ones are retried."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short when the last run was killed
+            if "error" not in record:
+                done.add(record["video_id"])
+    return done
+
+
+def _retry(call):
+    for attempt in range(ATTEMPTS):
+        try:
+            return call()
+        except Exception:
+            if attempt == ATTEMPTS - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def fetch_one(cache, limiter, video_id):
+    def fetch():
+        limiter.wait()
+        return get_transcript_entries(video_id)
+    entries, cached = cache.transcript(video_id, TRANSCRIPT_LANGUAGES, lambda: _retry(fetch))
+    return entries, cached
+
+
+def summarize_one(cache, video_id, entries, prompt_type, compress=False):
+    cleaned = clean_transcript(" ".join(entry["text"] for entry in entries))
+    if compress and estimate_tokens(cleaned) > COMPRESS_TARGET_TOKENS:
+        cleaned = compress_transcript(entries, target_tokens=COMPRESS_TARGET_TOKENS, clean=clean_transcript).text
+        entries = None
+    return cache.output(
+        video_id, prompt_type, MODEL_NAME, transcript_hash(cleaned),
+        lambda: _retry(lambda: summarize_with_gemini(cleaned, prompt_type=prompt_type, entries=entries)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch YouTube summarization")
+    parser.add_argument("inputs", nargs="+", help="video URLs or IDs, or files with one per line ('-' for stdin)")
+    parser.add_argument("--out", default="summaries.jsonl")
+    parser.add_argument("--prompt-type", default="default", choices=OUTPUT_TYPES)
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    parser.add_argument("--fetch-rate", type=float, default=FETCH_RATE, help="transcript requests per second")
+    parser.add_argument("--summarize-workers", type=int, default=SUMMARIZE_WORKERS)
+    parser.add_argument("--compress", action="store_true", help="compress long transcripts locally before summarizing")
+    parser.add_argument("--resume", action="store_true", help="skip videos already summarized in --out")
+    args = parser.parse_args()
+
+    video_ids, invalid = read_inputs(args.inputs)
+    for item in invalid:
+        print(f"Skipping invalid YouTube URL: {item}")
+    done = finished_ids(args.out) if args.resume else set()
+    todo = [video_id for video_id in video_ids if video_id not in done]
+    print(f"{len(video_ids)} videos, {len(todo)} to summarize, "
+          f"{args.fetch_workers} fetching at {args.fetch_rate}/s, {args.summarize_workers} summarizing")
+
+    cache = VideoCache()
+    limiter = RateLimiter(args.fetch_rate)
+    counts = {"ok": 0, "no_transcript": 0, "error": 0}
+    write_lock = threading.Lock()
+
+    wall_start = time.perf_counter()
+    with open(args.out, "a" if args.resume else "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=args.fetch_workers, thread_name_prefix="fetch") as fetchers, \
+            ThreadPoolExecutor(max_workers=args.summarize_workers, thread_name_prefix="summarize") as summarizers:
+
+        def write(record):
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                counts["error" if "error" in record else record["status"]] += 1
+                n = sum(counts.values())
+                minutes = (time.perf_counter() - wall_start) / 60
+                print(f"[{n}/{len(todo)}] {record['video_id']} {record.get('error') or record['status']}  "
+                      f"({n / minutes:.1f} videos/min)")
+
+        def summarize(video_id, entries, started):
+            record = {"video_id": video_id, "prompt_type": args.prompt_type, "model": MODEL_NAME}
+            try:
+                output, cached = summarize_one(cache, video_id, entries, args.prompt_type, compress=args.compress)
+                record.update(status="ok", output=output, output_cached=cached)
+            except Exception as e:
+                record.update(status="error", error=f"{type(e).__name__}: {e}")
+            record["seconds"] = round(time.perf_counter() - started, 2)
+            write(record)
+
+        # Each fetch hands its video to the summarizer pool as soon as the transcript arrives
+        fetches = {fetchers.submit(fetch_one, cache, limiter, video_id): (video_id, time.perf_counter())
+                   for video_id in todo}
+        summaries = []
+        for future in as_completed(fetches):
+            video_id, started = fetches[future]
+            try:
+                entries, _ = future.result()
+            except Exception as e:
+                write({"video_id": video_id, "status": "error", "error": f"Error fetching transcript: {e}"})
+                continue
+            if not entries:
+                write({"video_id": video_id, "status": "no_transcript"})
+                continue
+            summaries.append(summarizers.submit(summarize, video_id, entries, started))
+        for future in summaries:
+            future.result()
+    wall_s = time.perf_counter() - wall_start
+
+    processed = sum(counts.values())
+    if processed:
+        summary = dict(counts, videos=processed, wall_s=round(wall_s, 1),
+                       videos_per_minute=round(processed / (wall_s / 60), 2))
+        print(json.dumps(summary, indent=2))
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
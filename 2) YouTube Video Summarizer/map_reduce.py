@@ -0,0 +1,134 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Map-reduce summarization for transcripts too long for one call. The
+# transcript is cut into token-bounded segments along caption boundaries (so
+# each segment has a start and end time), every segment is summarized into
+# timestamped notes concurrently, and one final call turns the notes into the
+# requested output. If the notes themselves are too long they are condensed
+# again in groups first, so no single call exceeds its input budget.
+
+SINGLE_CALL_TOKENS = 12000   # transcripts up to this size still go out in one call
+SEGMENT_TOKENS = 4000        # input size of each map call (~15 minutes of speech)
+REDUCE_INPUT_TOKENS = 12000  # most notes a reduce call reads at once
+MAX_PARALLEL = 6             # map calls in flight at a time
+ATTEMPTS = 3
+
+Segment = namedtuple("Segment", ["start", "end", "text"])
+
+MAP_PROMPT = (
+    "Below is part {index} of {total} of a YouTube video transcript, covering {start} to {end}. "
+    "Write concise notes on it in at most {words} words: the main points, facts, names, numbers, steps and tips, "
+    "in the order they come up. Start each note with the approximate timestamp in [m:ss] or [h:mm:ss] form.\n\n"
+    "Transcript part: \n"
+)
+COLLAPSE_PROMPT = (
+    "Below are notes on consecutive parts of a YouTube video. Merge them into one set of concise notes "
+    "of at most {words} words, keeping the timestamps, the order and every key point.\n\nNotes: \n"
+)
+REDUCE_NOTE = (
+    "(The video is long, so its transcript has been condensed into timestamped notes on its consecutive parts. "
+    "Treat these notes as the transcript.)\n\n"
+)
+
+
+def estimate_tokens(text):
+    # About 4 characters per token for English text
+    return len(text) // 4 + 1
+
+
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def segment_transcript(entries, max_tokens=SEGMENT_TOKENS, clean=None):
+    """Group caption entries ({'text', 'start', 'duration'}) into Segments of at most `max_tokens`."""
+    segments, texts, used, start = [], [], 0, None
+    end = 0.0
+    for entry in entries:
+        text = clean(entry["text"]) if clean else entry["text"].strip()
+        if not text:
+            continue
+        tokens = estimate_tokens(text) + 1
+        if texts and used + tokens > max_tokens:
+            segments.append(Segment(start, end, " ".join(texts)))
+            texts, used, start = [], 0, None
+        if start is None:
+            start = entry["start"]
+        texts.append(text)
+        used += tokens
+        end = entry["start"] + entry.get("duration", 0.0)
+    if texts:
+        segments.append(Segment(start, end, " ".join(texts)))
+    return segments
+
+
+def _generate(model, prompt):
+    for attempt in range(ATTEMPTS):
+        try:
+            return model.generate_content(prompt).text.strip()
+        except Exception:
+            if attempt == ATTEMPTS - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def _group(notes, budget):
+    groups, current, used = [], [], 0
+    for note in notes:
+        tokens = estimate_tokens(note)
+        if current and used + tokens > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(note)
+        used += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def map_reduce_summarize(model, segments, prompt, on_progress=None, max_parallel=MAX_PARALLEL):
+    """
+    Summarize `segments` with `prompt` (an output instruction ending where the
+    transcript would go). on_progress(done, total) is called as map calls finish.
+    """
+    total = len(segments)
+    # Notes for all segments together must fit one reduce call
+    words = max(80, min(400, int(REDUCE_INPUT_TOKENS * 0.75 / max(total, 1) * 0.8)))
+    done = 0
+
+    def summarize_segment(item):
+        index, segment = item
+        header = f"[{format_timestamp(segment.start)} - {format_timestamp(segment.end)}]"
+        map_prompt = MAP_PROMPT.format(
+            index=index + 1, total=total, words=words,
+            start=format_timestamp(segment.start), end=format_timestamp(segment.end),
+        )
+        return f"{header}\n{_generate(model, map_prompt + segment.text)}"
+
+    notes = [None] * total
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        futures = {pool.submit(summarize_segment, item): item[0] for item in enumerate(segments)}
+        for future in as_completed(futures):
+            # Notes stay in video order whatever order the calls finish in
+            notes[futures[future]] = future.result()
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+        # Condense the notes in groups until they fit one reduce call
+        while estimate_tokens("\n\n".join(notes)) > REDUCE_INPUT_TOKENS and len(notes) > 1:
+            groups = _group(notes, REDUCE_INPUT_TOKENS)
+            if len(groups) == len(notes):
+                break  # no two notes fit together; the reduce input is cut to budget below
+            collapse_words = max(80, int(REDUCE_INPUT_TOKENS * 0.75 / len(groups) * 0.8))
+            notes = list(pool.map(
+                lambda group: _generate(model, COLLAPSE_PROMPT.format(words=collapse_words) + "\n\n".join(group)),
+                groups,
+            ))
+
+    return _generate(model, prompt + REDUCE_NOTE + "\n\n".join(notes)[:REDUCE_INPUT_TOKENS * 4])
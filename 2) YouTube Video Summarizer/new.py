@@ -7,6 +7,15 @@ from dotenv import load_dotenv
 import google.generativeai as genai
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
 import re
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from extractive import TARGET_TOKENS as COMPRESS_TARGET_TOKENS, compress_transcript
+from map_reduce import SINGLE_CALL_TOKENS, estimate_tokens, map_reduce_summarize, segment_transcript
+from transcript_index import TranscriptIndex, timestamp_url, window_label
+from video_cache import VideoCache, transcript_hash
 
 # Load environment variables
 load_dotenv()
@@ -15,16 +24,37 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("YOUR_YOUTUBE_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
+MODEL_NAME = "gemini-2.0-flash"
+TRANSCRIPT_LANGUAGES = ("en",)
+OUTPUT_TYPES = ("default", "prompt-1", "prompt-2", "flashcards", "quiz")
+# When several outputs are requested for a transcript longer than this, it is read
+# once into structured notes and every output is derived from the notes instead
+DERIVE_MIN_TOKENS = 3000
+
+# Transcripts and outputs cached on disk, shared by every session
+@st.cache_resource
+def get_cache():
+    return VideoCache()
+
+@st.cache_resource
+def get_index():
+    return TranscriptIndex()
+
 def get_video_id(url_link):
     match = re.search(r"(?:v=|youtu.be/)([\w-]+)", url_link)
     return match.group(1) if match else None
 
-def get_transcript(video_id):
+def get_transcript_entries(video_id, languages=TRANSCRIPT_LANGUAGES):
+    """Caption snippets as [{'text', 'start', 'duration'}], or None if the video has no transcript."""
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
-        return " ".join([entry['text'] for entry in transcript])
+        return YouTubeTranscriptApi.get_transcript(video_id, languages=languages)
     except (TranscriptsDisabled, NoTranscriptFound):
         return None
+
+def get_transcript(video_id):
+    try:
+        transcript = get_transcript_entries(video_id)
+        return " ".join([entry['text'] for entry in transcript]) if transcript else None
     except Exception as e:
         return f"Error fetching transcript: {str(e)}"
 
@@ -35,33 +65,169 @@ def clean_transcript(text):
     cleaned = re.sub(r'\s+', ' ', cleaned).strip()
     return cleaned
 
-def summarize_with_gemini(transcript_text, prompt_type="default"):
-    if prompt_type == "prompt-1":
-        prompt = ("You are a YouTube video summarizer. Generate a title based on the video's main topic or keywords. "
-                    "Then, generate subtitles or sections followed by a detailed summary in each section within 400 words.\n\nTranscript: \n")
-    elif prompt_type == "prompt-2":
-        prompt = ("Summarize the following YouTube transcript into 5-7 concise bullet points. Emphasize action steps, key insights, or tips shared. "
-                    "Avoid filler language and keep the output structured and informative.\n\nTranscript: \n")
-    elif prompt_type == "flashcards":
-        prompt = ("You are a flashcard generator. Read the following YouTube transcript and generate at least 5 flashcards in the format:\n\n"
-                    "Q: <Question based on key idea>\nA: <Short, correct answer>\n\nTranscript: \n")
-    elif prompt_type == "quiz":
-        prompt = ("You are a quiz generator. Read the following YouTube transcript and create a short quiz of 5 multiple-choice questions. "
-                    "Each question should include 1 correct answer and 3 plausible distractors.\n\nTranscript: \n")
-    else:
-        prompt = ("You are a YouTube video summarizer. Please summarize the transcript below into bullet points "
-                    "within 400 words, highlighting the key takeaways and insights.\n\nTranscript: \n")
-
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt + transcript_text)
-    return response.text
+PROMPTS = {
+    "prompt-1": ("You are a YouTube video summarizer. Generate a title based on the video's main topic or keywords. "
+                 "Then, generate subtitles or sections followed by a detailed summary in each section within 400 words.\n\nTranscript: \n"),
+    "prompt-2": ("Summarize the following YouTube transcript into 5-7 concise bullet points. Emphasize action steps, key insights, or tips shared. "
+                 "Avoid filler language and keep the output structured and informative.\n\nTranscript: \n"),
+    "flashcards": ("You are a flashcard generator. Read the following YouTube transcript and generate at least 5 flashcards in the format:\n\n"
+                   "Q: <Question based on key idea>\nA: <Short, correct answer>\n\nTranscript: \n"),
+    "quiz": ("You are a quiz generator. Read the following YouTube transcript and create a short quiz of 5 multiple-choice questions. "
+             "Each question should include 1 correct answer and 3 plausible distractors.\n\nTranscript: \n"),
+    "default": ("You are a YouTube video summarizer. Please summarize the transcript below into bullet points "
+                "within 400 words, highlighting the key takeaways and insights.\n\nTranscript: \n"),
+    # Intermediate output the other types are derived from; not offered in the UI
+    "notes": ("You are preparing structured study notes from a YouTube transcript. Start with a title, then give one "
+              "section per topic in the order they come up, each with a heading and bullet points covering every key "
+              "point, fact, definition, number, step and tip. Keep it within 900 words.\n\nTranscript: \n"),
+}
+QA_PROMPT = ("Answer the question about a YouTube video using only the transcript excerpts below, each starting with "
+             "its time range. Mention the timestamps you drew on in [m:ss] form. If the excerpts do not answer the "
+             "question, say so.\n\nExcerpts:\n{excerpts}\n\nQuestion: {question}")
+NOTES_NOTE = "(Work from these structured notes on the video; treat them as the transcript.)\n\n"
+
+def generate_text(model, prompt_text, on_text=None):
+    """One call; with `on_text`, the response is streamed and on_text(text so far) called per chunk."""
+    if on_text is None:
+        return model.generate_content(prompt_text).text
+    text = ""
+    for chunk in model.generate_content(prompt_text, stream=True):
+        text += chunk.text
+        on_text(text)
+    return text
+
+def summarize_with_gemini(transcript_text, prompt_type="default", entries=None, on_progress=None, on_text=None):
+    """
+    Short transcripts go out in one call. Longer ones (given their caption
+    `entries`) are summarized segment by segment in parallel, then combined.
+    """
+    prompt = PROMPTS.get(prompt_type, PROMPTS["default"])
+    model = genai.GenerativeModel(MODEL_NAME)
+
+    if entries and estimate_tokens(transcript_text) > SINGLE_CALL_TOKENS:
+        segments = segment_transcript(entries, clean=clean_transcript)
+        return map_reduce_summarize(model, segments, prompt, on_progress=on_progress)
+
+    return generate_text(model, prompt + transcript_text, on_text=on_text)
+
+def derive_from_notes(notes, prompt_type="default", on_text=None):
+    prompt = PROMPTS.get(prompt_type, PROMPTS["default"])
+    return generate_text(genai.GenerativeModel(MODEL_NAME), prompt + NOTES_NOTE + notes, on_text=on_text)
+
+def generate_outputs(cache, video_id, cleaned, entries, prompt_types):
+    """
+    Generate several output types concurrently. Yields (prompt_type, text, state)
+    on the calling thread as they progress; state is "partial" while an output
+    streams in, then "done", "cached" or "error" (text is the message).
+    """
+    text_hash = transcript_hash(cleaned)
+    pending = [t for t in prompt_types if not cache.has_output(video_id, t, MODEL_NAME, text_hash)]
+    # Notes already cached from an earlier run are reused even for a single output
+    derive = bool(pending) and estimate_tokens(cleaned) > DERIVE_MIN_TOKENS and (
+        len(pending) > 1 or cache.has_output(video_id, "notes", MODEL_NAME, text_hash)
+    )
+    events = queue.Queue()
+    notes = []
+    notes_lock = threading.Lock()
+
+    def get_notes():
+        # The first output to need the notes generates them; the others wait for it
+        with notes_lock:
+            if not notes:
+                text, _ = cache.output(
+                    video_id, "notes", MODEL_NAME, text_hash,
+                    lambda: summarize_with_gemini(cleaned, prompt_type="notes", entries=entries),
+                )
+                notes.append(text)
+            return notes[0]
+
+    def run(prompt_type):
+        def on_text(text):
+            events.put((prompt_type, text, "partial"))
+        def on_progress(done, total):
+            on_text(f"_Summarized {done} of {total} parts of the transcript..._")
+        def generate():
+            if derive:
+                on_text("_Reading the transcript into notes..._")
+                return derive_from_notes(get_notes(), prompt_type, on_text=on_text)
+            return summarize_with_gemini(cleaned, prompt_type, entries, on_progress=on_progress, on_text=on_text)
+        try:
+            output, cached = cache.output(video_id, prompt_type, MODEL_NAME, text_hash, generate)
+            events.put((prompt_type, output, "cached" if cached else "done"))
+        except Exception as e:
+            events.put((prompt_type, f"Error generating {prompt_type}: {str(e)}", "error"))
+
+    # Streamlit calls are only made from the script thread, so workers hand their progress over a queue
+    with ThreadPoolExecutor(max_workers=max(len(prompt_types), 1)) as pool:
+        for prompt_type in prompt_types:
+            pool.submit(run, prompt_type)
+        remaining = len(prompt_types)
+        while remaining:
+            event = events.get()
+            if event[2] != "partial":
+                remaining -= 1
+            yield event
+
+def answer_question(question, windows, on_text=None):
+    excerpts = "\n\n".join(f"[{window_label(w)}] {w.text}" for w in windows)
+    prompt = QA_PROMPT.format(excerpts=excerpts, question=question)
+    return generate_text(genai.GenerativeModel(MODEL_NAME), prompt, on_text=on_text)
+
+def show_outputs(cache, video_id, transcript, entries, prompt_types, compress=False):
+    cleaned = clean_transcript(transcript)
+    st.subheader("Output")
+    if compress and estimate_tokens(cleaned) > COMPRESS_TARGET_TOKENS:
+        # The compressed transcript fits one call, so long videos skip the map-reduce
+        result = compress_transcript(entries, target_tokens=COMPRESS_TARGET_TOKENS, clean=clean_transcript)
+        cleaned, entries = result.text, None
+        st.caption(f"Transcript compressed locally from {result.tokens_before:,} to {result.tokens_after:,} tokens "
+                   f"({100 * (1 - result.tokens_after / result.tokens_before):.0f}% fewer) "
+                   f"in {result.elapsed_ms:.0f} ms.")
+    # One tab per output type, each filled in as its output streams in
+    slots = {}
+    for prompt_type, tab in zip(prompt_types, st.tabs(list(prompt_types))):
+        with tab:
+            slots[prompt_type] = (st.empty(), st.empty())
+            slots[prompt_type][1].caption("Waiting for Gemini...")
+    started = time.perf_counter()
+    with st.spinner("Generating with Gemini..."):
+        for prompt_type, text, state in generate_outputs(cache, video_id, cleaned, entries, prompt_types):
+            note, body = slots[prompt_type]
+            if state == "error":
+                body.error(text)
+                continue
+            if state == "cached":
+                note.caption("Served from the local cache.")
+            elif state == "done":
+                note.caption(f"Generated in {time.perf_counter() - started:.1f}s.")
+            body.write(text)
+
+def show_answer(video_id, entries, question):
+    index = get_index()
+    with st.spinner("Searching the transcript..."):
+        # Built on the first question about a video, then read from disk
+        index.ensure(video_id, entries, clean=clean_transcript)
+        windows = index.search(video_id, question)
+    if not windows:
+        st.warning("Nothing in the transcript matches this question.")
+        return
+    answer = st.empty()
+    try:
+        answer.write(answer_question(question, windows, on_text=answer.write))
+    except Exception as e:
+        answer.error(f"Error answering the question: {str(e)}")
+    st.caption("From these parts of the video:")
+    for w in windows:
+        snippet = w.text if len(w.text) <= 160 else w.text[:160] + "..."
+        st.markdown(f"- [{window_label(w)}]({timestamp_url(video_id, w.start)}) {snippet}")
 
 def main():
     st.title("YouTube Video Summarizer (Powered by Gemini)")
     st.write("Enter a YouTube video URL to extract and summarize its content.")
 
     url = st.text_input("YouTube Video URL")
-    prompt_type = st.selectbox("Choose Output Type:", ("default", "prompt-1", "prompt-2", "flashcards", "quiz"))
+    prompt_types = st.multiselect("Choose Output Types:", OUTPUT_TYPES, default=["default"])
+    compress = st.checkbox("Compress long transcripts locally first (faster, may leave out minor details)")
 
     if url:
         video_id = get_video_id(url)
@@ -71,19 +237,30 @@ def main():
 
         st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_container_width=True)
 
+        cache = get_cache()
         with st.spinner("Fetching transcript..."):
-            transcript = get_transcript(video_id)
+            try:
+                # Only the first visit to a video fetches its transcript; reruns read it from the cache
+                entries, _ = cache.transcript(video_id, TRANSCRIPT_LANGUAGES, lambda: get_transcript_entries(video_id))
+            except Exception as e:
+                st.error(f"Error fetching transcript: {str(e)}")
+                return
+            transcript = " ".join([entry['text'] for entry in entries]) if entries else None
 
         if transcript:
             st.subheader("Transcript Preview")
             st.text_area("Transcript (first 1000 characters):", transcript[:1000], height=200)
 
             if st.button("Generate Output with Gemini"):
-                with st.spinner("Generating with Gemini..."):
-                    cleaned = clean_transcript(transcript)
-                    output = summarize_with_gemini(cleaned, prompt_type=prompt_type)
-                    st.subheader("Output")
-                    st.write(output)
+                if prompt_types:
+                    show_outputs(cache, video_id, transcript, entries, prompt_types, compress=compress)
+                else:
+                    st.warning("Choose at least one output type.")
+
+            st.subheader("Ask about this video")
+            question = st.text_input("Question")
+            if st.button("Ask") and question.strip():
+                show_answer(video_id, entries, question)
         else:
             st.warning("Transcript not available for this video.")
 
@@ -0,0 +1,223 @@
+import re
+import json
+import math
+import time
+import sqlite3
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+import google.generativeai as genai
+
+from map_reduce import format_timestamp
+from video_cache import CACHE_PATH, transcript_hash
+
+# Per-video index for "ask about this video". The caption entries are grouped
+# into time windows of about WINDOW_SECONDS, keeping each window's start and end
+# time, and stored with its term counts (for BM25) and a Gemini embedding. A
+# question retrieves the best windows by both, merged with reciprocal rank
+# fusion, so only a few minutes of transcript go to Gemini with the question.
+# Indexes live in the local cache file, keyed by video ID and a hash of the
+# windows' text; the least recently used ones are dropped beyond MAX_INDEXES.
+# Without embeddings (no API access at build or query time) search is lexical only.
+
+WINDOW_SECONDS = 60
+TOP_K = 5
+EMBED_MODEL = "models/embedding-001"
+EMBED_BATCH = 100       # texts per embedding request
+MAX_INDEXES = 500
+RRF_K = 60
+BM25_K1, BM25_B = 1.5, 0.75
+
+Window = namedtuple("Window", ["start", "end", "text"])
+
+_SCHEMA = """
+create table if not exists transcript_indexes (
+    video_id text primary key,
+    text_hash text not null,
+    built_at real not null,
+    last_used real not null
+);
+create table if not exists transcript_windows (
+    video_id text not null,
+    position integer not null,
+    start real not null,
+    end real not null,
+    text text not null,
+    terms text not null,
+    embedding blob,
+    primary key (video_id, position)
+);
+create index if not exists transcript_indexes_last_used_idx on transcript_indexes (last_used);
+"""
+
+_STOPWORDS = frozenset(
+    "a an and are as at be but by do does for from has have how i in is it its of on or so that the their them "
+    "there they this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in _STOPWORDS]
+
+
+def build_windows(entries, seconds=WINDOW_SECONDS, clean=None):
+    """Group caption entries ({'text', 'start', 'duration'}) into Windows of about `seconds` each."""
+    windows, texts, start, end = [], [], None, 0.0
+    for entry in entries:
+        text = clean(entry["text"]) if clean else entry["text"].strip()
+        if not text:
+            continue
+        if texts and entry["start"] - start >= seconds:
+            windows.append(Window(start, end, " ".join(texts)))
+            texts, start = [], None
+        if start is None:
+            start = entry["start"]
+        texts.append(text)
+        end = entry["start"] + entry.get("duration", 0.0)
+    if texts:
+        windows.append(Window(start, end, " ".join(texts)))
+    return windows
+
+
+def embed(texts, task_type):
+    """Unit-length embeddings of `texts` as an array, one row per text."""
+    vectors = []
+    for i in range(0, len(texts), EMBED_BATCH):
+        result = genai.embed_content(model=EMBED_MODEL, content=texts[i:i + EMBED_BATCH], task_type=task_type)
+        vectors.extend(result["embedding"])
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def timestamp_url(video_id, seconds):
+    return f"https://www.youtube.com/watch?v={video_id}&t={int(seconds)}s"
+
+
+def window_label(window):
+    return f"{format_timestamp(window.start)} - {format_timestamp(window.end)}"
+
+
+class TranscriptIndex:
+    """Time-windowed BM25 + embedding index of video transcripts, kept on disk."""
+
+    def __init__(self, path=CACHE_PATH, embed=embed):
+        self.path = path
+        self.embed = embed
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def ensure(self, video_id, entries, clean=None):
+        """
+        Build the video's index unless it is already up to date. An index saved
+        without embeddings is only embedded again. Returns True if it changed.
+        """
+        windows = build_windows(entries, clean=clean)
+        text_hash = transcript_hash("\n".join(w.text for w in windows))
+        with self._lock:
+            row = self._conn.execute(
+                "select text_hash, (select count(*) from transcript_windows w "
+                "where w.video_id = i.video_id and w.embedding is null) "
+                "from transcript_indexes i where video_id = ?",
+                (video_id,),
+            ).fetchone()
+        if row is not None and row[0] == text_hash:
+            if not row[1]:
+                return False
+            # Embedding failed when the index was built; retry it so search doesn't stay lexical-only
+            vectors = self._embed_windows(windows)
+            if vectors is None:
+                return False
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "update transcript_windows set embedding = ? where video_id = ? and position = ?",
+                    [(vectors[i].tobytes(), video_id, i) for i in range(len(windows))],
+                )
+            return True
+
+        vectors = self._embed_windows(windows)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("delete from transcript_windows where video_id = ?", (video_id,))
+            self._conn.executemany(
+                "insert into transcript_windows (video_id, position, start, end, text, terms, embedding) "
+                "values (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (video_id, i, w.start, w.end, w.text, json.dumps(Counter(tokenize(w.text))),
+                     vectors[i].tobytes() if vectors is not None else None)
+                    for i, w in enumerate(windows)
+                ],
+            )
+            self._conn.execute(
+                "insert or replace into transcript_indexes (video_id, text_hash, built_at, last_used) values (?, ?, ?, ?)",
+                (video_id, text_hash, now, now),
+            )
+            self._evict()
+        return True
+
+    def _embed_windows(self, windows):
+        try:
+            return self.embed([w.text for w in windows], "retrieval_document") if windows else None
+        except Exception:
+            return None  # lexical search still works
+
+    def search(self, video_id, question, k=TOP_K):
+        """The `k` windows that best match `question`, in video order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "select start, end, text, terms, embedding from transcript_windows where video_id = ? order by position",
+                (video_id,),
+            ).fetchall()
+            with self._conn:
+                self._conn.execute(
+                    "update transcript_indexes set last_used = ? where video_id = ?", (time.time(), video_id)
+                )
+        if not rows:
+            return []
+        windows = [Window(start, end, text) for start, end, text, _, _ in rows]
+
+        rankings = [self._bm25_ranking([json.loads(row[3]) for row in rows], tokenize(question))]
+        if all(row[4] is not None for row in rows):
+            try:
+                query = self.embed([question], "retrieval_query")[0]
+                matrix = np.vstack([np.frombuffer(row[4], dtype=np.float32) for row in rows])
+                rankings.append(list(np.argsort(-(matrix @ query))))
+            except Exception:
+                pass
+
+        scores = Counter()
+        for ranking in rankings:
+            for rank, position in enumerate(ranking):
+                scores[int(position)] += 1.0 / (RRF_K + rank + 1)
+        best = sorted(position for position, _ in scores.most_common(k))
+        return [windows[position] for position in best]
+
+    @staticmethod
+    def _bm25_ranking(term_counts, query_terms):
+        """Window positions ordered by BM25 score; windows sharing no term with the query are left out."""
+        n = len(term_counts)
+        lengths = [sum(counts.values()) for counts in term_counts]
+        average = sum(lengths) / n or 1.0
+        scores = {}
+        for term in set(query_terms):
+            df = sum(1 for counts in term_counts if term in counts)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for position, counts in enumerate(term_counts):
+                tf = counts.get(term, 0)
+                if tf:
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[position] / average)
+                    scores[position] = scores.get(position, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        return sorted(scores, key=scores.get, reverse=True)
+
+    def _evict(self):
+        (count,) = self._conn.execute("select count(*) from transcript_indexes").fetchone()
+        if count > MAX_INDEXES:
+            stale = [row[0] for row in self._conn.execute(
+                "select video_id from transcript_indexes order by last_used limit ?", (count - MAX_INDEXES,)
+            )]
+            self._conn.executemany("delete from transcript_indexes where video_id = ?", [(v,) for v in stale])
+            self._conn.executemany("delete from transcript_windows where video_id = ?", [(v,) for v in stale])
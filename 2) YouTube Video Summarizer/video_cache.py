@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import threading
+
+# Local cache shared by every user of the app, kept across restarts:
+#   * transcripts, keyed by video ID + caption languages (videos without
+#     captions are remembered too, for a shorter time);
+#   * generated outputs, keyed by video ID + output type + model + a hash of the
+#     transcript text they were generated from.
+# Least recently used rows are evicted beyond MAX_TRANSCRIPTS / MAX_OUTPUTS.
+
+CACHE_PATH = os.getenv(
+    "SUMMARY_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "summary_cache.sqlite")
+)
+TRANSCRIPT_TTL = 7 * 24 * 3600   # captions can be edited, so transcripts are re-fetched weekly
+MISSING_TTL = 24 * 3600          # "no transcript" is re-checked daily
+MAX_TRANSCRIPTS = 1000
+MAX_OUTPUTS = 5000
+
+_SCHEMA = """
+create table if not exists transcripts (
+    video_id text not null,
+    languages text not null,
+    entries blob,
+    fetched_at real not null,
+    last_used real not null,
+    primary key (video_id, languages)
+);
+create table if not exists outputs (
+    video_id text not null,
+    prompt_type text not null,
+    model text not null,
+    transcript_hash text not null,
+    output text not null,
+    created_at real not null,
+    last_used real not null,
+    primary key (video_id, prompt_type, model, transcript_hash)
+);
+create index if not exists transcripts_last_used_idx on transcripts (last_used);
+create index if not exists outputs_last_used_idx on outputs (last_used);
+"""
+
+
+def transcript_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class VideoCache:
+    """SQLite cache of transcripts and generated outputs."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def transcript(self, video_id, languages, fetch):
+        """
+        Caption entries for the video, or None if it has no transcript. `fetch()`
+        is only called on a miss; its exceptions are not cached.
+        Returns (entries, cached).
+        """
+        key = (video_id, ",".join(languages))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "select entries, fetched_at from transcripts where video_id = ? and languages = ?", key
+            ).fetchone()
+            if row is not None:
+                blob, fetched_at = row
+                if now - fetched_at < (TRANSCRIPT_TTL if blob is not None else MISSING_TTL):
+                    with self._conn:
+                        self._conn.execute(
+                            "update transcripts set last_used = ? where video_id = ? and languages = ?", (now, *key)
+                        )
+                    return (json.loads(zlib.decompress(blob)) if blob is not None else None), True
+
+        entries = fetch()
+        blob = zlib.compress(json.dumps(entries).encode("utf-8")) if entries else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert or replace into transcripts (video_id, languages, entries, fetched_at, last_used) "
+                "values (?, ?, ?, ?, ?)",
+                (*key, blob, now, now),
+            )
+            self._evict("transcripts", MAX_TRANSCRIPTS)
+        return entries, False
+
+    def has_output(self, video_id, prompt_type, model, text_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "select 1 from outputs where video_id = ? and prompt_type = ? and model = ? and transcript_hash = ?",
+                (video_id, prompt_type, model, text_hash),
+            ).fetchone()
+        return row is not None
+
+    def output(self, video_id, prompt_type, model, text_hash, generate):
+        """The cached output for this transcript, or `generate()`'s result, stored. Returns (output, cached)."""
+        key = (video_id, prompt_type, model, text_hash)
+        where = "video_id = ? and prompt_type = ? and model = ? and transcript_hash = ?"
+        with self._lock:
+            row = self._conn.execute(f"select output from outputs where {where}", key).fetchone()
+            if row is not None:
+                with self._conn:
+                    self._conn.execute(f"update outputs set last_used = ? where {where}", (time.time(), *key))
+                return row[0], True
+
+        output = generate()
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert or replace into outputs "
+                "(video_id, prompt_type, model, transcript_hash, output, created_at, last_used) "
+                "values (?, ?, ?, ?, ?, ?, ?)",
+                (*key, output, now, now),
+            )
+            self._evict("outputs", MAX_OUTPUTS)
+        return output, False
+
+    def _evict(self, table, limit):
+        (count,) = self._conn.execute(f"select count(*) from {table}").fetchone()
+        if count > limit:
+            self._conn.execute(
+                f"delete from {table} where rowid in (select rowid from {table} order by last_used limit ?)",
+                (count - limit,),
+            )
@@ -4,6 +4,10 @@ import os
 import PyPDF2 as pdf
 from dotenv import load_dotenv
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from screening import extract_texts, new_extract_pool, parse_match, score_resumes
 
 # Load the .env variables
 load_dotenv()
@@ -15,21 +19,31 @@ except Exception as e:
     st.error(f"Failed to configure Gemini API: {e}. Ensure GOOGLE_API_KEY is set.")
     st.stop()
 
+TOP_K = 10                # resumes sent to the full Gemini evaluation in batch screening
+EVALUATION_CONCURRENCY = 4
+
 # --- Helper Functions ---
 
+def generate_json(prompt_text):
+    """
+    Calls the Gemini API with the formatted prompt and requests JSON output.
+    Raises on API errors, so it is safe to call from worker threads.
+    """
+    model = genai.GenerativeModel('gemini-2.0-flash')
+    response = model.generate_content(
+        prompt_text,
+        generation_config=genai.types.GenerationConfig(
+            response_mime_type="application/json"
+        )
+    )
+    return response.text
+
 def get_gemini_response(prompt_text, purpose="evaluation"):
     """
     Calls the Gemini API with the formatted prompt and requests JSON output.
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = model.generate_content(
-            prompt_text,
-            generation_config=genai.types.GenerationConfig(
-                response_mime_type="application/json"
-            )
-        )
-        return response.text
+        return generate_json(prompt_text)
     except Exception as e:
         st.error(f"Error calling Gemini API for {purpose}: {e}")
         return None
@@ -124,6 +138,93 @@ Job Description:
 {jd}
 """
 
+# --- Batch Screening ---
+
+# One process pool for the whole app, so workers start once rather than per batch
+@st.cache_resource
+def get_extract_pool():
+    return new_extract_pool()
+
+def evaluate_resume(resume_text, jd):
+    """Full Gemini evaluation of one resume as a dict; raises on API or JSON errors."""
+    return json.loads(generate_json(input_prompt_template.format(text=resume_text, jd=jd)))
+
+def screen_resumes(jd, uploaded_files, top_k):
+    """
+    Rank all uploaded resumes locally, then evaluate the top_k with Gemini,
+    EVALUATION_CONCURRENCY at a time. The ranked table updates as results come in.
+    """
+    files = [(f.name, f.getvalue()) for f in uploaded_files]
+    rows = [
+        {"Resume": name, "Gemini Match": None, "Local Score": None, "Keyword Coverage": None,
+         "Missing Keywords": "", "Status": "Extracting text..."}
+        for name, _ in files
+    ]
+    table = st.empty()
+    progress = st.progress(0.0, text="📄 Extracting text from PDFs...")
+
+    def render():
+        # Gemini-evaluated resumes first by match, then the rest by local score
+        ranked = sorted(rows, key=lambda r: (r["Gemini Match"] is None, -(r["Gemini Match"] or 0), -(r["Local Score"] or -1)))
+        table.dataframe([{"Rank": rank, **row} for rank, row in enumerate(ranked, 1)], use_container_width=True, hide_index=True)
+
+    texts = [""] * len(files)
+    try:
+        for done, (index, text, error) in enumerate(extract_texts(get_extract_pool(), files), 1):
+            texts[index] = text
+            rows[index]["Status"] = error or "Text extracted"
+            progress.progress(done / len(files), text=f"📄 Extracted text from {done} of {len(files)} resumes")
+    except BrokenProcessPool:
+        get_extract_pool.clear()
+        progress.empty()
+        st.error("The PDF extraction workers stopped unexpectedly. Please try again.")
+        return
+
+    scores = score_resumes(jd, texts)
+    readable = [i for i, text in enumerate(texts) if text.strip()]
+    for i in readable:
+        rows[i].update({
+            "Local Score": scores[i].score,
+            "Keyword Coverage": f"{scores[i].coverage:.0%}",
+            "Missing Keywords": ", ".join(scores[i].missing[:5]),
+            "Status": "Not shortlisted",
+        })
+    shortlist = sorted(readable, key=lambda i: scores[i].score, reverse=True)[:top_k]
+    for i in shortlist:
+        rows[i]["Status"] = "Waiting for Gemini..."
+    render()
+
+    evaluations = {}
+    if shortlist:
+        progress.progress(0.0, text=f"🧠 Evaluating the top {len(shortlist)} resumes with Gemini...")
+        with ThreadPoolExecutor(max_workers=EVALUATION_CONCURRENCY) as pool:
+            futures = {pool.submit(evaluate_resume, texts[i], jd): i for i in shortlist}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    evaluations[i] = future.result()
+                    rows[i]["Gemini Match"] = parse_match(evaluations[i].get('JD Match', ''))
+                    rows[i]["Status"] = "Evaluated"
+                except json.JSONDecodeError:
+                    rows[i]["Status"] = "Gemini response was not valid JSON"
+                except Exception as e:
+                    rows[i]["Status"] = f"Gemini error: {e}"
+                progress.progress(done / len(shortlist), text=f"🧠 Evaluated {done} of {len(shortlist)} shortlisted resumes with Gemini")
+                render()
+    progress.empty()
+
+    st.caption(f"{len(files)} resumes ranked locally; {len(shortlist)} evaluated with Gemini.")
+    for i in sorted(evaluations, key=lambda i: rows[i]["Gemini Match"] or 0, reverse=True):
+        result = evaluations[i]
+        with st.expander(f"{rows[i]['Resume']} — {result.get('JD Match', 'N/A')}"):
+            st.info(result.get('OptimizedProfileSummary') or "N/A")
+            st.markdown("**Strengths:**")
+            for strength in result.get('ResumeStrengths', []):
+                st.markdown(f"- {strength}")
+            st.markdown("**Missing Keywords & Gaps:**")
+            for item in result.get('MissingKeywordsAndGaps', []):
+                st.markdown(f"- **{item.get('keyword', 'N/A')}:** {item.get('suggestion', 'N/A')}")
+
 # --- Streamlit App UI ---
 
 st.set_page_config(layout="wide", page_title="Gemini Powered Smart ATS System")
@@ -311,5 +412,26 @@ with col2:
             else:
                 st.markdown("No snippets generated yet, or an error occurred.")
 
+# --- Batch Screening Section ---
+st.markdown("---")
+st.header("📚 Batch Screening")
+st.markdown("Screen many resumes against the job description above. Every resume is scored locally; only the top candidates get the full Gemini evaluation.")
+batch_files = st.file_uploader(
+    "📁 Upload Resumes (PDF only):",
+    type="pdf",
+    accept_multiple_files=True,
+    key="batch_resumes"
+)
+top_k = st.number_input("Number of top resumes to evaluate with Gemini:", min_value=0, max_value=100, value=TOP_K)
+if st.button("📋 Screen Resumes", type="primary"):
+    if not os.getenv("GOOGLE_API_KEY"):
+        st.error("API Key not configured. Please set the GOOGLE_API_KEY environment variable.")
+    elif not jd_input:
+        st.warning("⚠️ Please paste the Job Description.")
+    elif not batch_files:
+        st.warning("⚠️ Please upload the resume PDFs.")
+    else:
+        screen_resumes(jd_input, batch_files, int(top_k))
+
 st.markdown("---")
 st.caption("Powered by Google Gemini | Developed for educational and illustrative purposes.")
\ No newline at end of file
@@ -0,0 +1,109 @@
+import io
+import re
+import math
+import multiprocessing
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import PyPDF2 as pdf
+
+# Local stages of batch screening, before any resume reaches Gemini:
+#   * PDF text is extracted in a process pool (PyPDF2 is pure Python, so threads
+#     would just take turns on the GIL). The worker lives here rather than in
+#     app.py because Streamlit scripts can't be imported by child processes.
+#   * Every resume gets a relevance score against the job description: the
+#     TF-IDF cosine similarity of their words and word pairs, plus how many of
+#     the JD's most distinctive keywords the resume covers. Keywords are
+#     weighted by how rare they are across the uploaded resumes, so boilerplate
+#     like "team" or "experience" counts for little.
+
+EXTRACT_WORKERS = min(4, multiprocessing.cpu_count())
+KEYWORDS = 25             # JD keywords checked for coverage
+SIMILARITY_WEIGHT = 0.5   # the rest of the score is keyword coverage
+
+LocalScore = namedtuple("LocalScore", ["score", "similarity", "coverage", "missing"])
+
+_STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could do does etc for from has
+have having he her his how i if in into is it its may me more most must my of on or our out over per she should
+so such than that the their them then there these they this those through to under up us using via was we were
+what when where which while who will with within would you your
+""".split())
+
+
+def pdf_text(data):
+    """Text of a PDF given as bytes; runs in a worker process. Returns (text, error)."""
+    try:
+        reader = pdf.PdfReader(io.BytesIO(data))
+        text = "".join(page.extract_text() or "" for page in reader.pages)
+        return text, None if text.strip() else "No text found (image-based, empty or corrupted PDF)"
+    except Exception as e:
+        return "", f"Error reading or parsing PDF: {e}"
+
+
+def extract_texts(pool, files):
+    """Yield (index, text, error) for [(name, bytes)] as each PDF is done, in completion order."""
+    futures = {pool.submit(pdf_text, data): index for index, (_, data) in enumerate(files)}
+    for future in as_completed(futures):
+        text, error = future.result()
+        yield futures[future], text, error
+
+
+def new_extract_pool(workers=EXTRACT_WORKERS):
+    # "spawn" avoids forking the Streamlit server with its threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def terms(text):
+    """Words (keeping forms like c++, c#, node.js) and adjacent word pairs, with counts."""
+    counts = Counter()
+    # Pairs don't cross punctuation, so lists like "SQL, Docker" don't make a "sql docker"
+    for phrase in re.split(r"[,;:()\[\]|/\n\u2022]+|\.(?:\s|$)", text.lower()):
+        words = [w for w in re.findall(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]", phrase) if w not in _STOPWORDS]
+        counts.update(words)
+        counts.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return counts
+
+
+def _tfidf(counts, idf):
+    vector = {t: (1 + math.log(c)) * idf.get(t, 0.0) for t, c in counts.items()}
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {t: v / norm for t, v in vector.items()}
+
+
+def score_resumes(jd, texts, keywords=KEYWORDS):
+    """LocalScore (0-100 score, similarity, coverage, missing keywords) for each resume text, in order."""
+    jd_terms = terms(jd)
+    resume_terms = [terms(text) for text in texts]
+    n = len(texts) + 1
+    df = Counter(jd_terms.keys())
+    for counts in resume_terms:
+        df.update(counts.keys())
+    idf = {t: math.log((n + 1) / (d + 1)) + 1 for t, d in df.items()}
+
+    jd_vector = _tfidf(jd_terms, idf)
+    similarities = [
+        sum(weight * jd_vector.get(t, 0.0) for t, weight in _tfidf(counts, idf).items()) for counts in resume_terms
+    ]
+    best = max(similarities, default=0.0) or 1.0
+
+    # The JD's most distinctive single words and pairs, by in-JD frequency x rarity among the resumes.
+    # Terms no resume (or every resume) contains can't tell resumes apart; they are mostly the JD's own phrasing.
+    candidates = [t for t in jd_terms if 1 < df[t] < n] or list(jd_terms)
+    top = sorted(candidates, key=lambda t: (1 + math.log(jd_terms[t])) * idf[t] * (1.5 if " " in t else 1.0),
+                 reverse=True)[:keywords]
+    total = sum(idf[t] for t in top) or 1.0
+
+    scores = []
+    for counts, similarity in zip(resume_terms, similarities):
+        missing = [t for t in top if t not in counts]
+        coverage = 1 - sum(idf[t] for t in missing) / total
+        score = 100 * (SIMILARITY_WEIGHT * similarity / best + (1 - SIMILARITY_WEIGHT) * coverage)
+        scores.append(LocalScore(round(score, 1), round(similarity, 3), round(coverage, 3), missing))
+    return scores
+
+
+def parse_match(value):
+    """The number in a "JD Match" string like "85%", or None."""
+    match = re.search(r"\d+(?:\.\d+)?", str(value))
+    return float(match.group()) if match else None
@@ -0,0 +1,204 @@
+import os
+import asyncio
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Models used by the chatbot
+PR_EMBEDDING_MODEL = "models/text-embedding-004"   # 768-dim, press releases
+SEC_EMBEDDING_MODEL = "gemini-embedding-001"       # 1536-dim, SEC reports
+CHAT_MODEL = "gemini-1.5-flash"
+CHAT_TEMPERATURE = 0.1
+
+# Max calls in flight per chat model across all threads: "8", or a default plus
+# per-model overrides such as "8,gemini-1.5-pro=2"
+MODEL_CONCURRENCY = os.getenv("MODEL_CONCURRENCY", "8")
+
+# Threads shared by retrieval fan-out (per-source searches of a low-confidence
+# question, and the vector leg of each hybrid search). Every concurrent question
+# can use up to three of each, so keep this at least 3x the batch concurrency.
+RETRIEVAL_CONCURRENCY = int(os.getenv("RETRIEVAL_CONCURRENCY", "32"))
+
+
+def _ensure_event_loop():
+    # gRPC asyncio clients need an event loop in the thread that builds them
+    try:
+        asyncio.get_event_loop()
+    except RuntimeError:
+        asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of lazily built clients. Each factory runs once, on
+    first use, and does its own heavy imports, so importing this module costs
+    nothing and the first page can render before any client exists.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._clients = {}
+        self._locks = {}
+        self._warmup_thread = None
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+
+    def get(self, name):
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._locks[name]:
+            if name not in self._clients:
+                _ensure_event_loop()
+                self._clients[name] = self._factories[name]()
+            return self._clients[name]
+
+    def is_ready(self, name):
+        return name in self._clients
+
+    def warm_up(self, names=None):
+        """Build clients on a daemon thread so the first question doesn't pay for it."""
+        if self._warmup_thread is not None:
+            return self._warmup_thread
+
+        def run():
+            for name in names or list(self._factories):
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Warm-up of {name} client failed: {e}")
+
+        self._warmup_thread = threading.Thread(target=run, name="client-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+
+def _build_supabase():
+    from supabase import create_client
+    return create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+
+def _build_pr_embeddings():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return GoogleGenerativeAIEmbeddings(model=PR_EMBEDDING_MODEL, google_api_key=os.getenv("GOOGLE_API_KEY"))
+
+
+def _build_sec_embeddings():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return GoogleGenerativeAIEmbeddings(model=SEC_EMBEDDING_MODEL, google_api_key=os.getenv("GOOGLE_API_KEY"))
+
+
+# To authenticate through Vertex AI instead of an API key:
+# from google.oauth2 import service_account
+# import vertexai
+# credentials = service_account.Credentials.from_service_account_file(
+#     os.getenv("GOOGLE_APPLICATION_CREDENTIALS"),
+#     scopes=['https://www.googleapis.com/auth/cloud-platform']
+# )
+# vertexai.init(project="ai-financial-agent-467005", location="us-central1", credentials=credentials)
+
+
+def _build_chat_llm(model, temperature):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model, google_api_key=os.getenv("GOOGLE_API_KEY"), temperature=temperature)
+
+
+def _parse_limits(spec):
+    default, limits = 8, {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        if "=" in part:
+            model, n = part.split("=", 1)
+            limits[model.strip()] = int(n)
+        else:
+            default = int(part)
+    return default, limits
+
+
+class PooledModel:
+    """A shared chat client whose calls wait for a free slot of its model's concurrency limit."""
+
+    def __init__(self, client, slots):
+        self.client = client
+        self._slots = slots
+
+    def invoke(self, *args, **kwargs):
+        with self._slots:
+            return self.client.invoke(*args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        with self._slots:
+            yield from self.client.stream(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class ModelPool:
+    """
+    Long-lived chat clients keyed by (model, temperature). Every caller asking
+    for the same key gets the same client, so its gRPC channel stays open
+    between questions instead of being rebuilt per call. Calls are capped per
+    model (shared by all its temperatures), which keeps concurrent questions
+    under the API's rate limit instead of failing with 429s.
+    """
+
+    def __init__(self, build=_build_chat_llm, limits=MODEL_CONCURRENCY):
+        self._build = build
+        self._default_limit, self._limits = _parse_limits(limits) if isinstance(limits, str) else (limits, {})
+        self._models = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def set_limit(self, model, limit):
+        """Change a model's limit; takes effect for clients built afterwards."""
+        with self._lock:
+            self._limits[model] = limit
+            self._slots.pop(model, None)
+
+    def _slots_for(self, model):
+        if model not in self._slots:
+            self._slots[model] = threading.BoundedSemaphore(self._limits.get(model, self._default_limit))
+        return self._slots[model]
+
+    def get(self, model=CHAT_MODEL, temperature=CHAT_TEMPERATURE):
+        key = (model, float(temperature))
+        pooled = self._models.get(key)
+        if pooled is not None:
+            return pooled
+        with self._lock:
+            if key not in self._models:
+                _ensure_event_loop()
+                self._models[key] = PooledModel(self._build(model, temperature), self._slots_for(model))
+            return self._models[key]
+
+    def keys(self):
+        return list(self._models)
+
+
+models = ModelPool()
+
+registry = ClientRegistry()
+registry.register("supabase", _build_supabase)
+registry.register("emb_pr", _build_pr_embeddings)
+registry.register("emb_sec", _build_sec_embeddings)
+registry.register("llm", models.get)
+
+
+def get_supabase():
+    return registry.get("supabase")
+
+
+def get_pr_embeddings():
+    return registry.get("emb_pr")
+
+
+def get_sec_embeddings():
+    return registry.get("emb_sec")
+
+
+def get_llm(model=CHAT_MODEL, temperature=CHAT_TEMPERATURE):
+    """Pooled chat client shared by the answer, SQL and memory calls."""
+    return models.get(model, temperature)
@@ -0,0 +1,147 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_files.prompts import REWRITE_PROMPT, SUMMARY_PROMPT
+from agent_files.tracing import span, record_llm_usage
+from retrieval.query_filters import parse_query_filters
+
+# Turns kept verbatim; older ones live only in the running summary
+WINDOW_TURNS = 3
+# Per-turn and summary caps, so the history block has a fixed upper bound
+TURN_CHAR_LIMIT = 1200
+SUMMARY_WORDS = 150
+SUMMARY_CHAR_LIMIT = 1500
+
+# Questions that lean on earlier turns open with a connective ("and in 2022?",
+# "what about the debt?") or point back with a pronoun ("how did its NOI change?")
+_CONNECTIVE_RE = re.compile(r"^(and|but|also|what about|how about|same|compare|versus|vs\.?)\b", re.I)
+_PRONOUN_RE = re.compile(r"\b(it|its|they|their|them|that|those|these|this|same|previous|prior|above)\b", re.I)
+# A company named in the question: a possessive or capitalized name past the first word ("Apple's", "Prologis")
+_COMPANY_RE = re.compile(r"\b[A-Z][\w&.-]*'s\b|(?<=\s)[A-Z][a-z][\w&-]*")
+
+# Summaries are folded in off the request path; one worker keeps them ordered per process
+_summarizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+
+
+def _clip(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + " …"
+
+
+def looks_like_followup(question):
+    """
+    Whether `question` needs earlier turns to make sense. A pronoun alone isn't
+    enough when the question names its own company or period ("What was Apple's
+    revenue in Q2 2024 and how does this compare").
+    """
+    question = question.strip()
+    if _CONNECTIVE_RE.search(question):
+        return True
+    if not _PRONOUN_RE.search(question):
+        return False
+    filters = parse_query_filters(question)
+    has_period = filters is not None and bool(filters.periods or filters.date_from)
+    return not (has_period or _COMPANY_RE.search(question))
+
+
+class ConversationMemory:
+    """
+    Bounded memory of one chat session.
+
+    The last `window_turns` question/answer pairs are kept verbatim (clipped to
+    `TURN_CHAR_LIMIT`); older turns are folded into a running summary by a
+    background LLM call after each answer. render() therefore returns at most
+    the summary plus `window_turns` turns, however long the session runs.
+    """
+
+    def __init__(self, llm_factory=None, window_turns=WINDOW_TURNS):
+        if llm_factory is None:
+            from agent_files.clients import get_llm
+            llm_factory = get_llm
+        self.llm_factory = llm_factory
+        self.window_turns = window_turns
+        self.turns = []
+        self.summary = ""
+        self._lock = threading.Lock()
+        self._folding = False
+        self._pending = None
+
+    def render(self):
+        """History block for the answer prompt ("" when the conversation is new)."""
+        with self._lock:
+            summary = self.summary
+            recent = self.turns[-self.window_turns:]
+        if not summary and not recent:
+            return ""
+        lines = ["", "Conversation so far:"]
+        if summary:
+            lines.append(f"Summary of earlier turns: {summary}")
+        for question, answer in recent:
+            lines.append(f"User: {question}")
+            lines.append(f"Assistant: {answer}")
+        return "\n    ".join(lines) + "\n"
+
+    def rewrite(self, question):
+        """
+        Standalone version of `question` for retrieval and routing. Questions
+        that don't look like follow-ups skip the LLM call.
+        """
+        with self._lock:
+            has_turns = bool(self.turns)
+        if not has_turns or not looks_like_followup(question):
+            return question
+        history = self.render()
+        prompt = REWRITE_PROMPT.format(history=history.strip(), question=question)
+        with span("memory.rewrite", question_chars=len(question)) as rewrite_span:
+            try:
+                response = self.llm_factory().invoke(prompt)
+                record_llm_usage(rewrite_span, prompt, response)
+                rewritten = response.content.strip().strip('"') or question
+                rewrite_span.set(rewritten=rewritten)
+                return rewritten
+            except Exception as e:
+                rewrite_span.set(error=str(e))
+                return question
+
+    def add_turn(self, question, answer):
+        """Record a finished turn and fold overflow turns into the summary in the background."""
+        with self._lock:
+            self.turns.append((_clip(question, TURN_CHAR_LIMIT), _clip(answer, TURN_CHAR_LIMIT)))
+            overflow = len(self.turns) - self.window_turns
+            # One fold at a time; a running fold picks up turns that arrive meanwhile
+            if overflow > 0 and not self._folding:
+                self._folding = True
+                self._pending = _summarizer.submit(self._fold, overflow)
+
+    def _fold(self, count):
+        with self._lock:
+            summary = self.summary
+            folding = self.turns[:count]
+        turns = "\n    ".join(f"User: {q}\n    Assistant: {a}" for q, a in folding)
+        prompt = SUMMARY_PROMPT.format(summary=summary or "(none)", turns=turns, max_words=SUMMARY_WORDS)
+        with span("memory.summarize", turns=count) as summary_span:
+            try:
+                response = self.llm_factory().invoke(prompt)
+                record_llm_usage(summary_span, prompt, response)
+                new_summary = _clip(response.content, SUMMARY_CHAR_LIMIT)
+            except Exception as e:
+                summary_span.set(error=str(e))
+                # Keep the turns; the next answer retries the fold
+                with self._lock:
+                    self._folding = False
+                return
+        with self._lock:
+            self.summary = new_summary
+            del self.turns[:count]
+            overflow = len(self.turns) - self.window_turns
+            # Turns that arrived while this call was running
+            if overflow > 0:
+                self._pending = _summarizer.submit(self._fold, overflow)
+            else:
+                self._folding = False
+
+    def wait(self, timeout=None):
+        """Block until pending summarization finishes (for batch tools and benchmarks)."""
+        while self._folding and self._pending is not None:
+            self._pending.result(timeout=timeout)
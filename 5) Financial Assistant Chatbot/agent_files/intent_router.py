@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import math
+import operator
+from collections import namedtuple
+
+# Data sources the chatbot can answer from
+SOURCES = ("press_releases", "sec_reports", "structured_data")
+
+CENTROIDS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "router_centroids.json")
+
+# Embedding model used for routing. It is the press release model, so the routing
+# vector can be reused as the query vector for search_all_press_releases.
+ROUTER_EMBEDDING_MODEL = "models/text-embedding-004"
+ROUTER_TASK_TYPE = "RETRIEVAL_DOCUMENT"
+
+# Exemplar questions per source. They must not paraphrase questions.txt or the
+# held-out split in benchmarks/routing_holdout.txt, which routing_accuracy.py scores
+# (it flags evaluated questions that overlap an exemplar too closely).
+EXEMPLARS = {
+    "press_releases": [
+        "What dividend did Prologis declare last quarter?",
+        "When was the latest quarterly dividend announced?",
+        "What did Prologis announce in its most recent earnings release?",
+        "Summarize the core FFO guidance from the latest earnings press release.",
+        "Did Prologis announce a new joint venture or fund?",
+        "Did Prologis announce any new green bond offerings?",
+        "What did the CEO say in the quarterly results announcement?",
+        "What was the occupancy rate reported in the last earnings release?",
+        "Summarize the news about Prologis debt issuance.",
+        "What guidance did Prologis give for the full year in the press release?",
+        "What development starts were highlighted in the latest earnings release?",
+        "Which leadership changes were announced recently?",
+    ],
+    "sec_reports": [
+        "How does the annual report describe exposure to tenant concentration?",
+        "What does the 10-K say about interest rate risk?",
+        "Describe the legal proceedings disclosed in the 10-Q.",
+        "What are the critical accounting estimates in the annual filing?",
+        "How does Prologis describe its internal control over financial reporting?",
+        "What reportable segments does the 10-K describe?",
+        "What off-balance-sheet arrangements are disclosed in the quarterly filing?",
+        "What is said about market risk in the SEC filing?",
+        "Summarize management's discussion and analysis from the 10-Q.",
+        "What debt covenants are disclosed in the annual report?",
+        "What cybersecurity risks are described in the filing?",
+        "How many employees does Prologis report in its 10-K?",
+    ],
+    "structured_data": [
+        "What was the revenue of Prologis Witt Road in 2022?",
+        "List the five properties with the highest net income in 2024.",
+        "Which metro area has the most square footage?",
+        "Show the address and property type of Prologis Lewisville 2.",
+        "What is the total revenue of all properties in 2023?",
+        "Which properties saw net income fall from one year to the next?",
+        "How many properties are in the Plano metro area?",
+        "Which building has the largest square footage?",
+        "What is the median square footage of the warehouses?",
+        "List every property in a given metro area with its property type.",
+        "How many spec buildings are there in each metro area?",
+        "Which property type earns the most net income?",
+    ],
+}
+
+# Legacy keyword lists, kept as the fallback when no centroids are available
+KEYWORDS = {
+    "press_releases": ["dividend", "earnings", "quarter", "announcement", "press", "news", "declared"],
+    "sec_reports": ["filing", "sec", "annual", "report", "10-k", "10-q", "compliance", "risk"],
+    "structured_data": ["revenue", "profit", "assets", "properties", "property", "financial", "income", "square", "metro", "address"],
+}
+
+# Result of routing a query: the sources to search (best first), the per-source
+# probabilities, and the probability of the top source.
+RouteDecision = namedtuple("RouteDecision", ["sources", "scores", "confidence"])
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def keyword_intent(query):
+    """
+    Keyword scoring on word prefixes, so "risk" matches "risks" but no longer
+    matches "asterisk". Returns a single source name.
+    """
+    tokens = set(_TOKEN_RE.findall(query.lower()))
+    scores = {
+        source: sum(1 for kw in KEYWORDS[source] if any(tok.startswith(kw) for tok in tokens))
+        for source in SOURCES
+    }
+
+    # Ties keep the original preference order: press releases, SEC, structured data
+    return max(SOURCES, key=lambda source: scores[source])
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(x * x for x in vector))
+    if not norm:
+        return list(vector)
+    return [x / norm for x in vector]
+
+
+def build_centroids(embed_documents, exemplars=EXEMPLARS):
+    """
+    Embed the exemplar questions and average them into one unit-length centroid
+    per source. `embed_documents` takes a list of strings and returns vectors.
+    """
+    centroids = {}
+    for source, questions in exemplars.items():
+        vectors = [_normalize(v) for v in embed_documents(questions)]
+        mean = [sum(col) / len(vectors) for col in zip(*vectors)]
+        centroids[source] = _normalize(mean)
+    return centroids
+
+
+class IntentRouter:
+    """
+    Routes a query vector to data sources by cosine similarity against
+    per-source centroids. Centroids are unit length, so scoring is three dot
+    products plus one norm.
+    """
+
+    def __init__(self, centroids, temperature=0.02, min_confidence=0.6, coverage=0.85):
+        self.sources = [s for s in SOURCES if s in centroids]
+        self.centroids = [_normalize(centroids[s]) for s in self.sources]
+        self.temperature = temperature
+        self.min_confidence = min_confidence
+        self.coverage = coverage
+
+    @classmethod
+    def load(cls, path=CENTROIDS_PATH, **kwargs):
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        return cls(payload["centroids"], **kwargs)
+
+    def save(self, path=CENTROIDS_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "model": ROUTER_EMBEDDING_MODEL,
+                "task_type": ROUTER_TASK_TYPE,
+                "centroids": dict(zip(self.sources, self.centroids)),
+            }, f)
+
+    def route(self, query_vector):
+        norm = math.sqrt(sum(map(operator.mul, query_vector, query_vector))) or 1.0
+        sims = [sum(map(operator.mul, query_vector, c)) / norm for c in self.centroids]
+
+        # Softmax over similarities turns small cosine gaps into probabilities
+        top = max(sims)
+        weights = [math.exp((s - top) / self.temperature) for s in sims]
+        total = sum(weights)
+        probs = {source: w / total for source, w in zip(self.sources, weights)}
+
+        ranked = sorted(self.sources, key=probs.get, reverse=True)
+        confidence = probs[ranked[0]]
+        if confidence >= self.min_confidence:
+            return RouteDecision([ranked[0]], probs, confidence)
+
+        # Low confidence: fan out to the smallest set of sources covering most of the mass
+        chosen, mass = [], 0.0
+        for source in ranked:
+            chosen.append(source)
+            mass += probs[source]
+            if mass >= self.coverage:
+                break
+        return RouteDecision(chosen, probs, confidence)
@@ -0,0 +1,316 @@
+import os
+import contextvars
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_files.clients import get_supabase, get_pr_embeddings, get_sec_embeddings, get_llm, CHAT_MODEL, RETRIEVAL_CONCURRENCY
+from agent_files.prompts import ANSWER_PROMPT
+from agent_files.tracing import span, record_llm_usage
+from agent_files.intent_router import (
+    CENTROIDS_PATH, ROUTER_TASK_TYPE, IntentRouter, RouteDecision, keyword_intent,
+)
+from retrieval.bm25_index import load_index
+from retrieval.fact_store import format_fact, is_numeric_question, load_fact_store
+from retrieval.hybrid_search import hybrid_search
+from retrieval.query_filters import (
+    available_filings, parse_query_filters, press_release_window, published_predicate,
+    sec_source_files, source_file_predicate,
+)
+
+# Routing, retrieval, SQL and answer generation for one question, shared by the
+# Streamlit app and the batch CLI (batch_answer.py).
+
+# Runs the per-source searches of a low-confidence question side by side
+_source_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_CONCURRENCY, thread_name_prefix="sources")
+
+TurnResult = namedtuple("TurnResult", ["answer", "source_info", "intent", "decision", "query_vector"])
+
+
+class ChatPipeline:
+    """
+    Answers one question end to end. Holds the read-only resources loaded at
+    startup (router centroids, BM25 and local vector indexes, SEC fact table,
+    filing list), so one instance can serve many questions, concurrently.
+    `on_error` reports retrieval errors to the user (st.error in the app). It is
+    only called from the thread that asked the question.
+    """
+
+    def __init__(self, router=None, bm25_pr=None, bm25_sec=None, local_pr=None, local_sec=None, fact_store=None,
+                 filings=(), on_error=print):
+        self.router = router
+        self.bm25_pr = bm25_pr
+        self.bm25_sec = bm25_sec
+        self.local_pr = local_pr
+        self.local_sec = local_sec
+        self.fact_store = fact_store
+        self.filings = filings
+        self.on_error = on_error
+
+    @classmethod
+    def load(cls, on_error=print):
+        # Routing centroids are precomputed by build_router_centroids.py
+        router = None
+        if os.path.exists(CENTROIDS_PATH):
+            router = IntentRouter.load(CENTROIDS_PATH)
+        else:
+            print(f"WARNING: no router centroids at {CENTROIDS_PATH}; intent routing falls back to "
+                  f"keyword matching. Run `python build_router_centroids.py` to generate them.")
+
+        # Optional local quantized vector indexes (LOCAL_VECTOR_INDEX=int8 or binary),
+        # built by build_quantized_index.py; they replace the Supabase vector RPCs
+        local_pr = local_sec = None
+        mode = os.getenv("LOCAL_VECTOR_INDEX", "").strip().lower()
+        if mode:
+            from retrieval.quantized_index import load_quantized_index
+            local_pr, local_sec = load_quantized_index("press_releases", mode), load_quantized_index("sec_reports", mode)
+
+        return cls(
+            router=router,
+            # Local BM25 indexes built at ingest time; missing indexes mean vector-only search
+            bm25_pr=load_index("press_releases"),
+            bm25_sec=load_index("sec_reports"),
+            local_pr=local_pr,
+            local_sec=local_sec,
+            # Financial tables extracted from the filings at ingest time (ingestion/sec_tables.py)
+            fact_store=load_fact_store(),
+            # Filing PDFs on hand, used to resolve periods like "Q2 2024" to source_file values
+            filings=available_filings(),
+            on_error=on_error,
+        )
+
+    # Search press releases (Source 3) in ALL PAGES
+    def search_press_releases(self, query, limit=20, query_vector=None, on_error=None):
+        with span("retrieve.press_releases", limit=limit) as retrieve_span:
+            try:
+                # Push dates like "December 2024" or "Q2 2025" down onto published_at
+                window = press_release_window(parse_query_filters(query))
+                retrieve_span.set(filter_window=f"{window[0]}..{window[1]}" if window else "")
+
+                def vector_search(match_count):
+                    # Reuse the routing vector when available, it comes from the same model
+                    vector = query_vector
+                    if vector is None:
+                        with span("embed.query", model="text-embedding-004"):
+                            vector = get_pr_embeddings().embed_query(
+                                query,
+                                task_type="RETRIEVAL_DOCUMENT"
+                            )
+                    retrieve_span.set(embedding_cache_hit=query_vector is not None)
+
+                    if self.local_pr is not None:
+                        with span("local_index.search", mode=self.local_pr.mode, match_count=match_count) as local_span:
+                            rows = self.local_pr.search(vector, k=match_count, allowed=published_predicate(window))
+                            local_span.set(result_count=len(rows))
+                        return rows
+
+                    params = {
+                        "query_embedding": vector,
+                        "similarity_threshold": 0.02,
+                        "match_count": match_count
+                    }
+                    rpc = "search_all_press_releases"
+                    if window is not None:
+                        rpc = "search_all_press_releases_filtered"
+                        params["published_after"] = window[0].isoformat()
+                        params["published_before"] = window[1].isoformat()
+
+                    with span("supabase.rpc", rpc=rpc, match_count=match_count) as rpc_span:
+                        response = get_supabase().rpc(rpc, params).execute()
+                        rpc_span.set(result_count=len(response.data))
+                    return response.data
+
+                on_error = on_error or self.on_error
+                results = hybrid_search(query, vector_search, self.bm25_pr, k=limit, allowed=published_predicate(window),
+                                        on_error=on_error)
+                if not results and window is not None:
+                    # Nothing published in that window; retry over all press releases
+                    window = None
+                    results = hybrid_search(query, vector_search, self.bm25_pr, k=limit, on_error=on_error)
+                retrieve_span.set(result_count=len(results))
+                return results, "press_releases"
+            except Exception as e:
+                retrieve_span.set(error=str(e))
+                (on_error or self.on_error)(f"Error searching press releases: {str(e)}")
+                return [], "press_releases"
+
+    # Search SEC reports (Source 1)
+    def search_sec_reports(self, query, limit=10, on_error=None):
+        with span("retrieve.sec_reports", limit=limit) as retrieve_span:
+            try:
+                # Push periods and filing types like "Q2 2024" or "latest 10-K" down onto source_file
+                source_files = sec_source_files(parse_query_filters(query), self.filings)
+                retrieve_span.set(filter_source_files=",".join(source_files or []))
+
+                def vector_search(match_count):
+                    with span("embed.query", model="gemini-embedding-001", dimensions=1536):
+                        query_vector = get_sec_embeddings().embed_query(
+                            query,
+                            output_dimensionality=1536,
+                            task_type="RETRIEVAL_DOCUMENT")
+
+                    if self.local_sec is not None:
+                        with span("local_index.search", mode=self.local_sec.mode, match_count=match_count) as local_span:
+                            rows = self.local_sec.search(query_vector, k=match_count, allowed=source_file_predicate(source_files))
+                            local_span.set(result_count=len(rows))
+                        return rows
+
+                    params = {
+                        'query_embedding': query_vector,
+                        'similarity_threshold': 0.02,
+                        'match_count': match_count
+                    }
+                    rpc = 'vector_search'
+                    if source_files is not None:
+                        rpc = 'vector_search_filtered'
+                        params['filter_source_files'] = source_files
+
+                    with span("supabase.rpc", rpc=rpc, match_count=match_count) as rpc_span:
+                        response = get_supabase().rpc(rpc, params).execute()
+                        rpc_span.set(result_count=len(response.data))
+                    return response.data
+
+                on_error = on_error or self.on_error
+                results = hybrid_search(query, vector_search, self.bm25_sec, k=limit,
+                                        allowed=source_file_predicate(source_files), on_error=on_error)
+                if not results and source_files is not None:
+                    # The matching filings returned nothing; retry over every filing
+                    source_files = None
+                    results = hybrid_search(query, vector_search, self.bm25_sec, k=limit, on_error=on_error)
+                retrieve_span.set(result_count=len(results))
+                return results, "sec_reports"
+            except Exception as e:
+                retrieve_span.set(error=str(e))
+                (on_error or self.on_error)(f"Error searching SEC reports: {str(e)}")
+                return [], "sec_reports"
+
+    # Numeric lookups against the tables extracted from the SEC filings
+    def lookup_sec_facts(self, query, limit=8):
+        if self.fact_store is None:
+            return []
+        with span("retrieve.sec_facts", limit=limit) as fact_span:
+            try:
+                facts = self.fact_store.lookup(query, self.filings, limit=limit)
+            except Exception as e:
+                fact_span.set(error=str(e))
+                return []
+            fact_span.set(result_count=len(facts))
+            return facts
+
+    # Search financial and properties tables using SQL agent (Source 2)
+    def query_structured_data(self, query, on_error=None):
+        with span("retrieve.structured_data"):
+            try:
+                from agent_files.sql_agent import generate_sql_response
+                response = generate_sql_response(query)
+                return response, "structured_data"
+            except Exception as e:
+                (on_error or self.on_error)(f"Error querying structured data: {str(e)}")
+                return "Sorry, I couldn't process your query about financial/property data.", "structured_data"
+
+    # Determine intent by comparing the query embedding with per-source centroids.
+    # Returns the route decision and the query vector so press release search can reuse it.
+    def determine_intent(self, query):
+        with span("route") as route_span:
+            if self.router is not None:
+                try:
+                    with span("embed.query", model="text-embedding-004", purpose="routing"):
+                        query_vector = get_pr_embeddings().embed_query(query, task_type=ROUTER_TASK_TYPE)
+                    with span("route.classify"):
+                        decision = self.router.route(query_vector)
+                    route_span.set(method="embedding", sources=",".join(decision.sources), confidence=round(decision.confidence, 4))
+                    return decision, query_vector
+                except Exception as e:
+                    route_span.set(router_error=str(e))
+                    print(f"Embedding router failed, using keyword routing: {e}")
+            source = keyword_intent(query)
+            route_span.set(method="keyword", sources=source)
+            return RouteDecision([source], {source: 1.0}, 1.0), None
+
+    # Generate answer using LLM with context (for embedding-based sources)
+    def generate_answer(self, query, context, source_type, history=""):
+        prompt = ANSWER_PROMPT.format(source_type=source_type, context=context, query=query, history=history)
+        with span("llm.answer", model=CHAT_MODEL, context_chars=len(context)) as llm_span:
+            try:
+                response = get_llm().invoke(prompt)
+                record_llm_usage(llm_span, prompt, response)
+                return response.content
+            except Exception as e:
+                llm_span.set(error=str(e))
+                return f"Sorry, I encountered an error generating the answer: {str(e)}"
+
+    def answer(self, query, history=""):
+        """Route `query`, gather context from the chosen source(s) and answer it."""
+        decision, query_vector = self.determine_intent(query)
+        intent = ", ".join(decision.sources)
+
+        if len(decision.sources) == 1 and decision.sources[0] == "press_releases":
+            results, _ = self.search_press_releases(query, query_vector=query_vector)
+            if not results:
+                return TurnResult("No relevant press releases found.", "Press Releases (no results)", intent, decision, query_vector)
+            context = "\n\n".join([r['content'] for r in results])
+            source_info = f"Press Releases ({len(results)} articles)"
+            return TurnResult(self.generate_answer(query, context, source_info, history), source_info, intent, decision, query_vector)
+
+        if len(decision.sources) == 1 and decision.sources[0] == "sec_reports":
+            # "How much liquidity at the end of Q2 2024?" is a table lookup, not a 10-chunk RAG prompt
+            facts = self.lookup_sec_facts(query) if is_numeric_question(query) else []
+            if facts:
+                context = "\n".join(format_fact(f) for f in facts)
+                source_info = f"SEC Financial Tables ({len(facts)} facts)"
+                return TurnResult(self.generate_answer(query, context, source_info, history), source_info, intent, decision, query_vector)
+
+            results, _ = self.search_sec_reports(query)
+            if not results:
+                return TurnResult("No relevant SEC reports found.", "SEC Reports (no results)", intent, decision, query_vector)
+            context = format_sec_context(results)
+            source_info = f"SEC Reports ({len(results)} documents)"
+            return TurnResult(self.generate_answer(query, context, source_info, history), source_info, intent, decision, query_vector)
+
+        if len(decision.sources) == 1:
+            answer, _ = self.query_structured_data(query)
+            return TurnResult(answer, "Structured Data (SQL Query)", intent, decision, query_vector)
+
+        # Low-confidence routing: query every candidate source at once, so the
+        # fallback costs the slowest round-trip rather than their sum. Errors are
+        # collected and reported from this thread (st.error only works here).
+        errors = []
+        searches = {
+            "press_releases": lambda: self.search_press_releases(query, query_vector=query_vector, on_error=errors.append),
+            "sec_reports": lambda: self.search_sec_reports(query, on_error=errors.append),
+            "structured_data": lambda: self.query_structured_data(query, on_error=errors.append),
+        }
+        # Each task runs in a copy of this context so its spans nest under the turn's trace
+        futures = {
+            source: _source_executor.submit(contextvars.copy_context().run, searches[source])
+            for source in decision.sources if source in searches
+        }
+        found = {source: future.result()[0] for source, future in futures.items()}
+        for message in errors:
+            self.on_error(message)
+
+        contexts, labels = [], []
+        if found.get("press_releases"):
+            results = found["press_releases"]
+            contexts.append("\n\n".join([r['content'] for r in results]))
+            labels.append(f"Press Releases ({len(results)} articles)")
+        if found.get("sec_reports"):
+            results = found["sec_reports"]
+            contexts.append(format_sec_context(results))
+            labels.append(f"SEC Reports ({len(results)} documents)")
+        if "structured_data" in found:
+            contexts.append(found["structured_data"])
+            labels.append("Structured Data (SQL Query)")
+
+        source_info = " + ".join(labels) if labels else "No results"
+        if not contexts:
+            return TurnResult("No relevant information found in any data source.", source_info, intent, decision, query_vector)
+        return TurnResult(self.generate_answer(query, "\n\n".join(contexts), source_info, history), source_info, intent, decision, query_vector)
+
+
+def format_sec_context(results):
+    # Label each chunk with its filing and section so the model can tell a 10-Q's MD&A from a 10-K's risk factors
+    blocks = []
+    for r in results:
+        label = " | ".join(p for p in (r.get('source_file'), r.get('section')) if p)
+        blocks.append(f"[{label}]\n{r['content']}" if label else r['content'])
+    return "\n\n".join(blocks)
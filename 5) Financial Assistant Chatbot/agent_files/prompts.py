@@ -0,0 +1,42 @@
+# Prompt templates shared by the Streamlit app and the offline tools
+
+# Answer prompt for the embedding-based sources (SEC reports, press releases).
+# {history} is the bounded conversation block from ConversationMemory.render(), or "".
+ANSWER_PROMPT = """
+    You are a helpful financial assistant for Prologis. Answer the user's question based on the provided context.
+    {history}
+    Context from {source_type}:
+    {context}
+    
+    User Question: {query}
+    
+    Provide a clear, concise answer in plain English. If the information isn't available in the context, say so.
+    """
+
+# Folds turns that slid out of the verbatim window into the running summary
+SUMMARY_PROMPT = """
+    You maintain a running summary of a conversation between a user and a financial assistant about Prologis.
+
+    Current summary:
+    {summary}
+
+    New turns to fold in:
+    {turns}
+
+    Write the updated summary in at most {max_words} words. Keep the companies, metrics, periods, figures and
+    conclusions discussed; drop pleasantries and wording. Return only the summary.
+    """
+
+# Turns a follow-up ("and in 2022?") into a question that can be searched on its own
+REWRITE_PROMPT = """
+    Rewrite the user's latest question so it can be understood without the conversation, for searching
+    Prologis SEC filings, press releases and financial tables. Resolve pronouns and implied subjects,
+    metrics and periods from the conversation. If it is already standalone, return it unchanged.
+
+    Conversation:
+    {history}
+
+    Latest question: {question}
+
+    Return only the rewritten question.
+    """
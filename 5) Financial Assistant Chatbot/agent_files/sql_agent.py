@@ -1,27 +1,17 @@
 import re
-import os
+from agent_files.clients import get_llm, CHAT_MODEL
 from agent_files.txt_to_sql import generate_sql_from_prompt
+from agent_files.tracing import span, record_llm_usage
 from db.supabase_db_connector import run_sql_query
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 
 # Load environment
 load_dotenv()
 
-# Initialize LLM for formatting
-def _init_llm():
-    return ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash",
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
-        temperature=0.1
-    )
-
-
 def generate_sql_response(user_question: str) -> str:
     try:
         # Step 1: Generate SQL
         raw_sql = generate_sql_from_prompt(user_question)
-        print("Generated raw SQL:\n", raw_sql)
 
         # Clean code fences if present
         # Remove ```sql and ``` markers
@@ -38,7 +28,12 @@ def generate_sql_response(user_question: str) -> str:
             return "Sorry, I couldn't generate a valid SQL query for your question."
 
         # Step 2: Execute SQL
-        results = run_sql_query(sql)
+        with span("sql.execute", sql=sql) as sql_span:
+            results = run_sql_query(sql)
+            if isinstance(results, dict) and "error" in results:
+                sql_span.set(error=results["error"])
+            else:
+                sql_span.set(row_count=len(results))
         if isinstance(results, dict) and "error" in results:
             return f"Database error occurred: {results['error']}"
         if not results:
@@ -46,7 +41,8 @@ def generate_sql_response(user_question: str) -> str:
 
         # Step 3: Format results into plain English
         rows_as_text = "\n".join([str(row) for row in results])
-        llm = _init_llm()
+        # Same pooled client as the SQL generation step
+        llm = get_llm()
         formatting_prompt = f"""
         You are a helpful AI financial assistant. Answer the user's question based on the SQL results below.
 
@@ -57,7 +53,9 @@ def generate_sql_response(user_question: str) -> str:
 
         Provide a clear, concise answer in plain English (2–4 sentences). Do not mention SQL or technical details.
         """
-        response = llm.invoke(formatting_prompt)
+        with span("llm.format_sql_answer", model=CHAT_MODEL, row_count=len(results)) as llm_span:
+            response = llm.invoke(formatting_prompt)
+            record_llm_usage(llm_span, formatting_prompt, response)
         return response.content.strip()
 
     except Exception as e:
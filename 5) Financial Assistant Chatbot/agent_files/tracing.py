@@ -0,0 +1,152 @@
+import os
+import json
+import math
+import time
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Finished traces are appended here, one OTLP/JSON ExportTraceServiceRequest per
+# line (the OpenTelemetry collector file exporter format). Set to "" to disable.
+TRACE_EXPORT_PATH = os.getenv(
+    "TRACE_EXPORT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "traces", "spans.jsonl"),
+)
+# Once the file passes this size it is rotated to spans.jsonl.1 (replacing the previous
+# rotation), so at most two files' worth of traces are kept. 0 disables rotation.
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(50 * 2**20)))
+SERVICE_NAME = "prologis-financial-chatbot"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    """Rough Gemini token count (about four characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+class Span:
+    """One timed stage of a chat turn, with free-form attributes."""
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        # Every span in a trace shares the root's list, so the root sees the whole waterfall
+        self.trace_spans = parent.trace_spans if parent else []
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    @property
+    def duration_ms(self):
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "start_ms": (self.start_ns - self.trace_spans[0].start_ns) / 1e6 if self.trace_spans else 0.0,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _export(spans):
+    if not TRACE_EXPORT_PATH:
+        return
+    payload = {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "agent_files.tracing"}, "spans": [s.to_otlp() for s in spans]}],
+        }]
+    }
+    try:
+        directory = os.path.dirname(TRACE_EXPORT_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _export_lock:
+            if TRACE_MAX_BYTES and os.path.exists(TRACE_EXPORT_PATH) and os.path.getsize(TRACE_EXPORT_PATH) >= TRACE_MAX_BYTES:
+                os.replace(TRACE_EXPORT_PATH, TRACE_EXPORT_PATH + ".1")
+            with open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload) + "\n")
+    except OSError as e:
+        print(f"Could not export trace: {e}")
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a pipeline stage. Spans nest through a context variable; the outermost
+    span starts a new trace and exports it when it ends.
+    """
+    parent = _current_span.get()
+    current = Span(name, parent, attributes)
+    current.trace_spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if parent is None:
+            _export(current.trace_spans)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def annotate(**attributes):
+    """Add attributes to the active span, if any."""
+    active = _current_span.get()
+    if active is not None:
+        active.set(**attributes)
+
+
+def record_llm_usage(target, prompt, response):
+    """Attach prompt/response token counts to a span, preferring the model's own usage numbers."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    target.set(
+        prompt_tokens=usage.get("input_tokens", estimate_tokens(prompt)),
+        completion_tokens=usage.get("output_tokens", estimate_tokens(getattr(response, "content", "") or "")),
+    )
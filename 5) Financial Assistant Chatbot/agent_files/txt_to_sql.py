@@ -1,67 +1,71 @@
-import os
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
+from agent_files.clients import get_llm, CHAT_MODEL
+from agent_files.tracing import span, record_llm_usage
 
 load_dotenv()
 
-def generate_sql_from_prompt(user_question: str) -> str:
-    """
-    Convert a plain-English question into a raw PostgreSQL SQL query using Google Generative AI.
-    """
-    try:
-        # Use the same API key you're already using for embeddings
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            temperature=0.1
+# The schema and example never change, so the prompt is built once and only the
+# question is filled in per request (also keeps the prefix identical for Gemini's
+# implicit prompt caching)
+SQL_PROMPT = """
+        You are a PostgreSQL expert. Generate ONLY the raw SQL (no explanation or markdown).
+
+        Schema public.properties(
+        id BIGINT,
+        Property_id BIGINT,
+        Property_Name TEXT,
+        Property_Address TEXT,
+        Metro_Area TEXT,
+        "Square_Foot (SF)" NUMERIC,
+        Property_Type TEXT
         )
 
-        prompt = f"""
-            You are a PostgreSQL expert. Generate ONLY the raw SQL (no explanation or markdown).
+        Schema public.financials(
+        id BIGINT,
+        Property_id BIGINT,
+        Year BIGINT,
+        Revenue NUMERIC,
+        "Net_Income ($)" NUMERIC
+        )
 
-            Schema public.properties(
-            id BIGINT,
-            Property_id BIGINT,
-            Property_Name TEXT,
-            Property_Address TEXT,
-            Metro_Area TEXT,
-            "Square_Foot (SF)" NUMERIC,
-            Property_Type TEXT
-            )
+        IMPORTANT: Always use double quotes around column names with spaces or special characters:
+        - "Square_Foot (SF)" 
+        - "Net_Income ($)"
 
-            Schema public.financials(
-            id BIGINT,
-            Property_id BIGINT,
-            Year BIGINT,
-            Revenue NUMERIC,
-            "Net_Income ($)" NUMERIC
-            )
+        Example:
+        -- question: List the top 5 properties by revenue in 2023
+        SELECT p."Property_Name", f."Revenue"
+        FROM public.properties AS p
+        JOIN public.financials AS f
+            ON p."Property_id" = f."Property_id"
+        WHERE f."Year" = 2023
+        ORDER BY f."Revenue" DESC
+        LIMIT 5;
 
-            IMPORTANT: Always use double quotes around column names with spaces or special characters:
-            - "Square_Foot (SF)" 
-            - "Net_Income ($)"
+        Now, generate SQL for the following question.
+        -- question: {user_question}
+        -- SQL:
+        """
 
-            Example:
-            -- question: List the top 5 properties by revenue in 2023
-            SELECT p."Property_Name", f."Revenue"
-            FROM public.properties AS p
-            JOIN public.financials AS f
-                ON p."Property_id" = f."Property_id"
-            WHERE f."Year" = 2023
-            ORDER BY f."Revenue" DESC
-            LIMIT 5;
 
-            Now, generate SQL for the following question.
-            -- question: {user_question}
-            -- SQL:
-            """
+def generate_sql_from_prompt(user_question: str) -> str:
+    """
+    Convert a plain-English question into a raw PostgreSQL SQL query using Google Generative AI.
+    """
+    try:
+        # Pooled chat client (gemini-1.5-flash, temperature 0.1), shared by every module and thread
+        llm = get_llm()
+
+        prompt = SQL_PROMPT.format(user_question=user_question)
 
-        response = llm.invoke(prompt)
-        sql = response.content.strip()
-        # print("🔍 [DEBUG] Generated SQL:", sql)
+        with span("llm.generate_sql", model=CHAT_MODEL) as llm_span:
+            response = llm.invoke(prompt)
+            record_llm_usage(llm_span, prompt, response)
+            sql = response.content.strip()
+            llm_span.set(sql=sql)
         return sql
 
     except Exception as e:
         err = f"-- ERROR: {str(e)}"
-        print("🔍 [DEBUG] SQL generation error:", err)
+        print("SQL generation error:", err)
         return err
\ No newline at end of file
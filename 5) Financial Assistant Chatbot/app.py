@@ -8,167 +8,57 @@ except RuntimeError:
 import streamlit as st
 import os
 from dotenv import load_dotenv
-from supabase import create_client
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-# from google.oauth2 import service_account
-# import vertexai
 
-# Import the SQL agent
-from agent_files.sql_agent import generate_sql_response
+# Heavy client libraries (supabase, langchain, the SQL agent) are imported on first use
+from agent_files.clients import registry
+from agent_files.conversation_memory import ConversationMemory
+from agent_files.pipeline import ChatPipeline
+from agent_files.tracing import span
 
 load_dotenv()
 
 print("Starting Prologis Financial Assistant Chatbot Project....")
 
-@st.cache_resource
-def init_clients():
-    sb = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-
-    # # Load credentials explicitly
-    # credentials = service_account.Credentials.from_service_account_file(
-    #     os.getenv("GOOGLE_APPLICATION_CREDENTIALS"),
-    #     scopes=['https://www.googleapis.com/auth/cloud-platform']
-    # )
-    
-    # # Initialize Vertex AI with explicit credentials
-    # vertexai.init(
-    #     project="ai-financial-agent-467005",
-    #     location="us-central1", 
-    #     credentials=credentials
-    # )
-
-    # 768-dim for press releases
-    emb_pr = GoogleGenerativeAIEmbeddings(
-        model="models/text-embedding-004",
-        google_api_key=os.getenv("GOOGLE_API_KEY")
-    )
-    # 1536-dim for SEC reports
-    emb_sec = GoogleGenerativeAIEmbeddings(
-        model="gemini-embedding-001",
-        google_api_key=os.getenv("GOOGLE_API_KEY")
-    )
-
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash",
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
-        temperature=0.1
-    )
-
-    return sb, emb_pr, emb_sec, llm
-
-sb, emb_pr, emb_sec, llm = init_clients()
-
-# Search press releases (Source 3) in TOP 4 PAGES
-# def search_press_releases(query, limit=15):
-#     try:
-#         query_vector = emb_pr.embed_query(
-#             query,
-#             task_type="RETRIEVAL_DOCUMENT"
-#         )
-#         # Debug statement
-#         # print(f"[DEBUG] Query vector type={type(query_vector)}, length={len(query_vector)}")
-
-#         response = sb.rpc('search_press_releases', {       
-#             'query_embedding': query_vector,
-#             'similarity_threshold': 0.02,
-#             'match_count': limit
-#         }).execute()
-#         return response.data, "press_releases"
-#     except Exception as e:
-#         st.error(f"Error searching press releases: {str(e)}")
-#         return [], "press_releases"
+# Supabase, embedding and chat clients are built lazily on first use (and warmed up
+# in the background once the page has rendered), see agent_files/clients.py
 
-# Search in ALL PAGES
-
-def search_press_releases(query, limit=20):
-    try:
-        query_vector = emb_pr.embed_query(
-            query,
-            task_type="RETRIEVAL_DOCUMENT"
+# Routing, retrieval, SQL and answer generation live in agent_files/pipeline.py
+# (shared with batch_answer.py); its indexes and router are loaded once per process
+@st.cache_resource
+def init_pipeline():
+    return ChatPipeline.load(on_error=st.error)
+
+pipeline = init_pipeline()
+if pipeline.router is None:
+    st.warning("Router centroids not found: intent routing is using keyword matching. "
+               "Run `python build_router_centroids.py` to enable embedding-based routing.")
+
+# Draw the spans of one turn as a waterfall (bar per stage, offset by its start time)
+def render_trace_waterfall(spans):
+    import altair as alt
+    import pandas as pd
+
+    with st.expander("Pipeline trace (latest turn)", expanded=True):
+        rows = []
+        for s in spans:
+            attrs = ", ".join(f"{k}={v}" for k, v in s["attributes"].items())
+            rows.append({
+                "stage": s["name"],
+                "start_ms": round(s["start_ms"], 1),
+                "end_ms": round(s["start_ms"] + s["duration_ms"], 1),
+                "duration_ms": round(s["duration_ms"], 1),
+                "details": attrs + (f" error={s['error']}" if s["error"] else ""),
+            })
+        df = pd.DataFrame(rows)
+        df["order"] = range(len(df))
+        chart = alt.Chart(df).mark_bar().encode(
+            x=alt.X("start_ms:Q", title="ms since turn start"),
+            x2="end_ms:Q",
+            y=alt.Y("stage:N", sort=alt.SortField("order"), title=None),
+            tooltip=["stage", "duration_ms", "details"],
         )
-
-        response = sb.rpc("search_all_press_releases",{
-            "query_embedding": query_vector,
-            "similarity_threshold": 0.02,
-            "match_count": limit
-            }).execute()
-        return response.data, "press_releases"
-    except Exception as e:
-        st.error(f"Error searching press releases: {str(e)}")
-        return [], "press_releases"
-
-
-# Search SEC reports (Source 1)
-def search_sec_reports(query, limit=10):
-    try:
-        query_vector = emb_sec.embed_query(
-            query,
-            output_dimensionality=1536,
-            task_type="RETRIEVAL_DOCUMENT")
-
-        response = sb.rpc('vector_search', {
-            'query_embedding': query_vector,
-            'similarity_threshold': 0.02,   
-            'match_count': limit
-        }).execute()
-        # Debug statement
-        print(f"[DEBUG] Query vector type={type(query_vector)}, length={len(query_vector)}")
-
-        return response.data, "sec_reports"
-    except Exception as e:
-        st.error(f"Error searching SEC reports: {str(e)}")
-        return [], "sec_reports"
-
-
-# Search financial and properties tables using SQL agent (Source 2)
-def query_structured_data(query):
-    try:
-        # Use your SQL agent to handle the query
-        response = generate_sql_response(query)
-        return response, "structured_data"
-    except Exception as e:
-        st.error(f"Error querying structured data: {str(e)}")
-        return "Sorry, I couldn't process your query about financial/property data.", "structured_data"
-
-# Determine intent based on keywords
-def determine_intent(query):
-    query_lower = query.lower()
-    
-    # Keywords for each data source
-    press_keywords = ['dividend', 'earnings', 'quarter', 'announcement', 'press', 'news', 'declared']
-    sec_keywords = ['filing', 'sec', 'annual', 'report', '10-k', '10-q', 'compliance', 'risk']
-    financial_keywords = ['revenue', 'profit', 'assets', 'properties', 'property', 'financial', 'income', 'square', 'metro', 'address']
-    
-    # Score each source
-    press_score = sum(1 for keyword in press_keywords if keyword in query_lower)
-    sec_score = sum(1 for keyword in sec_keywords if keyword in query_lower)
-    financial_score = sum(1 for keyword in financial_keywords if keyword in query_lower)
-    
-    # Return primary intent
-    if press_score >= sec_score and press_score >= financial_score:
-        return "press_releases"
-    elif sec_score >= financial_score:
-        return "sec_reports"
-    else:
-        return "structured_data"
-
-# Generate answer using LLM with context (for embedding-based sources)
-def generate_answer(query, context, source_type):
-    prompt = f"""
-    You are a helpful financial assistant for Prologis. Answer the user's question based on the provided context.
-    
-    Context from {source_type}:
-    {context}
-    
-    User Question: {query}
-    
-    Provide a clear, concise answer in plain English. If the information isn't available in the context, say so.
-    """
-    try:
-        response = llm.invoke(prompt)
-        return response.content
-    except Exception as e:
-        return f"Sorry, I encountered an error generating the answer: {str(e)}"
+        st.altair_chart(chart, use_container_width=True)
+        st.dataframe(df.drop(columns=["order"]), use_container_width=True, hide_index=True)
 
 # Streamlit UI 
 st.set_page_config(
@@ -205,10 +95,18 @@ with st.sidebar:
     - Embedded and searchable
     """)
     st.markdown("---")
+    show_trace = st.checkbox("Show pipeline trace", help="Per-stage timings for the latest answer")
+
+# The page is on screen now; build the clients in the background before the first question
+if os.getenv("CLIENT_WARMUP", "1") != "0":
+    registry.warm_up()
 
 # Main chat interface
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# Last few turns verbatim plus a rolling summary of the rest, see agent_files/conversation_memory.py
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory()
 
 # Display chat history
 for message in st.session_state.messages:
@@ -223,48 +121,39 @@ if prompt := st.chat_input("Ask about Prologis financials..."):
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Process the query
-    with st.chat_message("assistant"):
-        with st.spinner("Analyzing your question..."):
-            # Determine intent
-            intent = determine_intent(prompt)
-            answer = ""
-            source_info = ""
-
-            if intent == "press_releases":
-                results, source = search_press_releases(prompt)
-                if results:
-                    context = "\n\n".join([r['content'] for r in results])
-                    source_info = f"Press Releases ({len(results)} articles)"
-                    answer = generate_answer(prompt, context, source_info)
-                else:
-                    answer = "No relevant press releases found."
-                    source_info = "Press Releases (no results)"
-
-            elif intent == "sec_reports":
-                results, source = search_sec_reports(prompt)
-                if results:
-                    context = "\n\n".join([r['content'] for r in results])
-                    source_info = f"SEC Reports ({len(results)} documents)"
-                    answer = generate_answer(prompt, context, source_info)
-                else:
-                    answer = "No relevant SEC reports found."
-                    source_info = "SEC Reports (no results)"
-
-            else:
-                answer, source = query_structured_data(prompt)
-                source_info = "Structured Data (SQL Query)"
-
-            st.markdown(answer)
-            st.caption(f"**Intent:** {intent}")
+    # Process the query; the whole turn is one trace
+    with span("chat_turn", question_chars=len(prompt)) as turn_span:
+        with st.chat_message("assistant"):
+            with st.spinner("Analyzing your question..."):
+                # Resolve follow-ups ("and in 2022?") into a standalone question before routing
+                memory = st.session_state.memory
+                history = memory.render()
+                query = memory.rewrite(prompt)
+
+                result = pipeline.answer(query, history)
+                answer, source_info, intent, decision = result.answer, result.source_info, result.intent, result.decision
+
+                st.markdown(answer)
+                st.caption(f"**Intent:** {intent} (confidence {decision.confidence:.2f})")
+                if query != prompt:
+                    st.caption(f"Searched as: {query}")
+                # Fold older turns into the summary in the background, after the answer is shown
+                memory.add_turn(prompt, answer)
             
-            # Add to session state
-            st.session_state.messages.append({
-                "role": "assistant", 
-                "content": answer,
-                "source": source_info,
-                "intent": intent
-            })
+                # Add to session state
+                st.session_state.messages.append({
+                    "role": "assistant", 
+                    "content": answer,
+                    "source": source_info,
+                    "intent": intent
+                })
+        turn_span.set(intent=intent, answer_chars=len(answer))
+    st.session_state.last_trace = [s.to_dict() for s in turn_span.trace_spans]
+
+
+# Debug panel: waterfall of the spans recorded for the latest turn
+if show_trace and st.session_state.get("last_trace"):
+    render_trace_waterfall(st.session_state.last_trace)
 
 # Only for Google CLoud Run deployment
 # import os
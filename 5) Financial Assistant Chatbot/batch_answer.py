@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+from agent_files.clients import RETRIEVAL_CONCURRENCY
+from agent_files.pipeline import ChatPipeline
+from agent_files.tracing import span
+from benchmarks.question_set import load_questions
+
+# Answer a whole question list through the same routing, retrieval, SQL and
+# answer pipeline as the chatbot, several questions at a time. Writes one JSON
+# line per question (answer, route, per-stage timings) as each one finishes.
+# Usage:
+#   python batch_answer.py questions.txt --out answers.jsonl [--concurrency 8] [--resume]
+# The input is either questions.txt's "SOURCE n: / a) ..." layout or one question per line.
+load_dotenv()
+
+DEFAULT_CONCURRENCY = 8
+
+
+def read_questions(path):
+    """Return [(question, expected_source or None)]."""
+    labeled = load_questions(path)
+    if labeled:
+        return labeled
+    with open(path, "r", encoding="utf-8") as f:
+        return [(line.strip(), None) for line in f if line.strip() and not line.startswith("#")]
+
+
+def question_id(question):
+    """Stable key of a question for --resume, independent of its position in the file."""
+    return hashlib.sha1(" ".join(question.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def finished_ids(path):
+    """Questions with an answer in an earlier run's output; failed ones are retried."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short when the last run was killed
+            if "error" not in record:
+                done.add(record.get("question_id") or question_id(record["question"]))
+    return done
+
+
+def _stage_timings(root):
+    """Milliseconds per pipeline stage of one question, summed over repeated stages."""
+    timings = {}
+    for s in root.trace_spans:
+        if s is root:
+            continue
+        d = s.to_dict()
+        timings[d["name"]] = round(timings.get(d["name"], 0.0) + d["duration_ms"], 1)
+    return timings
+
+
+def _init_worker():
+    # gRPC asyncio clients need an event loop in every thread that calls them
+    try:
+        asyncio.get_event_loop()
+    except RuntimeError:
+        asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+def answer_one(pipeline, index, question, expected):
+    start = time.perf_counter()
+    record = {"index": index, "question_id": question_id(question), "question": question, "expected_source": expected}
+    with span("batch.question", index=index) as root:
+        try:
+            result = pipeline.answer(question)
+            record.update(
+                answer=result.answer,
+                intent=result.intent,
+                confidence=round(result.decision.confidence, 4),
+                source_info=result.source_info,
+            )
+        except Exception as e:
+            root.set(error=str(e))
+            record["error"] = f"{type(e).__name__}: {e}"
+    record["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    record["timings_ms"] = _stage_timings(root)
+    return record
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch question answering")
+    parser.add_argument("questions", nargs="?", default="questions.txt")
+    parser.add_argument("--out", default="answers.jsonl")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--resume", action="store_true", help="skip questions already answered in --out")
+    args = parser.parse_args()
+
+    questions = read_questions(args.questions)
+    done = finished_ids(args.out) if args.resume else set()
+    todo = [(i, q, src) for i, (q, src) in enumerate(questions) if question_id(q) not in done]
+    print(f"{len(questions)} questions, {len(todo)} to answer, concurrency {args.concurrency}")
+    if args.concurrency * 3 > RETRIEVAL_CONCURRENCY:
+        print(f"Warning: RETRIEVAL_CONCURRENCY={RETRIEVAL_CONCURRENCY} is below 3x --concurrency; "
+              f"retrieval calls will queue behind each other")
+
+    pipeline = ChatPipeline.load()
+    latencies = []
+    errors = 0
+
+    wall_start = time.perf_counter()
+    with open(args.out, "a" if args.resume else "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=args.concurrency, initializer=_init_worker) as pool:
+        futures = [pool.submit(answer_one, pipeline, i, q, src) for i, q, src in todo]
+        for n, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            latencies.append(record["latency_ms"])
+            errors += "error" in record
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"[{n}/{len(todo)}] {record['latency_ms'] / 1000:.1f}s  {record['question'][:70]}")
+    wall_ms = (time.perf_counter() - wall_start) * 1000
+
+    if latencies:
+        summary = {
+            "questions": len(latencies),
+            "errors": errors,
+            "wall_s": round(wall_ms / 1000, 1),
+            # What the same questions cost one after another
+            "sequential_s": round(sum(latencies) / 1000, 1),
+            "speedup": round(sum(latencies) / wall_ms, 2),
+            "p50_ms": _percentile(latencies, 0.5),
+            "p95_ms": _percentile(latencies, 0.95),
+        }
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion.sec_chunker import MAX_TOKENS, chunk_pages, chunk_pdf, default_token_counter
+
+# Compares the old per-page RecursiveCharacterTextSplitter(1000, 200) with the
+# section-aware streaming chunker on real filings: chunk count, tokens sent to
+# the embedder, chunks without a section, and peak Python heap while chunking.
+# Synthetic pages that once broke the chunker are checked first on every run.
+# Usage: python benchmarks/chunking.py [data/prologis_10K_2024.pdf ...]
+
+# (name, pages) regression cases
+REGRESSION_PAGES = [
+    # A whitespace-free run longer than MAX_TOKENS used to recurse until RecursionError
+    ("unbroken_run", [(1, "Intro text here. " + "A" * 20000)]),
+    ("long_url", [(1, "See https://www.sec.gov/" + "x1/" * 3000 + " for details.")]),
+]
+
+
+def legacy_chunks(path):
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = []
+    for doc in PyPDFLoader(path).load():
+        for chunk in splitter.split_documents([doc]):
+            text = chunk.page_content.replace("\x00", " ").strip()
+            if text:
+                chunks.append({"content": text, "section": None})
+    return chunks
+
+
+def measure(make_chunks, count_tokens):
+    tracemalloc.start()
+    chunks = 0
+    tokens = 0
+    unsectioned = 0
+    # Consume lazily so a streaming chunker is not charged for the list
+    for chunk in make_chunks():
+        chunks += 1
+        tokens += count_tokens(chunk["content"])
+        unsectioned += chunk["section"] is None
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "chunks": chunks,
+        "embedded_tokens": tokens,
+        "avg_tokens": round(tokens / chunks, 1) if chunks else 0,
+        "without_section": unsectioned,
+        "peak_heap_mb": round(peak / 2**20, 2),
+    }
+
+
+def check_regressions(count_tokens):
+    results = {}
+    for name, pages in REGRESSION_PAGES:
+        chunks = list(chunk_pages(pages, f"{name}.pdf", count_tokens=count_tokens))
+        longest = max((count_tokens(c["content"]) for c in chunks), default=0)
+        assert chunks and longest <= MAX_TOKENS, f"{name}: longest chunk has {longest} tokens"
+        results[name] = {"chunks": len(chunks), "max_tokens": longest}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    count_tokens = default_token_counter()
+    report = {"regressions": check_regressions(count_tokens)}
+    for path in args.pdfs:
+        report[os.path.basename(path)] = {
+            "legacy": measure(lambda: legacy_chunks(path), count_tokens),
+            "sectioned": measure(lambda: chunk_pdf(path, count_tokens=count_tokens), count_tokens),
+        }
+
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start benchmark for the Streamlit app. Each measurement runs in a fresh
+# interpreter so nothing is already imported:
+#   * import cost (python -X importtime) of the modules app.py pulls in, versus
+#     the client libraries it now defers;
+#   * time-to-first-render: one full script run through streamlit's AppTest with
+#     background warm-up disabled;
+#   * time to build each lazily registered client on first use.
+# Usage: python benchmarks/cold_start.py [--out cold_start.json]
+
+APP_IMPORTS = [
+    "streamlit",
+    "agent_files.clients",
+    "agent_files.pipeline",
+    "agent_files.intent_router",
+    "retrieval.hybrid_search",
+    "retrieval.query_filters",
+]
+DEFERRED_IMPORTS = [
+    "supabase",
+    "langchain_google_genai",
+    "agent_files.sql_agent",
+]
+
+FIRST_RENDER_SNIPPET = """
+import time, json
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+print(json.dumps({"first_render_ms": (time.perf_counter() - start) * 1000, "exceptions": [str(e.value) for e in at.exception]}))
+"""
+
+CLIENT_BUILD_SNIPPET = """
+import time, json
+from agent_files.clients import registry
+timings = {}
+for name in ("supabase", "emb_pr", "emb_sec", "llm"):
+    start = time.perf_counter()
+    try:
+        registry.get(name)
+        timings[name] = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        timings[name] = f"failed: {e}"
+print(json.dumps(timings))
+"""
+
+
+def _run(args, env=None):
+    return subprocess.run(
+        [sys.executable, *args], cwd=PROJECT_DIR, capture_output=True, text=True,
+        env={**os.environ, **(env or {})},
+    )
+
+
+def import_time_ms(module):
+    """Cumulative import time of `module` in a fresh interpreter, from -X importtime."""
+    result = _run(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        return None
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def _json_output(result):
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {"error": (result.stderr or result.stdout).strip().splitlines()[-1:] or "no output"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--skip-render", action="store_true", help="only measure import times")
+    args = parser.parse_args()
+
+    report = {
+        "import_ms": {m: import_time_ms(m) for m in APP_IMPORTS},
+        "deferred_import_ms": {m: import_time_ms(m) for m in DEFERRED_IMPORTS},
+    }
+    if not args.skip_render:
+        report["first_render"] = _json_output(_run(["-c", FIRST_RENDER_SNIPPET], env={"CLIENT_WARMUP": "0", "TRACE_EXPORT_PATH": ""}))
+        report["client_build_ms"] = _json_output(_run(["-c", CLIENT_BUILD_SNIPPET]))
+
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import operator
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_files.prompts import ANSWER_PROMPT
+from agent_files.tracing import estimate_tokens
+from retrieval.bm25_index import BM25Index
+from retrieval.hybrid_search import fuse
+from retrieval.query_filters import (
+    available_filings, parse_query_filters, press_release_window, published_predicate,
+    sec_source_files, source_file_predicate,
+)
+from benchmarks.local_embedder import HashingEmbedder
+
+# Offline retrieval quality and latency benchmark for the financial chatbot.
+#
+# Runs the labeled questions in labeled_questions.json against a fixture corpus
+# (fixtures/sample_corpus.jsonl is a small synthetic sample; record_fixtures.py
+# replaces it with rows recorded from Supabase) using either the deterministic
+# HashingEmbedder or recorded Gemini vectors. No network access unless --llm live.
+#
+# Usage: python benchmarks/harness.py [--mode hybrid] [--k 5] [--out results.json]
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+LABELS_PATH = os.path.join(BENCH_DIR, "labeled_questions.json")
+CORPUS_PATH = os.path.join(BENCH_DIR, "fixtures", "sample_corpus.jsonl")
+
+SOURCE_LABELS = {"sec_reports": "SEC Reports", "press_releases": "Press Releases"}
+
+
+def chunk_id(row):
+    if row.get("source_file"):
+        return f"{row['source_file']}#{row.get('page')}#{row.get('chunk_index')}"
+    return f"{row.get('source_url')}#{row.get('chunk_index')}"
+
+
+def is_relevant(row, label):
+    if label.get("expected_chunks"):
+        return chunk_id(row) in label["expected_chunks"]
+    content = row.get("content", "").lower()
+    return any(kw in content for kw in label["keywords"])
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def load_corpus(path=CORPUS_PATH):
+    corpus = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                corpus[row.pop("source")].append(row)
+    return corpus
+
+
+class InMemoryVectorStore:
+    """Exact cosine search over fixture rows, standing in for the Supabase RPCs."""
+
+    def __init__(self, rows, vectors):
+        self.rows = rows
+        self.vectors = vectors
+
+    def search(self, query_vector, k, allowed=None):
+        norm = math.sqrt(sum(map(operator.mul, query_vector, query_vector))) or 1.0
+        scored = []
+        for row, vector in zip(self.rows, self.vectors):
+            if allowed is not None and not allowed(row):
+                continue
+            v_norm = math.sqrt(sum(map(operator.mul, vector, vector))) or 1.0
+            similarity = sum(map(operator.mul, query_vector, vector)) / (norm * v_norm)
+            scored.append({**row, "similarity": similarity})
+        scored.sort(key=lambda r: r["similarity"], reverse=True)
+        return scored[:k]
+
+
+class RecordedLLM:
+    """Returns a canned answer instantly so only retrieval and prompt size are measured."""
+
+    def invoke(self, prompt):
+        return type("Response", (), {"content": "(recorded answer)"})()
+
+
+def build_llm(kind):
+    if kind == "stub":
+        return RecordedLLM()
+    from agent_files.clients import get_llm
+    return get_llm()
+
+
+def run_benchmark(mode="hybrid", k=5, embedder="local", llm="stub", use_filters=True,
+                  labels_path=LABELS_PATH, corpus_path=CORPUS_PATH):
+    """Run every labeled question and return a JSON-serializable report."""
+    with open(labels_path, "r", encoding="utf-8") as f:
+        labels = json.load(f)
+    corpus = load_corpus(corpus_path)
+    filings = available_filings()
+    local = HashingEmbedder()
+    answer_llm = build_llm(llm)
+
+    stores, indexes = {}, {}
+    for source, rows in corpus.items():
+        if embedder == "recorded":
+            vectors = [row.pop("embedding") for row in rows]
+        else:
+            vectors = local.embed_documents([row["content"] for row in rows])
+        stores[source] = InMemoryVectorStore(rows, vectors)
+        indexes[source] = BM25Index.build(rows)
+
+    results = []
+    for label in labels:
+        source, query = label["source"], label["question"]
+        if source not in stores:
+            continue
+        timings = {}
+
+        allowed = None
+        if use_filters:
+            filters = parse_query_filters(query)
+            if source == "sec_reports":
+                allowed = source_file_predicate(sec_source_files(filters, filings))
+            else:
+                allowed = published_predicate(press_release_window(filters))
+
+        start = time.perf_counter()
+        if embedder == "recorded":
+            query_vector = label["query_embeddings"][source]
+        else:
+            query_vector = local.embed_query(query)
+        timings["embed"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vector_rows, lexical_rows = [], []
+        if mode in ("vector", "hybrid"):
+            vector_rows = stores[source].search(query_vector, 3 * k, allowed=allowed)
+        if mode in ("bm25", "hybrid"):
+            lexical_rows = [doc for doc, _ in indexes[source].search(query, k=3 * k, allowed=allowed)]
+        if mode == "hybrid":
+            rows = fuse([vector_rows, lexical_rows], k=k)
+        else:
+            rows = (vector_rows or lexical_rows)[:k]
+        timings["search"] = time.perf_counter() - start
+
+        context = "\n\n".join(r["content"] for r in rows)
+        prompt = ANSWER_PROMPT.format(source_type=f"{SOURCE_LABELS[source]} ({len(rows)} documents)", context=context, query=query, history="")
+        start = time.perf_counter()
+        answer_llm.invoke(prompt)
+        timings["llm"] = time.perf_counter() - start
+
+        ranks = [i + 1 for i, row in enumerate(rows) if is_relevant(row, label)]
+        expected = len(label.get("expected_chunks") or []) or 1
+        results.append({
+            "question": query,
+            "source": source,
+            "retrieved": [chunk_id(r) for r in rows],
+            "recall": min(len(ranks), expected) / expected,
+            "reciprocal_rank": 1.0 / ranks[0] if ranks else 0.0,
+            "tokens_sent": estimate_tokens(prompt),
+            "latency_ms": {stage: round(t * 1000, 3) for stage, t in timings.items()},
+        })
+
+    n = max(len(results), 1)
+    summary = {
+        f"recall@{k}": round(sum(r["recall"] for r in results) / n, 4),
+        "mrr": round(sum(r["reciprocal_rank"] for r in results) / n, 4),
+        "tokens_sent": {
+            "total": sum(r["tokens_sent"] for r in results),
+            "mean": round(sum(r["tokens_sent"] for r in results) / n, 1),
+        },
+        "latency_ms": {
+            stage: {
+                "p50": round(percentile([r["latency_ms"][stage] for r in results], 50), 3),
+                "p95": round(percentile([r["latency_ms"][stage] for r in results], 95), 3),
+            }
+            for stage in ("embed", "search", "llm")
+        },
+    }
+    return {
+        "config": {"mode": mode, "k": k, "embedder": embedder, "llm": llm, "filters": use_filters,
+                   "corpus": os.path.basename(corpus_path), "questions": len(results)},
+        "summary": summary,
+        "questions": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=("vector", "bm25", "hybrid"), default="hybrid")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--embedder", choices=("local", "recorded"), default="local")
+    parser.add_argument("--llm", choices=("stub", "live"), default="stub")
+    parser.add_argument("--no-filters", action="store_true", help="disable metadata pre-filtering")
+    parser.add_argument("--labels", default=LABELS_PATH)
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(mode=args.mode, k=args.k, embedder=args.embedder, llm=args.llm,
+                           use_filters=not args.no_filters, labels_path=args.labels, corpus_path=args.corpus)
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+        print(json.dumps(report["summary"], indent=2))
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.bm25_index import load_index
+from retrieval.hybrid_search import hybrid_search
+
+# Recall@k and latency of vector-only, BM25-only and hybrid retrieval on the
+# labeled questions.txt set. Needs the BM25 indexes and live Supabase/Gemini.
+# Usage: python benchmarks/hybrid_retrieval.py [--k 10]
+
+LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "labeled_questions.json")
+
+SOURCE_CONFIG = {
+    "sec_reports": {"rpc": "vector_search", "model": "gemini-embedding-001", "dims": 1536},
+    "press_releases": {"rpc": "search_all_press_releases", "model": "models/text-embedding-004", "dims": None},
+}
+
+
+def load_labels(path=LABELS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_relevant(row, label):
+    if label["source_files"] and row.get("source_file") not in label["source_files"]:
+        return False
+    content = row.get("content", "").lower()
+    return any(kw in content for kw in label["keywords"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from supabase import create_client
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    load_dotenv()
+    sb = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+    load_start = time.perf_counter()
+    indexes = {source: load_index(source) for source in SOURCE_CONFIG}
+    print(f"Loaded BM25 indexes in {(time.perf_counter() - load_start) * 1000:.1f}ms: "
+          + ", ".join(f"{s}={len(i) if i else 'missing'}" for s, i in indexes.items()))
+
+    embedders = {
+        source: GoogleGenerativeAIEmbeddings(model=cfg["model"], google_api_key=os.getenv("GOOGLE_API_KEY"))
+        for source, cfg in SOURCE_CONFIG.items()
+    }
+
+    stats = {mode: {"hits": 0, "latency": []} for mode in ("vector", "bm25", "hybrid")}
+    labels = [label for label in load_labels() if indexes[label["source"]] is not None]
+
+    for label in labels:
+        source, query = label["source"], label["question"]
+        cfg, index = SOURCE_CONFIG[source], indexes[source]
+
+        def vector_search(match_count):
+            kwargs = {"task_type": "RETRIEVAL_DOCUMENT"}
+            if cfg["dims"]:
+                kwargs["output_dimensionality"] = cfg["dims"]
+            vector = embedders[source].embed_query(query, **kwargs)
+            return sb.rpc(cfg["rpc"], {
+                "query_embedding": vector,
+                "similarity_threshold": 0.02,
+                "match_count": match_count,
+            }).execute().data
+
+        runs = {
+            "vector": lambda: vector_search(args.k),
+            "bm25": lambda: [doc for doc, _ in index.search(query, k=args.k)],
+            "hybrid": lambda: hybrid_search(query, vector_search, index, k=args.k),
+        }
+        for mode, run in runs.items():
+            start = time.perf_counter()
+            rows = run()
+            stats[mode]["latency"].append(time.perf_counter() - start)
+            stats[mode]["hits"] += any(is_relevant(row, label) for row in rows)
+
+    print(f"\n{len(labels)} questions, k={args.k}")
+    for mode, s in stats.items():
+        latency = sorted(s["latency"])
+        median = latency[len(latency) // 2] * 1000 if latency else 0.0
+        print(f"  {mode:<7} recall@{args.k} {s['hits'] / max(len(labels), 1):.2f}   median latency {median:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
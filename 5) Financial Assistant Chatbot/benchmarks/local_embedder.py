@@ -0,0 +1,34 @@
+import math
+import hashlib
+
+from retrieval.bm25_index import tokenize
+
+
+class HashingEmbedder:
+    """
+    Deterministic stand-in for GoogleGenerativeAIEmbeddings. Unigrams and
+    bigrams are hashed into a fixed number of signed buckets and the result is
+    L2-normalized, so identical text always gives identical vectors and
+    lexically similar text gives similar vectors. No network access.
+    """
+
+    def __init__(self, dims=768):
+        self.dims = dims
+
+    def _bucket(self, feature):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dims, (1.0 if value >> 63 else -1.0)
+
+    def embed_query(self, text, **kwargs):
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = [0.0] * self.dims
+        for feature in features:
+            idx, sign = self._bucket(feature)
+            vector[idx] += sign
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts, **kwargs):
+        return [self.embed_query(text) for text in texts]
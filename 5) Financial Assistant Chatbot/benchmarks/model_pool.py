@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_files.clients import CHAT_MODEL, CHAT_TEMPERATURE, ModelPool, _build_chat_llm
+
+# Per-question client overhead of the SQL route, before and after the shared
+# model pool. Before, generate_sql_from_prompt and generate_sql_response each
+# built their own ChatGoogleGenerativeAI, so every structured question paid for
+# two client constructions (and two fresh gRPC channels on the first call).
+#   * build: client setup cost per question, old path vs pooled lookups;
+#   * limit: N concurrent callers against a fake model with a per-model limit,
+#     reporting the peak number of calls in flight;
+#   * --live: with GOOGLE_API_KEY set, latency of the first call on a fresh
+#     client vs a call on the pooled, already-connected one.
+# Usage: python benchmarks/model_pool.py [--questions 50] [--live] [--out model_pool.json]
+
+CLIENTS_PER_QUESTION = 2  # SQL generation + answer formatting
+LIVE_PROMPT = "Reply with the single word: ok"
+
+
+def bench_build(questions):
+    # Pay the langchain / google imports before timing
+    _build_chat_llm(CHAT_MODEL, CHAT_TEMPERATURE)
+
+    start = time.perf_counter()
+    for _ in range(questions * CLIENTS_PER_QUESTION):
+        _build_chat_llm(CHAT_MODEL, CHAT_TEMPERATURE)
+    per_call_ms = (time.perf_counter() - start) * 1000 / questions
+
+    pool = ModelPool()
+    pool.get()
+    start = time.perf_counter()
+    for _ in range(questions * CLIENTS_PER_QUESTION):
+        pool.get()
+    pooled_ms = (time.perf_counter() - start) * 1000 / questions
+
+    return {
+        "per_question_ms_per_call_clients": round(per_call_ms, 3),
+        "per_question_ms_pooled": round(pooled_ms, 5),
+        "saved_ms_per_question": round(per_call_ms - pooled_ms, 3),
+    }
+
+
+class _SleepModel:
+    """Stands in for a chat client: each call takes `latency` seconds and counts calls in flight."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        return prompt
+
+
+def bench_limit(callers=32, limit=4, latency=0.05):
+    fakes = {}
+    pool = ModelPool(build=lambda model, temperature: fakes.setdefault(model, _SleepModel(latency)), limits=limit)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        # Two temperatures of one model share that model's slots
+        list(executor.map(lambda i: pool.get(CHAT_MODEL, 0.1 * (i % 2)).invoke(i), range(callers)))
+    return {
+        "callers": callers,
+        "limit": limit,
+        "clients_built": len(pool.keys()),
+        "peak_in_flight": fakes[CHAT_MODEL].peak,
+        "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def bench_live(calls=5):
+    if not os.getenv("GOOGLE_API_KEY"):
+        return {"skipped": "GOOGLE_API_KEY not set"}
+    fresh = []
+    for _ in range(calls):
+        llm = _build_chat_llm(CHAT_MODEL, CHAT_TEMPERATURE)
+        start = time.perf_counter()
+        llm.invoke(LIVE_PROMPT)
+        fresh.append((time.perf_counter() - start) * 1000)
+
+    pooled_llm = ModelPool().get()
+    pooled_llm.invoke(LIVE_PROMPT)
+    pooled = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        pooled_llm.invoke(LIVE_PROMPT)
+        pooled.append((time.perf_counter() - start) * 1000)
+    return {
+        "fresh_client_call_ms": round(sorted(fresh)[len(fresh) // 2], 1),
+        "pooled_client_call_ms": round(sorted(pooled)[len(pooled) // 2], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--live", action="store_true", help="also time real Gemini calls")
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = {"limit": bench_limit()}
+    try:
+        report["build"] = bench_build(args.questions)
+    except ImportError as e:
+        report["build"] = {"skipped": str(e)}
+    if args.live:
+        from dotenv import load_dotenv
+        load_dotenv()
+        report["live"] = bench_live()
+
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
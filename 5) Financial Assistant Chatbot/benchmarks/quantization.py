@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.quantized_index import QuantizedIndex, _normalize
+
+# Memory footprint, query latency and recall loss of int8 / binary quantized
+# search (with float32 re-ranking) against exact float32 search.
+# Runs offline on synthetic clustered vectors, or on a recorded float32 matrix:
+#   python benchmarks/quantization.py --count 20000 --dims 1536
+#   python benchmarks/quantization.py --vectors data/indexes/sec_reports.f32.npy
+
+
+def synthetic_vectors(count, dims, clusters=64, seed=0):
+    """Clustered Gaussian vectors; real embeddings are far from uniform on the sphere."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dims)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    return _normalize(centers[labels] + 0.6 * rng.normal(size=(count, dims)).astype(np.float32))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--vectors", help="path to a float32 .npy matrix to use instead of synthetic data")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    vectors = _normalize(np.load(args.vectors)) if args.vectors else synthetic_vectors(args.count, args.dims)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(vectors), size=args.queries)
+    queries = _normalize(vectors[picks] + 0.05 * rng.normal(size=(args.queries, vectors.shape[1])).astype(np.float32))
+
+    # Exact float32 baseline
+    start = time.perf_counter()
+    truth = [set(np.argsort(-(vectors @ q))[:args.k].tolist()) for q in queries]
+    float_latency = (time.perf_counter() - start) / args.queries
+
+    report = {
+        "vectors": int(len(vectors)),
+        "dims": int(vectors.shape[1]),
+        "k": args.k,
+        "float32": {"memory_mb": round(vectors.nbytes / 2**20, 2), "latency_ms": round(float_latency * 1000, 3), f"recall@{args.k}": 1.0},
+    }
+
+    rows = [{"chunk_index": i, "content": ""} for i in range(len(vectors))]
+    with tempfile.TemporaryDirectory() as tmp:
+        QuantizedIndex.build("bench", rows, vectors, index_dir=tmp)
+        for mode in ("int8", "binary"):
+            index = QuantizedIndex.load("bench", mode=mode, index_dir=tmp)
+            start = time.perf_counter()
+            hits = [index.search(q, k=args.k) for q in queries]
+            latency = (time.perf_counter() - start) / args.queries
+            recall = np.mean([
+                len({h["chunk_index"] for h in found} & expected) / args.k
+                for found, expected in zip(hits, truth)
+            ])
+            report[mode] = {
+                "memory_mb": round(index.memory_bytes()["codes"] / 2**20, 2),
+                "latency_ms": round(latency * 1000, 3),
+                f"recall@{args.k}": round(float(recall), 4),
+            }
+            del index
+
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import re
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "questions.txt")
+# Routing questions kept out of both questions.txt and the router exemplars
+HOLDOUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_holdout.txt")
+
+# Section headers in questions.txt and the data source each one belongs to
+SECTION_SOURCES = {
+    "SOURCE 1": "sec_reports",
+    "SOURCE 2": "structured_data",
+    "SOURCE 3": "press_releases",
+}
+
+_QUESTION_RE = re.compile(r"^[a-z]\)\s*(.+)$")
+
+
+def load_questions(path=QUESTIONS_PATH):
+    """
+    Parse questions.txt into a list of (question, expected_source) tuples.
+    """
+    labeled = []
+    source = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            header = line.rstrip(":").strip()
+            if header in SECTION_SOURCES:
+                source = SECTION_SOURCES[header]
+                continue
+            match = _QUESTION_RE.match(line)
+            if match and source:
+                labeled.append((match.group(1).strip(), source))
+    return labeled
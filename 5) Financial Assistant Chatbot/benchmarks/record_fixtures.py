@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import BENCH_DIR, LABELS_PATH
+
+# Record a fixture corpus and query vectors from live Supabase/Gemini so the
+# harness can replay real retrieval offline with --embedder recorded.
+# Usage: python benchmarks/record_fixtures.py [--candidates 30]
+
+SOURCE_CONFIG = {
+    "sec_reports": {"rpc": "vector_search", "table": "sec_reports", "model": "gemini-embedding-001", "dims": 1536},
+    "press_releases": {"rpc": "search_all_press_releases", "table": "press_releases", "model": "models/text-embedding-004", "dims": None},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=30, help="rows recorded per question")
+    parser.add_argument("--corpus-out", default=os.path.join(BENCH_DIR, "fixtures", "recorded_corpus.jsonl"))
+    parser.add_argument("--labels-out", default=os.path.join(BENCH_DIR, "fixtures", "recorded_labels.json"))
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from supabase import create_client
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    load_dotenv()
+    sb = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    embedders = {
+        source: GoogleGenerativeAIEmbeddings(model=cfg["model"], google_api_key=os.getenv("GOOGLE_API_KEY"))
+        for source, cfg in SOURCE_CONFIG.items()
+    }
+
+    with open(LABELS_PATH, "r", encoding="utf-8") as f:
+        labels = json.load(f)
+
+    recorded_ids = {source: set() for source in SOURCE_CONFIG}
+    for label in labels:
+        source = label["source"]
+        cfg = SOURCE_CONFIG[source]
+        kwargs = {"task_type": "RETRIEVAL_DOCUMENT"}
+        if cfg["dims"]:
+            kwargs["output_dimensionality"] = cfg["dims"]
+        vector = embedders[source].embed_query(label["question"], **kwargs)
+        label["query_embeddings"] = {source: vector}
+
+        rows = sb.rpc(cfg["rpc"], {
+            "query_embedding": vector,
+            "similarity_threshold": 0.02,
+            "match_count": args.candidates,
+        }).execute().data
+        recorded_ids[source].update(r["id"] for r in rows)
+        print(f"Recorded {len(rows)} candidates for: {label['question']}")
+
+    with open(args.corpus_out, "w", encoding="utf-8") as f:
+        for source, ids in recorded_ids.items():
+            if not ids:
+                continue
+            rows = sb.table(SOURCE_CONFIG[source]["table"]).select("*").in_("id", sorted(ids)).execute().data
+            for row in rows:
+                embedding = row["embedding"]
+                if isinstance(embedding, str):
+                    embedding = json.loads(embedding)
+                row = {k: v for k, v in row.items() if k not in ("id", "embedding", "created_at")}
+                f.write(json.dumps({"source": source, **row, "embedding": embedding}) + "\n")
+
+    with open(args.labels_out, "w", encoding="utf-8") as f:
+        json.dump(labels, f)
+    print(f"Wrote {args.corpus_out} and {args.labels_out}")
+    print("Review expected_chunks in the recorded labels, then run:")
+    print(f"  python benchmarks/harness.py --embedder recorded --corpus {args.corpus_out} --labels {args.labels_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import re
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_files.intent_router import (
+    CENTROIDS_PATH, EXEMPLARS, ROUTER_EMBEDDING_MODEL, ROUTER_TASK_TYPE, IntentRouter, keyword_intent,
+)
+from benchmarks.question_set import HOLDOUT_PATH, QUESTIONS_PATH, load_questions
+
+# Routing accuracy of the keyword baseline versus the embedding router, on
+# questions.txt and on the held-out split in benchmarks/routing_holdout.txt.
+# Usage: python benchmarks/routing_accuracy.py [--keyword-only]
+
+# Evaluated questions sharing this much of their vocabulary with an exemplar are
+# flagged: the router was effectively trained on them
+LEAK_OVERLAP = 0.4
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "for", "to", "and", "or", "by", "at", "on", "its", "their", "s",
+    "what", "which", "how", "does", "did", "do", "is", "was", "are", "me", "show", "prologis",
+}
+
+
+def legacy_intent(query):
+    """The original substring-based determine_intent, kept here as the baseline."""
+    query_lower = query.lower()
+    press_keywords = ['dividend', 'earnings', 'quarter', 'announcement', 'press', 'news', 'declared']
+    sec_keywords = ['filing', 'sec', 'annual', 'report', '10-k', '10-q', 'compliance', 'risk']
+    financial_keywords = ['revenue', 'profit', 'assets', 'properties', 'property', 'financial', 'income', 'square', 'metro', 'address']
+    press_score = sum(1 for keyword in press_keywords if keyword in query_lower)
+    sec_score = sum(1 for keyword in sec_keywords if keyword in query_lower)
+    financial_score = sum(1 for keyword in financial_keywords if keyword in query_lower)
+    if press_score >= sec_score and press_score >= financial_score:
+        return "press_releases"
+    elif sec_score >= financial_score:
+        return "sec_reports"
+    else:
+        return "structured_data"
+
+
+def report(name, questions, predictions):
+    errors = [(q, exp, got) for (q, exp), got in zip(questions, predictions) if exp not in got]
+    fanout = sum(len(got) for got in predictions) / len(predictions)
+    print(f"\n{name}: error rate {len(errors)}/{len(questions)} = {len(errors) / len(questions):.1%}, "
+          f"avg sources per query {fanout:.2f}")
+    for q, exp, got in errors:
+        print(f"  ✗ expected {exp:<16} got {','.join(got):<32} {q}")
+
+
+def _words(text):
+    return set(_WORD_RE.findall(text.lower())) - _STOPWORDS
+
+
+def exemplar_leaks(questions):
+    """(question, exemplar, overlap) for evaluated questions too close to an exemplar."""
+    exemplars = [(e, _words(e)) for group in EXEMPLARS.values() for e in group]
+    leaks = []
+    for question, _ in questions:
+        words = _words(question)
+        exemplar, overlap = max(
+            ((e, len(words & ew) / len(words | ew)) for e, ew in exemplars), key=lambda pair: pair[1]
+        )
+        if overlap >= LEAK_OVERLAP:
+            leaks.append((question, exemplar, overlap))
+    return leaks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keyword-only", action="store_true", help="skip the embedding router (no API calls)")
+    args = parser.parse_args()
+
+    splits = {
+        os.path.basename(QUESTIONS_PATH): load_questions(QUESTIONS_PATH),
+        "held-out": load_questions(HOLDOUT_PATH),
+    }
+    for split, questions in splits.items():
+        print(f"\n=== {split}: {len(questions)} labeled questions ===")
+        for question, exemplar, overlap in exemplar_leaks(questions):
+            print(f"  ! {overlap:.0%} word overlap with exemplar {exemplar!r}: {question}")
+        report("Substring keywords (before)", questions, [[legacy_intent(q)] for q, _ in questions])
+        report("Token keywords (fallback)", questions, [[keyword_intent(q)] for q, _ in questions])
+
+    if args.keyword_only:
+        return
+    if not os.path.exists(CENTROIDS_PATH):
+        print(f"\nNo centroids at {CENTROIDS_PATH}; run build_router_centroids.py first.")
+        return
+
+    from dotenv import load_dotenv
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    load_dotenv()
+    emb = GoogleGenerativeAIEmbeddings(model=ROUTER_EMBEDDING_MODEL, google_api_key=os.getenv("GOOGLE_API_KEY"))
+    router = IntentRouter.load()
+
+    timings = []
+    for split, questions in splits.items():
+        vectors = emb.embed_documents([q for q, _ in questions], task_type=ROUTER_TASK_TYPE)
+        decisions = []
+        for vector in vectors:
+            start = time.perf_counter()
+            decisions.append(router.route(vector))
+            timings.append(time.perf_counter() - start)
+
+        report(f"Embedding router (after), {split}", questions, [d.sources for d in decisions])
+        top1_errors = sum(1 for (_, exp), d in zip(questions, decisions) if d.sources[0] != exp)
+        print(f"  top-1 error rate {top1_errors / len(questions):.1%}")
+    timings.sort()
+    print(f"  classify latency: median {timings[len(timings) // 2] * 1e6:.0f}µs, max {timings[-1] * 1e6:.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
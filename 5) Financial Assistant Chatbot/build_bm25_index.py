@@ -0,0 +1,46 @@
+import os
+import sys
+from dotenv import load_dotenv
+from supabase import create_client
+
+from retrieval.bm25_index import BM25Index, DOC_FIELDS, index_path
+
+# Rebuild the local BM25 indexes from rows already stored in Supabase, for
+# deployments whose tables were loaded before indexing was part of ingestion.
+# Usage: python build_bm25_index.py [table ...]
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+if not all([SUPABASE_URL, SUPABASE_KEY]):
+    raise ValueError("Missing SUPABASE_URL or SUPABASE_KEY in .env")
+
+sb = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+TABLE_COLUMNS = {
+    "sec_reports": "id,source_file,page,chunk_index,section,content",
+    "press_releases": "id,source_url,title,published_at,chunk_index,content",
+    "press_releases_top_4_pages": "id,source_url,title,published_at,chunk_index,content",
+}
+PAGE_SIZE = 1000
+
+
+def fetch_rows(table):
+    rows = []
+    start = 0
+    while True:
+        batch = sb.table(table).select(TABLE_COLUMNS[table]).order("id").range(start, start + PAGE_SIZE - 1).execute().data
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+if __name__ == "__main__":
+    tables = sys.argv[1:] or ["sec_reports", "press_releases"]
+    for table in tables:
+        rows = fetch_rows(table)
+        print(f"Fetched {len(rows)} rows from {table}")
+        bm25 = BM25Index.build([{k: r.get(k) for k in DOC_FIELDS} for r in rows])
+        bm25.save(index_path(table))
+        print(f"  • Saved {len(bm25.vocab)} terms to {index_path(table)}")
@@ -0,0 +1,28 @@
+import os
+import sys
+import glob
+from dotenv import load_dotenv
+
+from ingestion.sec_chunker import iter_pdf_pages
+from ingestion.sec_tables import TableExtractor
+from retrieval.fact_store import FactStore, FACTS_PATH
+from retrieval.query_filters import DATA_DIR, available_filings
+
+# Rebuild the SEC fact table from the filing PDFs without re-chunking or
+# re-embedding them, e.g. after improving the table extractor.
+# Usage: python build_fact_store.py [pdf ...]
+load_dotenv()
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(DATA_DIR, "*.pdf")))
+    filings = available_filings()
+    facts = []
+    for path in paths:
+        tables = TableExtractor(os.path.basename(path), filings)
+        for _ in tables.tap(iter_pdf_pages(path)):
+            pass
+        print(f"{os.path.basename(path)}: {len(tables.facts)} facts")
+        facts.extend(tables.facts)
+    count = FactStore.build(facts)
+    print(f"  • Saved {count} facts to {FACTS_PATH}")
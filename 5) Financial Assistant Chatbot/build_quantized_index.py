@@ -0,0 +1,53 @@
+import os
+import sys
+import json
+from dotenv import load_dotenv
+from supabase import create_client
+
+from retrieval.bm25_index import INDEX_DIR
+from retrieval.quantized_index import QuantizedIndex
+
+# Export embeddings from Supabase into a local quantized index (float32 memmap
+# plus int8 and binary codes) used when LOCAL_VECTOR_INDEX is set.
+# Usage: python build_quantized_index.py [table ...]
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+if not all([SUPABASE_URL, SUPABASE_KEY]):
+    raise ValueError("Missing SUPABASE_URL or SUPABASE_KEY in .env")
+
+sb = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+TABLE_COLUMNS = {
+    "sec_reports": "id,source_file,page,chunk_index,section,content,embedding",
+    "press_releases": "id,source_url,title,published_at,chunk_index,content,embedding",
+}
+PAGE_SIZE = 500
+
+
+def fetch_rows(table):
+    rows = []
+    start = 0
+    while True:
+        batch = sb.table(table).select(TABLE_COLUMNS[table]).order("id").range(start, start + PAGE_SIZE - 1).execute().data
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+if __name__ == "__main__":
+    tables = sys.argv[1:] or list(TABLE_COLUMNS)
+    for table in tables:
+        rows = fetch_rows(table)
+        # pgvector columns come back from PostgREST as JSON text
+        vectors = [json.loads(r.pop("embedding")) if isinstance(r["embedding"], str) else r.pop("embedding") for r in rows]
+        QuantizedIndex.build(table, rows, vectors)
+
+        index = QuantizedIndex.load(table, mode="int8")
+        binary = QuantizedIndex.load(table, mode="binary")
+        mem = index.memory_bytes()
+        print(f"{table}: {len(rows)} vectors written to {INDEX_DIR}")
+        print(f"  • float32 {mem['float32'] / 2**20:.1f} MB (memory-mapped), "
+              f"int8 {mem['codes'] / 2**20:.1f} MB, binary {binary.memory_bytes()['codes'] / 2**20:.1f} MB in RAM")
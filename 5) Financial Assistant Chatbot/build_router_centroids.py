@@ -0,0 +1,30 @@
+import os
+from dotenv import load_dotenv
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from agent_files.intent_router import (
+    CENTROIDS_PATH, EXEMPLARS, ROUTER_EMBEDDING_MODEL, ROUTER_TASK_TYPE,
+    IntentRouter, build_centroids,
+)
+
+# Precompute the per-source routing centroids loaded by app.py at startup.
+# Re-run whenever EXEMPLARS or the router embedding model changes.
+load_dotenv()
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+if not GOOGLE_API_KEY:
+    raise ValueError("Missing GOOGLE_API_KEY in .env")
+
+emb = GoogleGenerativeAIEmbeddings(
+    model=ROUTER_EMBEDDING_MODEL,
+    google_api_key=GOOGLE_API_KEY
+)
+
+if __name__ == "__main__":
+    total = sum(len(q) for q in EXEMPLARS.values())
+    print(f"Embedding {total} exemplar questions with {ROUTER_EMBEDDING_MODEL}...")
+
+    centroids = build_centroids(lambda texts: emb.embed_documents(texts, task_type=ROUTER_TASK_TYPE))
+    IntentRouter(centroids).save(CENTROIDS_PATH)
+
+    print(f"Saved {len(centroids)} centroids to {CENTROIDS_PATH}")
@@ -0,0 +1,82 @@
+-- Filtered variants of the vector search RPCs used by app.py.
+-- The metadata predicate is applied inside the same query as the vector
+-- ordering, so Postgres can use the btree indexes below to shrink the
+-- candidate set before (or while) scanning embeddings.
+
+-- Section breadcrumb written by the structure-aware chunker (ingestion/sec_chunker.py)
+alter table public.sec_reports add column if not exists section text;
+
+create index if not exists sec_reports_source_file_idx on public.sec_reports (source_file);
+create index if not exists press_releases_published_at_idx on public.press_releases (published_at);
+
+-- Lets HNSW keep scanning until enough rows pass the filter (pgvector >= 0.8)
+-- alter database postgres set hnsw.iterative_scan = relaxed_order;
+
+-- The returned columns changed when `section` was added
+drop function if exists public.vector_search_filtered(vector, float, int, text[]);
+
+create or replace function public.vector_search_filtered(
+    query_embedding vector(1536),
+    similarity_threshold float,
+    match_count int,
+    filter_source_files text[] default null
+)
+returns table (
+    id bigint,
+    source_file text,
+    page int,
+    chunk_index int,
+    section text,
+    content text,
+    similarity float
+)
+language sql stable
+as $$
+    select
+        s.id,
+        s.source_file,
+        s.page,
+        s.chunk_index,
+        s.section,
+        s.content,
+        1 - (s.embedding <=> query_embedding) as similarity
+    from public.sec_reports s
+    where (filter_source_files is null or s.source_file = any(filter_source_files))
+      and 1 - (s.embedding <=> query_embedding) > similarity_threshold
+    order by s.embedding <=> query_embedding
+    limit match_count;
+$$;
+
+create or replace function public.search_all_press_releases_filtered(
+    query_embedding vector(768),
+    similarity_threshold float,
+    match_count int,
+    published_after date default null,
+    published_before date default null
+)
+returns table (
+    id bigint,
+    source_url text,
+    published_at date,
+    title text,
+    chunk_index int,
+    content text,
+    similarity float
+)
+language sql stable
+as $$
+    select
+        p.id,
+        p.source_url,
+        p.published_at,
+        p.title,
+        p.chunk_index,
+        p.content,
+        1 - (p.embedding <=> query_embedding) as similarity
+    from public.press_releases p
+    where (published_after is null or p.published_at >= published_after)
+      and (published_before is null or p.published_at <= published_before)
+      and 1 - (p.embedding <=> query_embedding) > similarity_threshold
+    order by p.embedding <=> query_embedding
+    limit match_count;
+$$;
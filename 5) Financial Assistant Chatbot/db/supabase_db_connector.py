@@ -1,5 +1,7 @@
 import os
+import threading
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,12 +9,32 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("Please set DATABASE_URL in your .env to your Supabase Postgres connection string.")
 
+# Connections are reused across queries (and threads, for batch runs) instead of
+# paying a TLS handshake per question
+SQL_POOL_SIZE = int(os.getenv("SQL_POOL_SIZE", "8"))
+_pool = None
+_pool_lock = threading.Lock()
+# psycopg2's pool raises instead of waiting when every connection is out
+_pool_slots = threading.BoundedSemaphore(SQL_POOL_SIZE)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(1, SQL_POOL_SIZE, DATABASE_URL, sslmode="require")
+        return _pool
+
+
 def run_sql_query(query: str):
     """
-    Connect to Postgres at DATABASE_URL, run the SQL, return list[dict] or status dict.
+    Run the SQL on a pooled connection to DATABASE_URL, return list[dict] or status dict.
     """
+    conn = None
+    broken = False
+    _pool_slots.acquire()
     try:
-        conn = psycopg2.connect(DATABASE_URL, sslmode="require")
+        conn = _get_pool().getconn()
         with conn:
             with conn.cursor() as cur:
                 cur.execute(query)
@@ -23,4 +45,10 @@ def run_sql_query(query: str):
                 else:
                     return {"status": "query executed successfully"}
     except Exception as e:
+        broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
         return {"error": str(e)}
+    finally:
+        if conn is not None:
+            # Drop connections the server closed so the pool opens a fresh one
+            _get_pool().putconn(conn, close=broken or bool(conn.closed))
+        _pool_slots.release()
@@ -8,6 +8,8 @@ from supabase import create_client
 from bs4 import BeautifulSoup
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from ingestion.job_queue import IngestJob, main as run_job
+from retrieval.bm25_index import BM25Index, index_path
 import time
 
 load_dotenv()
@@ -82,7 +84,7 @@ def fetch_all_release_urls():
     return sorted(urls)
 
 def extract_text_content(url: str):
-    """Extract text content directly from the press release page."""
+    """Extract text content directly from the press release page. Errors propagate so the queue can retry."""
     try:
         r = requests.get(url, headers=HEADERS, timeout=10)
         r.raise_for_status()
@@ -138,63 +140,65 @@ def extract_text_content(url: str):
         
     except Exception as e:
         print(f"⚠️ Error extracting content from {url}: {e}")
-        return None, None, None
+        raise
 
-def ingest_press_release(url: str):
-    """Extract content, chunk it, embed, and store in database."""
-    print(f"🔗 Processing: {url}")
-    
+# ── Ingestion stages, each checkpointed by the job queue (ingestion/job_queue.py) ──
+def fetch_stage(url, payload):
+    print(f"🔗 Fetching: {url}")
     title, published_at, content = extract_text_content(url)
-    
     if not content:
-        print(f"⚠️ No content found for {url}, skipping")
-        return
-    
-    # Split content into chunks
-    chunks = splitter.split_text(content)
-    
-    if not chunks:
-        print(f"⚠️ No chunks created for {url}, skipping")
-        return
-    
-    try:
-        # Generate embeddings (768 dimensions)
-        print(f"  • Generating embeddings for {len(chunks)} chunks...")
-        vectors = emb.embed_documents(chunks)
-        
-        # Prepare records for database
-        records = []
-        for i, (chunk, vector) in enumerate(zip(chunks, vectors)):
-            records.append({
-                "source_url": url,
-                "published_at": published_at.isoformat() if published_at else None,
-                "title": title,
-                "chunk_index": i,
-                "content": chunk,
-                "embedding": vector,  # This will be 768 dimensions
-            })
-        
-        # Insert into database
-        res = sb.table("press_releases").insert(records).execute()
+        print(f"⚠️ No content found for {url}, nothing to store")
+    return {"title": title, "published_at": published_at.isoformat() if published_at else None, "content": content}
+
+def chunk_stage(url, payload):
+    chunks = splitter.split_text(payload["content"]) if payload["content"] else []
+    return {**payload, "content": None, "chunks": chunks}
+
+def embed_stage(url, payload):
+    if not payload["chunks"]:
+        return payload
+    # Generate embeddings (768 dimensions)
+    print(f"  • Generating embeddings for {len(payload['chunks'])} chunks...")
+    return {**payload, "embeddings": emb.embed_documents(payload["chunks"])}
+
+def store_stage(url, payload):
+    records = []
+    for i, (chunk, vector) in enumerate(zip(payload["chunks"], payload.get("embeddings", []))):
+        records.append({
+            "source_url": url,
+            "published_at": payload["published_at"],
+            "title": payload["title"],
+            "chunk_index": i,
+            "content": chunk,
+            "embedding": vector,  # This will be 768 dimensions
+        })
+    if records:
+        # Replace rows from an earlier, interrupted attempt at this URL
+        sb.table("press_releases").delete().eq("source_url", url).execute()
+        sb.table("press_releases").insert(records).execute()
         print(f"  ✅ Ingested {len(records)} chunks from {url}")
-        
-    except Exception as e:
-        print(f"  ❌ Error ingesting {url}: {e}")
+    # Only what the BM25 index needs is kept in the checkpoint
+    return {"rows": [{k: v for k, v in r.items() if k != "embedding"} for r in records]}
+
+def build_bm25(payloads):
+    # Build the local BM25 index next to the embeddings
+    bm25 = BM25Index.build([row for p in payloads for row in p["rows"]])
+    bm25.save(index_path("press_releases"))
+    print(f"📚 Saved BM25 index over {len(bm25)} chunks to {index_path('press_releases')}")
+
+JOB = IngestJob(
+    "press_releases",
+    discover=fetch_all_release_urls,
+    fetch=fetch_stage,
+    chunk=chunk_stage,
+    embed=embed_stage,
+    store=store_stage,
+    finalize=build_bm25,
+    min_interval={"fetch": 1.0},  # polite delay between page requests
+)
 
+# Usage: python ingest_all_pages_press_releases.py [run | resume | retry-failed | status] [--workers N]
 if __name__ == "__main__":
     print("🚀 Starting press release ingestion...")
-    
-    all_urls = fetch_all_release_urls()
-    print(f"📊 Found {len(all_urls)} press release URLs")
-    
-    if not all_urls:
-        print("❌ No URLs found. Please check the website structure.")
-        exit(1)
-    
-    for i, url in enumerate(all_urls, 1):
-        print(f"\n[{i}/{len(all_urls)}] Processing press release...")
-        ingest_press_release(url)
-        time.sleep(1)
-    
-    print("\n✅ Completed ingestion of all press releases!")
+    run_job(JOB)
     print("🚀 Ingestion script finished successfully!")
\ No newline at end of file
@@ -9,6 +9,8 @@ from supabase import create_client
 from bs4 import BeautifulSoup
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from ingestion.job_queue import IngestJob, main as run_job
+from retrieval.bm25_index import BM25Index, index_path
 
 load_dotenv()
 
@@ -60,6 +62,7 @@ def fetch_press_release_urls(max_pages=4):
 
     return sorted(urls)
 
+# Request errors propagate so the job queue can retry the fetch
 def extract_press_release_content(url: str):
     try:
         resp = requests.get(url, headers=HEADERS, timeout=10)
@@ -106,57 +109,64 @@ def extract_press_release_content(url: str):
 
     except Exception as e:
         print(f"Failed to extract content from {url}: {e}")
-        return None, None, None
+        raise
 
-# Process a single press release URL: extract, chunk, embed, and store in Supabase
-def ingest_press_release(url: str):
+# Ingestion stages: extract, chunk, embed and store one press release URL.
+# The job queue (ingestion/job_queue.py) checkpoints the output of each stage.
+def fetch_stage(url, payload):
     print(f"Processing {url}")
-
     title, published_at, content = extract_press_release_content(url)
-
     if not content:
-        print(f"No content at {url}, skipping...")
-        return
-
-    chunks = splitter.split_text(content)
-    if not chunks:
-        print(f"No chunks found for {url}, skipping...")
-        return
-
-    try:
-        print(f"  • Generating embeddings for {len(chunks)} chunks...")
-        vectors = emb.embed_documents(chunks)
-
-        records = []
-        for i, (chunk, vector) in enumerate(zip(chunks, vectors)):
-            records.append({
-                "source_url": url,
-                "published_at": published_at.isoformat(),
-                "title": title,
-                "chunk_index": i,
-                "content": chunk,
-                "embedding": vector,
-            })
-
-        # Fixed: Remove the status_code check
-        res = sb.table("press_releases_top_4_pages").insert(records).execute()
-        
-        # The insert operation will raise an exception if it fails
-        # If we reach this line, it means the insertion was successful
+        print(f"No content at {url}, nothing to store")
+    return {"title": title, "published_at": published_at.isoformat(), "content": content}
+
+def chunk_stage(url, payload):
+    chunks = splitter.split_text(payload["content"]) if payload["content"] else []
+    return {**payload, "content": None, "chunks": chunks}
+
+def embed_stage(url, payload):
+    if not payload["chunks"]:
+        return payload
+    print(f"  • Generating embeddings for {len(payload['chunks'])} chunks...")
+    return {**payload, "embeddings": emb.embed_documents(payload["chunks"])}
+
+def store_stage(url, payload):
+    records = []
+    for i, (chunk, vector) in enumerate(zip(payload["chunks"], payload.get("embeddings", []))):
+        records.append({
+            "source_url": url,
+            "published_at": payload["published_at"],
+            "title": payload["title"],
+            "chunk_index": i,
+            "content": chunk,
+            "embedding": vector,
+        })
+    if records:
+        # Drop rows left by an interrupted attempt, then insert; raises if the insert fails
+        sb.table("press_releases_top_4_pages").delete().eq("source_url", url).execute()
+        sb.table("press_releases_top_4_pages").insert(records).execute()
         print(f"Successfully ingested {len(records)} chunks for {url}")
+    return {"rows": [{k: v for k, v in r.items() if k != "embedding"} for r in records]}
+
+def build_bm25(payloads):
+    # Build the local BM25 index next to the embeddings
+    bm25 = BM25Index.build([row for p in payloads for row in p["rows"]])
+    bm25.save(index_path("press_releases_top_4_pages"))
+    print(f"Saved BM25 index over {len(bm25)} chunks.")
+
+JOB = IngestJob(
+    "press_releases_top_4_pages",
+    discover=lambda: fetch_press_release_urls(max_pages=4),
+    fetch=fetch_stage,
+    chunk=chunk_stage,
+    embed=embed_stage,
+    store=store_stage,
+    finalize=build_bm25,
+    min_interval={"fetch": 1.0},  # Polite delay to avoid overloading the server
+)
 
-    except Exception as e:
-        print(f"Error ingesting {url}: {e}")
-
+# Usage: python ingest_first_4_pages_press_releases.py [run | resume | retry-failed | status] [--workers N]
 if __name__ == "__main__":
     print("Starting ingestion for first 4 pages of press releases...")
-
-    urls_to_process = fetch_press_release_urls(max_pages=4)
-    print(f"Found {len(urls_to_process)} press release URLs in first 4 pages.")
-
-    for idx, url in enumerate(urls_to_process, 1):
-        print(f"\n[{idx}/{len(urls_to_process)}] Ingesting press release...")
-        ingest_press_release(url)
-        time.sleep(1)  # Polite delay to avoid overloading the server
-
+    run_job(JOB)
     print("\nFinished ingestion for first 4 pages.")
\ No newline at end of file
@@ -2,9 +2,12 @@ import os
 import time
 from supabase import create_client
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from ingestion.job_queue import IngestJob, main as run_job
+from ingestion.sec_chunker import chunk_pages, iter_pdf_pages
+from ingestion.sec_tables import TableExtractor
+from retrieval.fact_store import FactStore, FACTS_PATH
+from retrieval.bm25_index import BM25Index, DOC_FIELDS, index_path
 
 # ── 1. Load environment ─────────────────────────────────────────────────────────
 load_dotenv()  # expects SUPABASE_URL, SUPABASE_ANON_KEY, GOOGLE_API_KEY in .env
@@ -19,56 +22,91 @@ if not all([SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY]):
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 embedder = GoogleGenerativeAIEmbeddings(model="gemini-embedding-001")
 
-# ── 3. PDF loader & splitter ────────────────────────────────────────────────────
-loader   = PyPDFLoader
-splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-
-def clean_text(text: str) -> str:
-    return text.replace("\x00", " ").strip()
-
-# Load a PDF, split it into chunks
-def process_pdf(path: str) -> list[dict]:
-    docs = loader(path).load()
-    chunks = []
-    for doc in docs:
-        for idx, chunk in enumerate(splitter.split_documents([doc])):
-            text = clean_text(chunk.page_content)
-            if not text:
-                continue
-            chunks.append({
-                "source_file": os.path.basename(path),
-                "page":        doc.metadata.get("page"),
-                "chunk_index": idx,
-                "content":     text
-            })
-    return chunks
-
+# ── 3. One queue task per filing (ingestion/job_queue.py) ──────────────────────
+# Each filing is streamed through the section-aware chunker and every batch of
+# 20 chunks is embedded and upserted as it comes off the chunker, so only one
+# batch of embeddings is in memory. Each stored batch is checkpointed; an
+# interrupted or failed run re-reads the filing and resumes at the first batch
+# not yet stored. The section breadcrumb ("Part II > Item 7. Management's
+# Discussion and Analysis") is stored with each chunk and passed to Gemini as
+# the document title.
+BATCH_SIZE = 20
 DATA_DIR = "data"
-records = []
 
-for fname in os.listdir(DATA_DIR):
-    if not fname.lower().endswith(".pdf"):
-        continue
-    pdf_path = os.path.join(DATA_DIR, fname)
+
+def list_filings():
+    return sorted(f for f in os.listdir(DATA_DIR) if f.lower().endswith(".pdf"))
+
+
+def fetch_stage(fname, payload):
+    path = os.path.join(DATA_DIR, fname)
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return {"path": path}
+
+
+def chunk_stage(fname, payload):
+    """Yield the filing's chunks BATCH_SIZE at a time; once all are stored, return its table facts."""
     print(f"Processing {fname}")
-    chunks = process_pdf(pdf_path)
-    texts  = [c["content"] for c in chunks]
+    # Financial tables are pulled out of the same page stream for the fact store
+    tables = TableExtractor(fname)
+    batch, count = [], 0
+    for chunk in chunk_pages(tables.tap(iter_pdf_pages(payload["path"])), fname):
+        batch.append(chunk)
+        count += 1
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+    # Rows beyond the last chunk are left over from an earlier version of this filing
+    supabase.table("sec_reports").delete().eq("source_file", fname).gte("chunk_index", count).execute()
+    print(f"  • {count} chunks, {len(tables.facts)} table facts")
+    return {"chunks": count, "facts": tables.facts}
 
-    # 1536-dim embeddings for retrieval
-    embs = embedder.embed_documents(
-        texts,
+
+def embed_stage(fname, batch):
+    return embedder.embed_documents(
+        [c["content"] for c in batch],
+        titles=[c["section"] or c["source_file"] for c in batch],
         output_dimensionality=1536,
         task_type="RETRIEVAL_DOCUMENT"
     )
 
-    for c, emb in zip(chunks, embs):
-        records.append({**c, "embedding": emb})
 
-# ── 5. Upsert in batches of 20 ─────────────────────────────────────────────────
-BATCH_SIZE = 20
-for i in range(0, len(records), BATCH_SIZE):
-    batch = records[i : i + BATCH_SIZE]
-    res = supabase.table("sec_reports").upsert(batch).execute()
+def store_stage(fname, part, batch, embeddings):
+    # Replace this batch's rows from an earlier attempt or an earlier ingest of the filing
+    (supabase.table("sec_reports").delete().eq("source_file", fname)
+        .gte("chunk_index", batch[0]["chunk_index"]).lte("chunk_index", batch[-1]["chunk_index"]).execute())
+    records = [{**c, "embedding": emb} for c, emb in zip(batch, embeddings)]
+    res = supabase.table("sec_reports").upsert(records).execute()
     status = getattr(res, "status_code", getattr(res, "status", res))
-    print(f"  • Upserted batch {i//BATCH_SIZE + 1} ({len(batch)} rows), status {status}")
-    time.sleep(0.5)
\ No newline at end of file
+    print(f"  • Upserted batch {part + 1} of {fname} ({len(records)} rows), status {status}")
+    time.sleep(0.5)
+    return {"rows": [{k: c[k] for k in DOC_FIELDS if k in c} for c in batch]}
+
+
+# ── 4. Build the local BM25 index and fact table next to the embeddings ────────
+def build_local_indexes(payloads, parts):
+    bm25 = BM25Index.build([row for part in parts for row in part["rows"]])
+    bm25.save(index_path("sec_reports"))
+    print(f"  • Saved BM25 index over {len(bm25)} chunks to {index_path('sec_reports')}")
+    count = FactStore.build([f for p in payloads for f in p.get("facts", [])])
+    print(f"  • Saved {count} table facts to {FACTS_PATH}")
+
+
+JOB = IngestJob(
+    "sec_reports",
+    discover=list_filings,
+    fetch=fetch_stage,
+    chunk=chunk_stage,
+    embed=embed_stage,
+    store=store_stage,
+    finalize=build_local_indexes,
+    workers=2,
+    streaming=True,
+)
+
+# Usage: python ingest_vector_store.py [run | resume | retry-failed | status] [--workers N]
+if __name__ == "__main__":
+    run_job(JOB)
\ No newline at end of file
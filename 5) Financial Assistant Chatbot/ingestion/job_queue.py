@@ -0,0 +1,382 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Durable work queue for the ingest scripts.
+#
+# Every URL / file is a task in a local SQLite database. A task moves through
+# pending -> fetched -> chunked -> embedded -> stored, and the output of each
+# stage is checkpointed, so an interrupted backfill resumes at the stage where
+# each task stopped instead of starting over. Failed stages are retried with
+# exponential backoff; tasks that exhaust their attempts stay in the queue with
+# their last error until `retry-failed`.
+#
+# Streaming jobs (large documents) don't hold a whole task between stages: the
+# chunk stage yields batches, and each batch is embedded, stored and
+# checkpointed on its own as a task part. A retry re-reads the document and
+# skips the batches already stored, so memory stays at one batch and a failure
+# near the end of a filing only repeats the batch that failed.
+
+QUEUE_PATH = os.getenv(
+    "INGEST_QUEUE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ingest_queue.sqlite"),
+)
+
+STATES = ("pending", "fetched", "chunked", "embedded", "stored")
+STAGES = ("fetch", "chunk", "embed", "store")  # stage i moves a task from STATES[i] to STATES[i + 1]
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 2.0   # seconds; doubled per attempt, with jitter
+BACKOFF_MAX = 300.0
+
+_SCHEMA = """
+create table if not exists tasks (
+    job text not null,
+    key text not null,
+    state text not null default 'pending',
+    attempts integer not null default 0,
+    next_attempt_at real not null default 0,
+    last_error text,
+    payload text,
+    vectors blob,
+    updated_at real not null,
+    primary key (job, key)
+);
+create index if not exists tasks_ready_idx on tasks (job, state, next_attempt_at);
+create table if not exists task_parts (
+    job text not null,
+    key text not null,
+    part integer not null,
+    payload text,
+    primary key (job, key, part)
+);
+"""
+
+
+class IngestJob:
+    """
+    One ingest pipeline: how to discover task keys, one function per stage and
+    an optional `finalize(rows)` run over every stored task's checkpoint.
+
+    Each stage function takes (key, payload) and returns the next payload, a
+    JSON-serializable dict. A list under "embeddings" is checkpointed as packed
+    float32 instead of JSON. `min_interval` spaces out calls to a stage across
+    all workers (e.g. {"fetch": 1.0} to stay polite to a website).
+
+    With `streaming=True`, after fetch:
+      chunk(key, payload)                   generator of batches; its return value is the task's final payload
+      embed(key, batch)                     embeddings of one batch
+      store(key, part, batch, embeddings)   stores one batch; returns the part's checkpoint
+    and finalize(payloads, parts) also gets an iterator over every stored part.
+    """
+
+    def __init__(self, name, discover, fetch, chunk, embed, store, finalize=None, workers=4, min_interval=None,
+                 streaming=False):
+        self.name = name
+        self.discover = discover
+        self.stages = {"fetch": fetch, "chunk": chunk, "embed": embed, "store": store}
+        self.finalize = finalize
+        self.workers = workers
+        self.min_interval = min_interval or {}
+        self.streaming = streaming
+
+
+class JobQueue:
+    """SQLite-backed task table shared by every ingest job."""
+
+    def __init__(self, path=QUEUE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def enqueue(self, job, keys):
+        """Add new task keys; keys already in the queue keep their progress. Returns the number added."""
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "insert or ignore into tasks (job, key, updated_at) values (?, ?, ?)",
+                [(job, key, now) for key in keys],
+            )
+            return self._conn.total_changes - before
+
+    def ready(self, job, limit, exclude=(), max_attempts=MAX_ATTEMPTS):
+        """Keys of unfinished tasks whose backoff has expired, oldest progress first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "select key from tasks where job = ? and state != 'stored' and attempts < ? and next_attempt_at <= ? "
+                "order by updated_at limit ?",
+                (job, max_attempts, time.time(), limit + len(exclude)),
+            ).fetchall()
+        return [k for (k,) in rows if k not in exclude][:limit]
+
+    def next_wakeup(self, job, max_attempts=MAX_ATTEMPTS):
+        """Earliest retry time among unfinished tasks, or None when nothing is left to do."""
+        with self._lock:
+            (when,) = self._conn.execute(
+                "select min(next_attempt_at) from tasks where job = ? and state != 'stored' and attempts < ?",
+                (job, max_attempts),
+            ).fetchone()
+        return when
+
+    def load(self, job, key):
+        with self._lock:
+            state, payload, vectors = self._conn.execute(
+                "select state, payload, vectors from tasks where job = ? and key = ?", (job, key)
+            ).fetchone()
+        payload = json.loads(payload) if payload else {}
+        if vectors is not None:
+            dims = payload.pop("_dims")
+            flat = array("f")
+            flat.frombytes(vectors)
+            payload["embeddings"] = [flat[i:i + dims].tolist() for i in range(0, len(flat), dims)]
+        return state, payload
+
+    def checkpoint(self, job, key, state, payload):
+        """Persist a completed stage; resets the retry counter."""
+        payload = dict(payload)
+        vectors = None
+        embeddings = payload.pop("embeddings", None)
+        if embeddings:
+            payload["_dims"] = len(embeddings[0])
+            vectors = array("f", (x for vector in embeddings for x in vector)).tobytes()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "update tasks set state = ?, payload = ?, vectors = ?, attempts = 0, next_attempt_at = 0, "
+                "last_error = null, updated_at = ? where job = ? and key = ?",
+                (state, json.dumps(payload), vectors, time.time(), job, key),
+            )
+
+    def parts_done(self, job, key):
+        with self._lock:
+            rows = self._conn.execute("select part from task_parts where job = ? and key = ?", (job, key)).fetchall()
+        return {part for (part,) in rows}
+
+    def checkpoint_part(self, job, key, part, payload):
+        """Persist one stored batch of a streaming task; progress resets the retry counter."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert or replace into task_parts (job, key, part, payload) values (?, ?, ?, ?)",
+                (job, key, part, json.dumps(payload)),
+            )
+            self._conn.execute(
+                "update tasks set attempts = 0, last_error = null, updated_at = ? where job = ? and key = ?",
+                (time.time(), job, key),
+            )
+
+    def iter_parts(self, job, batch=500):
+        """Part checkpoints of every stored task, in (key, part) order, read `batch` at a time."""
+        last = ("", -1)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "select p.key, p.part, p.payload from task_parts p join tasks t on t.job = p.job and t.key = p.key "
+                    "where p.job = ? and t.state = 'stored' and (p.key > ? or (p.key = ? and p.part > ?)) "
+                    "order by p.key, p.part limit ?",
+                    (job, last[0], last[0], last[1], batch),
+                ).fetchall()
+            for key, part, payload in rows:
+                yield json.loads(payload) if payload else {}
+            if len(rows) < batch:
+                return
+            last = rows[-1][:2]
+
+    def fail(self, job, key, error):
+        """Record a failed attempt and schedule the retry. Returns the attempt count."""
+        with self._lock, self._conn:
+            (attempts,) = self._conn.execute(
+                "select attempts from tasks where job = ? and key = ?", (job, key)
+            ).fetchone()
+            attempts += 1
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            self._conn.execute(
+                "update tasks set attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? "
+                "where job = ? and key = ?",
+                (attempts, time.time() + delay, error[:2000], time.time(), job, key),
+            )
+            return attempts
+
+    def retry_failed(self, job, max_attempts=MAX_ATTEMPTS):
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "update tasks set attempts = 0, next_attempt_at = 0 where job = ? and attempts >= ?",
+                (job, max_attempts),
+            ).rowcount
+
+    def status(self, job, max_attempts=MAX_ATTEMPTS):
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "select state, count(*) from tasks where job = ? group by state", (job,)
+            ).fetchall())
+            failed = self._conn.execute(
+                "select key, state, last_error from tasks where job = ? and attempts >= ? and state != 'stored'",
+                (job, max_attempts),
+            ).fetchall()
+            (parts,) = self._conn.execute("select count(*) from task_parts where job = ?", (job,)).fetchone()
+        return {s: counts.get(s, 0) for s in STATES}, failed, parts
+
+    def stored_payloads(self, job):
+        with self._lock:
+            rows = self._conn.execute(
+                "select payload from tasks where job = ? and state = 'stored' order by key", (job,)
+            ).fetchall()
+        return [json.loads(p) for (p,) in rows if p]
+
+
+class _Throttle:
+    """Minimum spacing between calls of one stage, shared by all workers."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class _PartError(Exception):
+    """A stage failed on one batch of a streaming task."""
+
+    def __init__(self, stage, part, error):
+        super().__init__(f"{error} (batch {part + 1})")
+        self.stage = stage
+
+
+def _stream(job, queue, key, payload, throttles):
+    """Chunk, embed and store a streaming task batch by batch. Returns the chunk stage's final payload."""
+    done = queue.parts_done(job.name, key)
+    batches = job.stages["chunk"](key, payload)
+    part = 0
+    while True:
+        stage = "chunk"
+        try:
+            batch = next(batches)
+        except StopIteration as stop:
+            return stop.value or {}
+        except Exception as e:
+            raise _PartError(stage, part, e) from e
+        if part not in done:
+            try:
+                stage = "embed"
+                if stage in throttles:
+                    throttles[stage].wait()
+                embeddings = job.stages["embed"](key, batch)
+                stage = "store"
+                if stage in throttles:
+                    throttles[stage].wait()
+                queue.checkpoint_part(job.name, key, part, job.stages["store"](key, part, batch, embeddings))
+            except Exception as e:
+                raise _PartError(stage, part, e) from e
+        part += 1
+
+
+def _advance(job, queue, key, throttles):
+    """Run the remaining stages of one task, checkpointing after each. Returns the final state."""
+    state, payload = queue.load(job.name, key)
+    while state != "stored":
+        stage = STAGES[STATES.index(state)]
+        if stage in throttles:
+            throttles[stage].wait()
+        try:
+            if job.streaming and stage != "fetch":
+                payload = _stream(job, queue, key, payload, throttles)
+                next_state = "stored"
+            else:
+                payload = job.stages[stage](key, payload)
+                next_state = STATES[STATES.index(state) + 1]
+        except Exception as e:
+            stage = getattr(e, "stage", stage)
+            attempts = queue.fail(job.name, key, f"{stage}: {e}")
+            print(f"  ⚠️ {key}: {stage} failed (attempt {attempts}/{MAX_ATTEMPTS}): {e}")
+            return state
+        state = next_state
+        queue.checkpoint(job.name, key, state, payload)
+    return state
+
+
+def run(job, queue, workers=None):
+    """Process every unfinished task of `job` with a worker pool, waiting out backoffs."""
+    workers = workers or job.workers
+    throttles = {stage: _Throttle(s) for stage, s in job.min_interval.items()}
+    in_flight = {}
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"ingest-{job.name}") as pool:
+        while True:
+            for key in queue.ready(job.name, workers - len(in_flight), exclude=set(in_flight.values())):
+                in_flight[pool.submit(_advance, job, queue, key, throttles)] = key
+            if not in_flight:
+                wakeup = queue.next_wakeup(job.name)
+                if wakeup is None:
+                    break
+                # Everything left is backing off
+                time.sleep(max(0.0, min(wakeup - time.time(), BACKOFF_MAX)))
+                continue
+            finished, _ = wait(in_flight, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key = in_flight.pop(future)
+                if future.result() == "stored":
+                    done += 1
+                    print(f"  ✅ [{done}] {key}")
+    return done
+
+
+def _print_status(job, queue):
+    counts, failed, parts = queue.status(job.name)
+    print(f"{job.name}: " + ", ".join(f"{state} {n}" for state, n in counts.items())
+          + (f" ({parts} batches stored)" if job.streaming else ""))
+    for key, state, error in failed:
+        print(f"  ❌ {key} (stuck at {state}): {error}")
+
+
+def main(job, argv=None):
+    """
+    Command line for an ingest script:
+      run           discover tasks, enqueue new ones and process the queue (default)
+      resume        process what is already queued, without discovery
+      retry-failed  give tasks that ran out of attempts a fresh set, then resume
+      status        per-state counts and the last error of each failed task
+    """
+    parser = argparse.ArgumentParser(description=f"{job.name} ingestion")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "resume", "retry-failed", "status"])
+    parser.add_argument("--workers", type=int, default=job.workers)
+    parser.add_argument("--queue", default=QUEUE_PATH, help="SQLite queue file")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == "status":
+            _print_status(job, queue)
+            return
+        if args.command == "run":
+            keys = job.discover()
+            print(f"📊 Found {len(keys)} tasks, {queue.enqueue(job.name, keys)} new")
+        elif args.command == "retry-failed":
+            print(f"Retrying {queue.retry_failed(job.name)} failed tasks")
+
+        stored = run(job, queue, workers=args.workers)
+        print(f"Stored {stored} tasks this run")
+        if job.finalize and job.streaming:
+            job.finalize(queue.stored_payloads(job.name), queue.iter_parts(job.name))
+        elif job.finalize:
+            job.finalize(queue.stored_payloads(job.name))
+        _print_status(job, queue)
+    finally:
+        queue.close()
@@ -0,0 +1,227 @@
+import os
+import re
+
+# Structure-aware chunker for 10-K / 10-Q filings.
+#
+# Pages are consumed one at a time (PyPDFLoader.lazy_load), PART / Item
+# headings are tracked as a breadcrumb, and text is packed into token-bounded
+# chunks that never straddle a section boundary. Only the section currently
+# being filled is held in memory, so peak memory does not grow with the size
+# of the filing.
+
+MAX_TOKENS = 512
+OVERLAP_TOKENS = 48
+MIN_TOKENS = 8  # drop fragments such as a lone heading left over at a boundary
+
+# "PART II", "PART II. OTHER INFORMATION"
+_PART_RE = re.compile(r"^(?:PART|Part)\s+(IV|I{1,3})\b\.?\s*[-–—:]?\s*(.*)$")
+# "Item 1A. Risk Factors", "ITEM 7 - MANAGEMENT'S DISCUSSION AND ANALYSIS ..."
+_ITEM_RE = re.compile(r"^item\s+(\d{1,2}[a-c]?)\s*[.:\-–—]?\s*(.*)$", re.I)
+# Table-of-contents entries end in a page number: "Item 1A. Risk Factors ....... 12"
+_TOC_ENTRY_RE = re.compile(r"(?:\.{2,}|\s)\s*\d{1,3}$")
+# Pages listing this many headings are a table of contents, not section starts
+TOC_MIN_HEADINGS = 4
+
+# Running headers / footers that would otherwise be glued into chunk text
+_NOISE_RE = re.compile(r"^(?:\d{1,3}|table of contents|page \d+(?: of \d+)?)$", re.I)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9(“\"$])")
+
+
+def _encoder():
+    import tiktoken
+    # cl100k is close enough to Gemini's tokenizer to bound chunk sizes
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def default_token_counter():
+    encoder = _encoder()
+    return lambda text: len(encoder.encode(text, disallowed_special=()))
+
+
+def parse_heading(line):
+    """Return ("part" | "item", label) if `line` is a section heading, else None."""
+    if len(line) > 160:
+        return None
+    match = _PART_RE.match(line)
+    if match:
+        return "part", f"Part {match.group(1)}"
+    match = _ITEM_RE.match(line)
+    if match:
+        title = match.group(2).strip().rstrip(".")
+        if title and _TOC_ENTRY_RE.search(title):
+            return None
+        # Body text that merely cites an item ("Item 7 of this report discusses...")
+        if title and title[0].islower():
+            return None
+        return "item", f"Item {match.group(1).upper()}" + (f". {title}" if title else "")
+    return None
+
+
+class SectionTracker:
+    """Current PART / Item breadcrumb of a filing."""
+
+    def __init__(self):
+        self.part = None
+        self.item = None
+        self._pending_title = False
+
+    @property
+    def breadcrumb(self):
+        return " > ".join(p for p in (self.part, self.item) if p) or None
+
+    def update(self, kind, label):
+        if kind == "part":
+            self.part, self.item = label, None
+        else:
+            self.item = label
+        # "Item 7." on its own line: the title follows on the next line
+        self._pending_title = kind == "item" and "." not in label
+
+    def take_title(self, line):
+        """Attach the line after a bare "Item N" heading as its title."""
+        if not self._pending_title:
+            return False
+        self._pending_title = False
+        if len(line) > 120 or line[-1:] in ".;,":
+            return False
+        self.item = f"{self.item}. {line}"
+        return True
+
+
+def _sentences(text):
+    return [s for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+class _Buffer:
+    """Sentences of the chunk being filled, with their token counts."""
+
+    def __init__(self):
+        self.units = []
+        self.tokens = 0
+        self.page = None
+
+    def add(self, text, tokens, page):
+        if self.page is None:
+            self.page = page
+        self.units.append((text, tokens))
+        self.tokens += tokens
+
+    def text(self):
+        return " ".join(t for t, _ in self.units)
+
+    def reset(self, keep_overlap=0, page=None):
+        carried, total = [], 0
+        for text, tokens in reversed(self.units):
+            if total + tokens > keep_overlap:
+                break
+            carried.insert(0, (text, tokens))
+            total += tokens
+        self.units, self.tokens = carried, total
+        self.page = page if carried else None
+
+
+def chunk_pages(pages, source_file, max_tokens=MAX_TOKENS, overlap_tokens=OVERLAP_TOKENS, count_tokens=None):
+    """
+    Yield chunk rows ({source_file, page, chunk_index, section, content}) from an
+    iterable of (page_number, text) pairs.
+
+    Chunks are at most `max_tokens` long, repeat up to `overlap_tokens` of the
+    previous chunk of the same section, and are flushed whenever a new PART or
+    Item heading starts. `chunk_index` runs over the whole document and `page`
+    is the page a chunk starts on.
+    """
+    count_tokens = count_tokens or default_token_counter()
+    tracker = SectionTracker()
+    buffer = _Buffer()
+    chunk_index = 0
+
+    def emit():
+        nonlocal chunk_index
+        text = buffer.text().replace("\x00", " ").strip()
+        if buffer.tokens < MIN_TOKENS or not text:
+            return None
+        row = {
+            "source_file": source_file,
+            "page": buffer.page,
+            "chunk_index": chunk_index,
+            "section": tracker.breadcrumb,
+            "content": text,
+        }
+        chunk_index += 1
+        return row
+
+    def add(sentence, page):
+        tokens = count_tokens(sentence)
+        if tokens > max_tokens and len(sentence) > 1:
+            # Tables and run-on lines come out of PDFs as one huge "sentence"
+            words = sentence.split()
+            if len(words) > 1:
+                step = max(1, len(words) * max_tokens // (tokens + 1))
+                pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+            else:
+                # One unbroken run (URL, base64 blob, table row without spaces): cut by characters
+                step = max(1, len(sentence) * max_tokens // (tokens + 1))
+                pieces = [sentence[i:i + step] for i in range(0, len(sentence), step)]
+            # Every piece is shorter than `sentence`, so the recursion always bottoms out
+            for piece in pieces:
+                yield from add(piece, page)
+            return
+        if buffer.units and buffer.tokens + tokens > max_tokens:
+            row = emit()
+            if row:
+                yield row
+            buffer.reset(keep_overlap=overlap_tokens, page=page)
+            if buffer.tokens + tokens > max_tokens:
+                buffer.reset()
+        buffer.add(sentence, tokens, page)
+
+    def add_paragraph(lines, page):
+        for sentence in _sentences(" ".join(lines)):
+            yield from add(sentence, page)
+
+    # Lines of the paragraph being read, and the page it started on; a
+    # paragraph wrapping onto the next page is carried over, not cut
+    paragraph, paragraph_page = [], None
+    for page_number, text in pages:
+        lines = [l.strip() for l in (text or "").splitlines()]
+        lines = [l for l in lines if l and not _NOISE_RE.match(l)]
+        headings = [parse_heading(l) for l in lines]
+        is_toc = sum(1 for h in headings if h and h[0] == "item") >= TOC_MIN_HEADINGS
+
+        for line, heading in zip(lines, headings):
+            if heading and not is_toc:
+                # Finish the paragraph and chunk of the section that just ended
+                yield from add_paragraph(paragraph, paragraph_page)
+                paragraph = []
+                row = emit()
+                if row:
+                    yield row
+                buffer.reset()
+                tracker.update(*heading)
+                continue
+            if tracker.take_title(line):
+                continue
+            if not paragraph:
+                paragraph_page = page_number
+            paragraph.append(line)
+            # A line ending a sentence closes the paragraph; wrapped lines keep accumulating
+            if line[-1] in ".!?:":
+                yield from add_paragraph(paragraph, paragraph_page)
+                paragraph = []
+
+    yield from add_paragraph(paragraph, paragraph_page)
+    row = emit()
+    if row:
+        yield row
+
+
+def iter_pdf_pages(path):
+    """Stream (page_number, text) pairs from a PDF without loading the whole document."""
+    from langchain_community.document_loaders import PyPDFLoader
+    for doc in PyPDFLoader(path).lazy_load():
+        yield doc.metadata.get("page"), doc.page_content
+
+
+def chunk_pdf(path, **kwargs):
+    return chunk_pages(iter_pdf_pages(path), os.path.basename(path), **kwargs)
@@ -0,0 +1,184 @@
+import re
+import calendar
+from datetime import date
+
+from ingestion.sec_chunker import SectionTracker, parse_heading
+from retrieval.query_filters import available_filings
+
+# Pulls financial tables out of 10-K / 10-Q page text into fact rows:
+#   (filing, period column, line item, value)
+# pypdf flattens a table row into one line, label first and cells after it:
+#   "Total liquidity $ 5,123,456 $ 4,987,001"
+#   "Net earnings attributable to common stockholders 861,270 (23,456) —"
+# so a table is a run of such lines, with its column headers (dates, years,
+# "Three Months Ended ...") and units ("in thousands") in the lines above it.
+
+# One numeric cell: 1,234 / 1,234.5 / (1,234) / 4.5% / an em dash for zero
+_CELL_RE = re.compile(r"^\(?-?\d{1,3}(?:,\d{3})*(?:\.\d+)?\)?%?$|^\(?-?\d+(?:\.\d+)?\)?%?$|^[—–-]$")
+_MONTHS = "|".join(m for m in calendar.month_name if m)
+_DATE_RE = re.compile(rf"\b({_MONTHS})\s+(\d{{1,2}}),?\s+(20\d{{2}})\b")
+_MONTH_DAY_RE = re.compile(rf"\b({_MONTHS})\s+(\d{{1,2}})\b")
+_YEARS_LINE_RE = re.compile(r"^(?:\s*20\d{2})+\s*$")
+_DURATION_RE = re.compile(r"\b(three|six|nine|twelve) months ended\b|\byears? ended\b", re.I)
+_UNIT_RE = re.compile(r"\bin (thousands|millions|billions)\b", re.I)
+
+MIN_ROWS = 3            # shortest run of numeric lines treated as a table
+MAX_GAP = 2             # label-only lines ("Assets:") allowed inside a table
+HEADER_LOOKBACK = 6     # lines above a table searched for column headers, units and the title
+MAX_LABEL_CHARS = 90    # longer "labels" are prose that happens to end in a number
+
+
+def parse_cell(token):
+    """Numeric value of a table cell; parentheses are negatives, a dash is zero."""
+    if token in ("—", "–", "-"):
+        return 0.0
+    negative = token.startswith("(") and token.endswith(")")
+    number = token.strip("()%").replace(",", "")
+    value = float(number)
+    return -value if negative else value
+
+
+def split_row(line):
+    """Split "Label $ 1,234 $ (56)" into ("Label", ["1,234", "(56)"]), or None if it isn't a table row."""
+    tokens = line.split()
+    cells = []
+    while tokens and (_CELL_RE.match(tokens[-1]) or tokens[-1] in ("$", "%")):
+        token = tokens.pop()
+        if token not in ("$", "%"):
+            cells.insert(0, token)
+    # Amounts carry thousands separators; a bare year or "(1)" footnote marker
+    # at the left edge belongs to the label ("Senior notes due 2028 1,000 1,000")
+    while len(cells) > 1 and re.match(r"^(?:\d{4}|\(\d\))$", cells[0]):
+        tokens.append(cells.pop(0))
+    label = " ".join(tokens).rstrip(" .:$")
+    if not cells or not re.search(r"[A-Za-z]", label) or len(label) > MAX_LABEL_CHARS:
+        return None
+    # Column headers such as "June 30, 2024 December 31, 2023" only "end" in years
+    if all(re.match(r"^\d{4}$", c) for c in cells):
+        return None
+    return label, cells
+
+
+def _column_labels(header_lines, ncols):
+    """Return [(label, period_end ISO date or None)] for the columns of a table."""
+    text = " ".join(header_lines)
+    dates = [(m, int(d), int(y)) for m, d, y in _DATE_RE.findall(text)]
+    if len(dates) == ncols:
+        return [(f"{m} {d}, {y}", _iso(m, d, y)) for m, d, y in dates]
+
+    years = []
+    for line in header_lines:
+        if _YEARS_LINE_RE.match(line):
+            years.extend(int(y) for y in line.split())
+    if len(years) == ncols:
+        durations = [d.group(0).title() for d in _DURATION_RE.finditer(text)] or [None]
+        month_days = _MONTH_DAY_RE.findall(text)
+        per_duration = max(1, ncols // len(durations))
+        labels = []
+        for i, year in enumerate(years):
+            duration = durations[min(i // per_duration, len(durations) - 1)]
+            month, day = month_days[min(i // per_duration, len(month_days) - 1)] if month_days else ("December", 31)
+            label = f"{duration} {month} {day}, {year}" if duration else str(year)
+            labels.append((label, _iso(month, int(day), year)))
+        return labels
+    return [(f"column {i + 1}", None) for i in range(ncols)]
+
+
+def _iso(month, day, year):
+    try:
+        return date(year, list(calendar.month_name).index(month), day).isoformat()
+    except ValueError:
+        return None
+
+
+def _title_and_unit(above):
+    title, unit = None, None
+    for line in reversed(above):
+        match = _UNIT_RE.search(line)
+        if match:
+            unit = unit or match.group(1).lower()
+            continue
+        if (title is None and not _DATE_RE.search(line) and not _YEARS_LINE_RE.match(line)
+                and not _DURATION_RE.search(line) and not line.endswith(":")
+                and split_row(line) is None and len(line) <= 100):
+            title = line.strip(" ()-,")
+    return title, unit
+
+
+def extract_page_tables(lines):
+    """Yield (title, unit, header_lines, rows) for each table on a page; rows are (group, label, cells)."""
+    i = 0
+    while i < len(lines):
+        if split_row(lines[i]) is None:
+            i += 1
+            continue
+        start, rows, gap, j = i, [], 0, i
+        # "Revenues:" right above the first row groups it too
+        group = lines[i - 1].rstrip(":") if i and lines[i - 1].endswith(":") else None
+        while j < len(lines) and gap <= MAX_GAP:
+            parsed = split_row(lines[j])
+            if parsed:
+                rows.append((group, *parsed))
+                gap = 0
+            elif not _YEARS_LINE_RE.match(lines[j]):
+                gap += 1
+                # "Assets:" / "Liabilities and Equity:" label the rows below it
+                if lines[j].endswith(":") and len(lines[j]) <= MAX_LABEL_CHARS:
+                    group = lines[j].rstrip(":")
+            j += 1
+        end = j - gap
+        if len(rows) >= MIN_ROWS and sum(1 for r in rows if len(r[2]) >= 2) * 2 >= len(rows):
+            above = lines[max(0, start - HEADER_LOOKBACK):start]
+            title, unit = _title_and_unit(above)
+            yield title, unit, above, rows
+        i = max(end, i + 1)
+
+
+class TableExtractor:
+    """
+    Collects fact rows from one filing while its pages stream past; tap() wraps
+    the page iterator so tables are extracted in the same pass as chunking.
+    """
+
+    def __init__(self, source_file, filings=None):
+        self.source_file = source_file
+        filings = filings if filings is not None else available_filings()
+        self.filing_type, self.fiscal_year, self.fiscal_quarter = filings.get(source_file, (None, None, None))
+        self.tracker = SectionTracker()
+        self.facts = []
+
+    def tap(self, pages):
+        for page_number, text in pages:
+            self.add_page(page_number, text)
+            yield page_number, text
+
+    def add_page(self, page_number, text):
+        lines = [l.strip() for l in (text or "").splitlines() if l.strip()]
+        for line in lines:
+            heading = parse_heading(line)
+            if heading:
+                self.tracker.update(*heading)
+        for title, unit, header, rows in extract_page_tables(lines):
+            ncols = max(len(cells) for _, _, cells in rows)
+            columns = _column_labels(header, ncols)
+            for group, label, cells in rows:
+                # Short rows (subtotals, single-period lines) align to the rightmost columns
+                offset = ncols - len(cells)
+                for k, token in enumerate(cells):
+                    column_label, period_end = columns[offset + k]
+                    self.facts.append({
+                        "source_file": self.source_file,
+                        "filing_type": self.filing_type,
+                        "fiscal_year": self.fiscal_year,
+                        "fiscal_quarter": self.fiscal_quarter,
+                        "page": page_number,
+                        "section": self.tracker.breadcrumb,
+                        "table_title": title,
+                        "line_group": group,
+                        "line_item": label,
+                        "column_index": offset + k,
+                        "column_label": column_label,
+                        "period_end": period_end,
+                        "value": parse_cell(token),
+                        "unit": "%" if token.endswith("%") else unit,
+                    })
@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import math
+import struct
+from array import array
+from collections import Counter, defaultdict
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "indexes")
+
+MAGIC = b"BM25v1\n"
+
+# Keeps the tokens financial questions hinge on intact: "10-k", "q2", "2024", "$0.96", "4.5%"
+_TOKEN_RE = re.compile(r"\$?\d+(?:[.,]\d+)*%?(?![a-z0-9-])|[a-z0-9]+(?:-[a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how in is it its of on or "
+    "that the their this to was were what when which who with".split()
+)
+
+# Row fields kept next to the postings so lexical hits can be returned without a DB round trip
+DOC_FIELDS = ("id", "source_file", "page", "chunk_index", "section", "source_url", "title", "published_at", "content")
+
+
+def tokenize(text):
+    tokens = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        tok = tok.rstrip(".,")
+        if tok and tok not in STOPWORDS:
+            tokens.append(tok)
+    return tokens
+
+
+def index_path(name):
+    return os.path.join(INDEX_DIR, f"{name}.bm25")
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over chunk rows.
+
+    On disk the index is a small JSON header (parameters, vocabulary, document
+    rows) followed by flat uint32/uint16 arrays for document lengths, posting
+    offsets, posting doc ids and term frequencies, so loading is one json.loads
+    and a few array.frombytes calls.
+    """
+
+    def __init__(self, docs, vocab, doc_lengths, offsets, postings, freqs, k1=1.5, b=0.75):
+        self.docs = docs
+        self.vocab = vocab
+        self.term_ids = {term: i for i, term in enumerate(vocab)}
+        self.doc_lengths = doc_lengths
+        self.offsets = offsets
+        self.postings = postings
+        self.freqs = freqs
+        self.k1 = k1
+        self.b = b
+        self.avgdl = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+
+    def __len__(self):
+        return len(self.docs)
+
+    @classmethod
+    def build(cls, rows, k1=1.5, b=0.75):
+        docs = []
+        doc_lengths = array("I")
+        term_postings = defaultdict(list)
+
+        for doc_id, row in enumerate(rows):
+            docs.append({k: row[k] for k in DOC_FIELDS if row.get(k) is not None})
+            counts = Counter(tokenize(row["content"]))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_postings[term].append((doc_id, min(tf, 0xFFFF)))
+
+        vocab = sorted(term_postings)
+        offsets = array("I", [0])
+        postings = array("I")
+        freqs = array("H")
+        for term in vocab:
+            for doc_id, tf in term_postings[term]:
+                postings.append(doc_id)
+                freqs.append(tf)
+            offsets.append(len(postings))
+
+        return cls(docs, vocab, doc_lengths, offsets, postings, freqs, k1=k1, b=b)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = json.dumps({
+            "k1": self.k1,
+            "b": self.b,
+            "vocab": self.vocab,
+            "docs": self.docs,
+            "sizes": [len(self.doc_lengths), len(self.offsets), len(self.postings)],
+        }, separators=(",", ":")).encode("utf-8")
+
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for arr in (self.doc_lengths, self.offsets, self.postings, self.freqs):
+                f.write(arr.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not a BM25 index file")
+
+        pos = len(MAGIC)
+        (header_len,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        header = json.loads(data[pos:pos + header_len])
+        pos += header_len
+
+        arrays = []
+        for typecode, size in zip("IIIH", header["sizes"] + header["sizes"][-1:]):
+            arr = array(typecode)
+            nbytes = size * arr.itemsize
+            arr.frombytes(data[pos:pos + nbytes])
+            pos += nbytes
+            arrays.append(arr)
+
+        return cls(header["docs"], header["vocab"], *arrays, k1=header["k1"], b=header["b"])
+
+    def search(self, query, k=10, allowed=None):
+        """
+        Return up to k (doc, score) pairs, best first. `allowed` is an optional
+        predicate over doc rows used to restrict the search space.
+        """
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+
+        scores = defaultdict(float)
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for i in range(start, end):
+                doc_id = self.postings[i]
+                tf = self.freqs[i]
+                norm = k1 * (1 - b + b * self.doc_lengths[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        hits = []
+        for doc_id, score in ranked:
+            doc = self.docs[doc_id]
+            if allowed is not None and not allowed(doc):
+                continue
+            hits.append((doc, score))
+            if len(hits) == k:
+                break
+        return hits
+
+
+def load_index(name):
+    """Load data/indexes/<name>.bm25, or return None if it was never built."""
+    path = index_path(name)
+    if not os.path.exists(path):
+        return None
+    return BM25Index.load(path)
@@ -0,0 +1,148 @@
+import os
+import re
+import sqlite3
+import threading
+
+from retrieval.bm25_index import INDEX_DIR, tokenize
+from retrieval.query_filters import parse_query_filters, sec_source_files
+
+# Local table of financial facts extracted from the SEC filings
+# (ingestion/sec_tables.py), for numeric questions that one indexed lookup can
+# answer: "How much liquidity did Prologis report at the end of Q2 2024?"
+
+FACTS_PATH = os.path.join(INDEX_DIR, "sec_facts.sqlite")
+
+FACT_COLUMNS = (
+    "source_file", "filing_type", "fiscal_year", "fiscal_quarter", "page", "section", "table_title",
+    "line_group", "line_item", "column_index", "column_label", "period_end", "value", "unit",
+)
+
+_SCHEMA = """
+create table facts (
+    id integer primary key,
+    source_file text not null,
+    filing_type text,
+    fiscal_year integer,
+    fiscal_quarter integer,
+    page integer,
+    section text,
+    table_title text,
+    line_group text,
+    line_item text not null,
+    column_index integer,
+    column_label text,
+    period_end text,
+    value real not null,
+    unit text
+);
+create index facts_source_file_idx on facts (source_file);
+create index facts_period_end_idx on facts (period_end);
+create virtual table facts_fts using fts5(
+    line_item, line_group, table_title, content='facts', content_rowid='id'
+);
+"""
+
+# Questions asking for an amount rather than an explanation
+_NUMERIC_RE = re.compile(
+    r"\b(how much|how many|what (?:was|were|is|are) (?:the |its |prologis'?s? )?(?:total|net|amount)"
+    r"|total|amount|balance|liquidity|revenues?|earnings|income|ffo|cash|debt|borrowings|per share|dividends? paid)\b",
+    re.I,
+)
+
+# Words that say what is asked for but never appear in a line item
+_QUERY_STOPWORDS = frozenset(
+    "how much many show me give tell report reported reports prologis prologis's company end quarter quarterly "
+    "year annual latest most recent last q1 q2 q3 q4 10-k 10-q filing filings period fiscal during as total".split()
+)
+
+# Line item terms must match; group and title terms only break ties
+_FTS_WEIGHTS = "bm25(facts_fts, 1.0, 0.3, 0.2)"
+
+
+def is_numeric_question(query):
+    return bool(_NUMERIC_RE.search(query))
+
+
+def _terms(query):
+    return [t for t in tokenize(query) if t not in _QUERY_STOPWORDS and not re.match(r"^[\d$.,%]+$", t)]
+
+
+class FactStore:
+    """SQLite fact table with an FTS5 index over line items and table titles."""
+
+    def __init__(self, path=FACTS_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def build(facts, path=FACTS_PATH):
+        """Replace the fact table with `facts` (dicts with FACT_COLUMNS). Returns the row count."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        conn = sqlite3.connect(tmp)
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.executemany(
+                f"insert into facts ({', '.join(FACT_COLUMNS)}) values ({', '.join('?' * len(FACT_COLUMNS))})",
+                [tuple(f.get(c) for c in FACT_COLUMNS) for f in facts],
+            )
+            conn.execute("insert into facts_fts(facts_fts) values ('rebuild')")
+        count = conn.execute("select count(*) from facts").fetchone()[0]
+        conn.close()
+        # Swap in whole so a running app never sees a half-built table
+        os.replace(tmp, path)
+        return count
+
+    def lookup(self, query, filings, limit=8):
+        """
+        Facts whose line item matches the question, restricted to the filings
+        and periods it names. Returns [] when nothing matches the line item.
+        """
+        terms = _terms(query)
+        if not terms:
+            return []
+        filters = parse_query_filters(query)
+        source_files = sec_source_files(filters, filings)
+        years = sorted({y for y, _ in filters.periods}) if filters and filters.periods else []
+
+        where = ["facts_fts match ?"]
+        # Every term may hit the title or group, but at least one must hit the line item
+        params = [" OR ".join(f'"{t}"' for t in terms)]
+        where.append("(" + " OR ".join("f.line_item like ?" for _ in terms) + ")")
+        params.extend(f"%{t}%" for t in terms)
+        if source_files is not None:
+            where.append(f"f.source_file in ({', '.join('?' * len(source_files))})")
+            params.extend(source_files)
+        # Without a period, the current-period column of the newest filing wins the tie
+        order = [_FTS_WEIGHTS]
+        if years:
+            order.insert(0, f"(substr(f.period_end, 1, 4) in ({', '.join('?' * len(years))})) desc")
+        order.extend(["f.fiscal_year desc", "coalesce(f.fiscal_quarter, 5) desc", "f.column_index"])
+        sql = (
+            f"select f.*, {_FTS_WEIGHTS} as score from facts_fts join facts f on f.id = facts_fts.rowid "
+            f"where {' and '.join(where)} order by {', '.join(order)} limit ?"
+        )
+        args = params + [str(y) for y in years] + [limit]
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, args).fetchall()]
+
+
+def format_fact(fact):
+    """One fact as a context line: "Total liquidity, June 30, 2024: 5,385,347 (thousands) — ..."."""
+    value = fact["value"]
+    shown = f"{value:,.2f}" if value % 1 else f"{value:,.0f}"
+    unit = f" ({fact['unit']})" if fact.get("unit") else ""
+    item = f"{fact['line_group']}: {fact['line_item']}" if fact.get("line_group") else fact["line_item"]
+    where = ", ".join(str(p) for p in (fact["source_file"], fact.get("table_title"), f"page {fact['page']}") if p)
+    return f"{item}, {fact['column_label']}: {shown}{unit} [{where}]"
+
+
+def load_fact_store(path=FACTS_PATH):
+    """Open the fact store, or None if it was never built."""
+    if not os.path.exists(path):
+        return None
+    return FactStore(path)
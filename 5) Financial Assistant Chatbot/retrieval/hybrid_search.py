@@ -0,0 +1,72 @@
+import hashlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_files.clients import RETRIEVAL_CONCURRENCY
+from agent_files.tracing import annotate, span
+
+# Reciprocal rank fusion constant; 60 is the usual default and is robust to
+# the very different score scales of BM25 and cosine similarity
+RRF_K = 60
+
+_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_CONCURRENCY, thread_name_prefix="hybrid")
+
+
+def chunk_key(row):
+    """Identify a chunk across Supabase rows and local index docs by its text."""
+    text = " ".join(row.get("content", "").split())
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def fuse(result_lists, weights=None, k=10):
+    """
+    Merge ranked row lists with weighted reciprocal rank fusion. Each fused row
+    carries `hybrid_score` plus the rank it had in each input list.
+    """
+    weights = weights or [1.0] * len(result_lists)
+    fused = {}
+    for list_idx, (rows, weight) in enumerate(zip(result_lists, weights)):
+        for rank, row in enumerate(rows):
+            key = chunk_key(row)
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**row, "hybrid_score": 0.0, "ranks": [None] * len(result_lists)}
+            entry["hybrid_score"] += weight / (RRF_K + rank + 1)
+            entry["ranks"][list_idx] = rank + 1
+
+    ranked = sorted(fused.values(), key=lambda r: r["hybrid_score"], reverse=True)
+    return ranked[:k]
+
+
+def hybrid_search(query, vector_search, index, k=10, candidates=30, lexical_weight=1.0, vector_weight=1.0, allowed=None,
+                  on_error=None):
+    """
+    Run vector and BM25 retrieval in parallel and fuse the rankings.
+
+    `vector_search(limit)` returns Supabase rows ranked by similarity. `index`
+    is a BM25Index, or None to fall back to vector-only search. `allowed` is an
+    optional predicate restricting which index docs can match. If the vector
+    search fails, the BM25 hits are returned alone; the error is recorded on
+    the active span and passed to `on_error` when given.
+    """
+    if index is None:
+        return vector_search(k)
+
+    # Copy the context so spans opened by vector_search nest under the caller's span
+    vector_future = _executor.submit(contextvars.copy_context().run, vector_search, candidates)
+    with span("bm25.search", index_size=len(index)) as s:
+        lexical_hits = index.search(query, k=candidates, allowed=allowed)
+        s.set(result_count=len(lexical_hits))
+    lexical_rows = [{**doc, "bm25_score": score} for doc, score in lexical_hits]
+    try:
+        vector_rows = vector_future.result() or []
+    except Exception as e:
+        if not lexical_rows:
+            raise
+        annotate(vector_error=f"{type(e).__name__}: {e}")
+        if on_error:
+            on_error(f"Vector search failed, using keyword matches only: {e}")
+        vector_rows = []
+
+    with span("fuse", vector_count=len(vector_rows), lexical_count=len(lexical_rows)):
+        return fuse([vector_rows, lexical_rows], weights=[vector_weight, lexical_weight], k=k)
@@ -0,0 +1,189 @@
+import os
+import json
+import numpy as np
+
+from retrieval.bm25_index import INDEX_DIR, DOC_FIELDS
+
+MODES = ("int8", "binary")
+
+# Rows scored per block in the int8 first pass; small blocks keep the float32 scratch in cache
+BLOCK_ROWS = 1024
+
+# Row fields left on disk and read back only for returned hits; the rest stay in
+# RAM so search filters (source_file, published_at) can run without touching disk
+PAYLOAD_FIELDS = ("content",)
+
+# 8-bit popcount table, used when numpy lacks bitwise_count (numpy < 2.0)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _paths(name, index_dir=INDEX_DIR):
+    base = os.path.join(index_dir, name)
+    return {
+        "float32": f"{base}.f32.npy",
+        "int8": f"{base}.i8.npy",
+        "scales": f"{base}.i8scale.npy",
+        "binary": f"{base}.bin.npy",
+        "meta": f"{base}.vectors.json",
+        "payloads": f"{base}.payloads.jsonl",
+        "offsets": f"{base}.payloads.idx.npy",
+    }
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_int8(vectors):
+    """Symmetric per-vector scalar quantization: v ≈ scale * code, code in [-127, 127]."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors):
+    """One sign bit per dimension, packed eight to a byte."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def _hamming(codes, query_code):
+    xor = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[xor].sum(axis=1, dtype=np.int32)
+
+
+class QuantizedIndex:
+    """
+    Local vector index that keeps compact codes and row metadata in RAM.
+
+    The first pass scores every row on int8 or binary codes, then the best
+    `shortlist` rows are re-ranked with exact cosine similarity against the
+    original float32 vectors, which stay memory-mapped on disk and are only
+    paged in for the shortlisted rows. Chunk text (PAYLOAD_FIELDS) also stays
+    on disk as JSON lines and is read back only for the k returned rows.
+    """
+
+    def __init__(self, rows, floats, mode, codes, scales=None, payloads_path=None, offsets=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown quantization mode {mode!r}, expected one of {MODES}")
+        self.rows = rows
+        self.floats = floats
+        self.mode = mode
+        self.codes = codes
+        self.scales = scales
+        self.payloads_path = payloads_path
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.rows)
+
+    @staticmethod
+    def build(name, rows, vectors, index_dir=INDEX_DIR):
+        """Write float32, int8 and binary representations of `vectors` for table `name`."""
+        paths = _paths(name, index_dir)
+        os.makedirs(index_dir, exist_ok=True)
+        floats = _normalize(vectors)
+        codes, scales = quantize_int8(floats)
+
+        np.save(paths["float32"], floats)
+        np.save(paths["int8"], codes)
+        np.save(paths["scales"], scales)
+        np.save(paths["binary"], quantize_binary(floats))
+
+        metadata = []
+        offsets = np.empty(len(rows), dtype=np.int64)
+        with open(paths["payloads"], "wb") as f:
+            for i, row in enumerate(rows):
+                doc = {k: row[k] for k in DOC_FIELDS if row.get(k) is not None}
+                offsets[i] = f.tell()
+                f.write(json.dumps({k: doc.pop(k) for k in PAYLOAD_FIELDS if k in doc},
+                                   separators=(",", ":")).encode("utf-8") + b"\n")
+                metadata.append(doc)
+        np.save(paths["offsets"], offsets)
+        with open(paths["meta"], "w", encoding="utf-8") as f:
+            json.dump({"dims": int(floats.shape[1]), "rows": metadata}, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, name, mode="int8", index_dir=INDEX_DIR):
+        paths = _paths(name, index_dir)
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        floats = np.load(paths["float32"], mmap_mode="r")
+        payloads = {"payloads_path": paths["payloads"], "offsets": np.load(paths["offsets"], mmap_mode="r")}
+        if mode == "int8":
+            return cls(meta["rows"], floats, mode, np.load(paths["int8"]), np.load(paths["scales"]), **payloads)
+        return cls(meta["rows"], floats, mode, np.load(paths["binary"]), **payloads)
+
+    @classmethod
+    def exists(cls, name, index_dir=INDEX_DIR):
+        return all(os.path.exists(p) for p in _paths(name, index_dir).values())
+
+    def memory_bytes(self):
+        """Bytes held in RAM by the codes, versus the float32 matrix they replace."""
+        resident = self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+        return {"codes": int(resident), "float32": int(self.floats.shape[0] * self.floats.shape[1] * 4)}
+
+    def _payloads(self, indices):
+        """Read the on-disk payload fields of rows `indices` (one seek per row)."""
+        if self.payloads_path is None:
+            return [{} for _ in indices]
+        payloads = []
+        with open(self.payloads_path, "rb") as f:
+            for i in indices:
+                f.seek(int(self.offsets[i]))
+                payloads.append(json.loads(f.readline()))
+        return payloads
+
+    def _first_pass(self, query, mask):
+        if self.mode == "int8":
+            scores = np.empty(len(self.rows), dtype=np.float32)
+            for start in range(0, len(self.rows), BLOCK_ROWS):
+                block = self.codes[start:start + BLOCK_ROWS].astype(np.float32)
+                scores[start:start + BLOCK_ROWS] = (block @ query) * self.scales[start:start + BLOCK_ROWS]
+        else:
+            # Fewer differing sign bits means a smaller angle
+            scores = -_hamming(self.codes, quantize_binary(query[None, :])[0]).astype(np.float32)
+        if mask is not None:
+            scores[~mask] = -np.inf
+        return scores
+
+    def search(self, query_vector, k=10, shortlist=None, allowed=None):
+        """
+        Return up to k rows (with a `similarity` field), best first. `allowed`
+        is an optional predicate over rows, applied before ranking.
+        """
+        if not self.rows:
+            return []
+        query = _normalize(query_vector)
+        mask = None
+        if allowed is not None:
+            mask = np.fromiter((bool(allowed(row)) for row in self.rows), dtype=bool, count=len(self.rows))
+            if not mask.any():
+                return []
+
+        shortlist = min(shortlist or k * (4 if self.mode == "int8" else 10), len(self.rows))
+        scores = self._first_pass(query, mask)
+        candidates = np.argpartition(-scores, shortlist - 1)[:shortlist]
+        candidates = candidates[np.isfinite(scores[candidates])]
+
+        # Re-rank the shortlist with the original vectors; sorted indices keep mmap reads sequential
+        candidates.sort()
+        exact = np.asarray(self.floats[candidates]) @ query
+        hits = candidates[np.argsort(-exact)[:k]]
+        similarity = dict(zip(candidates.tolist(), exact.tolist()))
+        return [
+            {**self.rows[i], **payload, "similarity": float(similarity[i])}
+            for i, payload in zip(hits.tolist(), self._payloads(hits.tolist()))
+        ]
+
+
+def load_quantized_index(name, mode):
+    """Load the quantized index for table `name`, or None if it was never built."""
+    if not mode or not QuantizedIndex.exists(name):
+        return None
+    return QuantizedIndex.load(name, mode=mode)
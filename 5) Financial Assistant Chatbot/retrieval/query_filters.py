@@ -0,0 +1,150 @@
+import os
+import re
+import calendar
+from datetime import date, timedelta
+from collections import namedtuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# prologis_10K_2023.pdf, prologis_10Q_Q2_2024.pdf
+_FILING_RE = re.compile(r"^prologis_(10K|10Q)_(?:Q([1-4])_)?(\d{4})\.pdf$", re.IGNORECASE)
+
+# Earnings releases for a quarter come out a few weeks after it closes
+RELEASE_LAG_DAYS = 60
+
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+
+_QUARTER_RE = re.compile(r"\b(?:q([1-4])|(first|second|third|fourth) quarter)(?:\s+(?:of\s+)?(?:fy\s*)?(\d{4}))?\b")
+_MONTH_RE = re.compile(r"\b(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?\s+(\d{4})\b")
+_YEAR_RE = re.compile(r"\b(20\d{2})\b")
+_YEAR_RANGE_RE = re.compile(r"\b(20\d{2})\s*(?:-|–|—|to|through)\s*(20\d{2})\b")
+_ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4}
+
+# filing_types: {"10K", "10Q"}; periods: [(year, quarter or None)];
+# date_from/date_to: inclusive publication date range; latest: "latest"/"most recent" was asked for
+QueryFilters = namedtuple("QueryFilters", ["filing_types", "periods", "date_from", "date_to", "latest"])
+
+
+def _quarter_bounds(year, quarter):
+    start = date(year, 3 * quarter - 2, 1)
+    end_month = 3 * quarter
+    end = date(year, end_month, calendar.monthrange(year, end_month)[1])
+    return start, end
+
+
+def parse_query_filters(query):
+    """
+    Pull fiscal periods, years, filing types and month/year dates out of a
+    question. Returns None when the question carries no usable constraint.
+    """
+    text = query.lower()
+
+    filing_types = set()
+    if re.search(r"\b10-?k\b|\bannual report\b", text):
+        filing_types.add("10K")
+    if re.search(r"\b10-?q\b|\bquarterly (?:report|filing)\b", text):
+        filing_types.add("10Q")
+
+    periods, ranges = [], []
+    for q_num, q_word, year in _QUARTER_RE.findall(text):
+        quarter = int(q_num) if q_num else _ORDINALS[q_word]
+        if year:
+            periods.append((int(year), quarter))
+            ranges.append(_quarter_bounds(int(year), quarter))
+
+    for month, year in _MONTH_RE.findall(text):
+        m, y = MONTHS[month], int(year)
+        ranges.append((date(y, m, 1), date(y, m, calendar.monthrange(y, m)[1])))
+
+    # Bare years only count when no quarter or month already claimed them
+    claimed = {y for y, _ in periods} | {r[0].year for r in ranges}
+    years = [int(y) for y in _YEAR_RE.findall(text)]
+    for start, end in _YEAR_RANGE_RE.findall(text):
+        years.extend(range(int(start), int(end) + 1))
+    for year in sorted(set(years) - claimed):
+        periods.append((year, None))
+        ranges.append((date(year, 1, 1), date(year, 12, 31)))
+
+    latest = bool(re.search(r"\b(latest|most recent|last)\b", text))
+
+    if not (filing_types or periods or ranges or latest):
+        return None
+
+    date_from = min(r[0] for r in ranges) if ranges else None
+    date_to = max(r[1] for r in ranges) if ranges else None
+    return QueryFilters(filing_types, periods, date_from, date_to, latest)
+
+
+def available_filings(data_dir=DATA_DIR):
+    """Map each filing PDF in data/ to (filing_type, year, quarter)."""
+    filings = {}
+    for fname in os.listdir(data_dir):
+        match = _FILING_RE.match(fname)
+        if match:
+            kind, quarter, year = match.groups()
+            filings[fname] = (kind.upper(), int(year), int(quarter) if quarter else None)
+    return filings
+
+
+def sec_source_files(filters, filings):
+    """
+    Resolve filters to the filing PDFs they can match, or None for no restriction.
+    A Q4 question maps to that year's 10-K since there is no fourth-quarter 10-Q.
+    Filters that match no filing on hand (e.g. a period not yet ingested) are dropped.
+    """
+    if filters is None:
+        return None
+
+    candidates = {
+        fname: meta for fname, meta in filings.items()
+        if not filters.filing_types or meta[0] in filters.filing_types
+    }
+    if filters.periods:
+        wanted = set()
+        for fname, (kind, year, quarter) in candidates.items():
+            for p_year, p_quarter in filters.periods:
+                if year != p_year:
+                    continue
+                if p_quarter is None or quarter == p_quarter or (p_quarter == 4 and kind == "10K"):
+                    wanted.add(fname)
+        candidates = {f: candidates[f] for f in wanted}
+    elif filters.latest and candidates:
+        # Keep only the newest filing of each requested type
+        newest = {}
+        for fname, (kind, year, quarter) in candidates.items():
+            key = (year, quarter or 5)
+            if kind not in newest or key > newest[kind][0]:
+                newest[kind] = (key, fname)
+        candidates = {fname: candidates[fname] for _, fname in newest.values()}
+
+    if not candidates or len(candidates) == len(filings):
+        return None
+    return sorted(candidates)
+
+
+def press_release_window(filters):
+    """
+    Resolve filters to an inclusive (published_after, published_before) date
+    window, or None. Quarter windows are stretched to cover the earnings release.
+    """
+    if filters is None or filters.date_from is None:
+        return None
+    date_to = filters.date_to
+    if filters.periods and any(q for _, q in filters.periods):
+        date_to = date_to + timedelta(days=RELEASE_LAG_DAYS)
+    return filters.date_from, date_to
+
+
+def source_file_predicate(source_files):
+    if source_files is None:
+        return None
+    allowed = set(source_files)
+    return lambda doc: doc.get("source_file") in allowed
+
+
+def published_predicate(window):
+    if window is None:
+        return None
+    start, end = window[0].isoformat(), window[1].isoformat()
+    return lambda doc: start <= (doc.get("published_at") or "")[:10] <= end